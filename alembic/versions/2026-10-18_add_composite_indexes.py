@@ -0,0 +1,42 @@
+"""add composite indexes
+
+Revision ID: 294af1bd36f4
+Revises: 8344b6d6201e
+Create Date: 2026-10-18 16:05:52.760913
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '294af1bd36f4'
+down_revision = '8344b6d6201e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        op.f('ix_operations_company_id_is_approved_created_at'),
+        'operations',
+        ['company_id', 'is_approved', 'is_regular_operation', 'created_at'],
+        unique=False,
+        postgresql_include=['operation_type', 'category', 'base_amount'],
+    )
+    op.create_index(
+        op.f('ix_operations_is_regular_operation_is_approved'),
+        'operations',
+        ['is_regular_operation', 'is_approved', 'repeat_type'],
+        unique=False,
+    )
+    op.create_index(
+        op.f('ix_companies_users_company_id'),
+        'companies_users',
+        ['company_id'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_companies_users_company_id'), table_name='companies_users')
+    op.drop_index(op.f('ix_operations_is_regular_operation_is_approved'), table_name='operations')
+    op.drop_index(op.f('ix_operations_company_id_is_approved_created_at'), table_name='operations')
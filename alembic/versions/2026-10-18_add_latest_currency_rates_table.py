@@ -0,0 +1,41 @@
+"""add latest currency rates table
+
+Revision ID: b0cd535f56b3
+Revises: a6ba80711d02
+Create Date: 2026-10-18 11:02:41.318204
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b0cd535f56b3'
+down_revision = 'a6ba80711d02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'latest_currency_rates',
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('ccy', sa.String(), nullable=False),
+        sa.Column('base_ccy', sa.String(), nullable=False),
+        sa.Column('buy', sa.Float(), nullable=False),
+        sa.Column('sale', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('ccy', name=op.f('pk_latest_currency_rates')),
+    )
+    # currencies is append-only, so the row with the greatest id is the latest rate of each currency
+    op.execute(
+        """
+        insert into latest_currency_rates (ccy, base_ccy, buy, sale, created_at, updated_at)
+        select c.ccy, c.base_ccy, c.buy, c.sale, c.created_at, c.created_at
+        from currencies c
+        where c.id in (select max(id) from currencies group by ccy)
+        """,
+    )
+
+
+def downgrade():
+    op.drop_table('latest_currency_rates')
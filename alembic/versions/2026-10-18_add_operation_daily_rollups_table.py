@@ -0,0 +1,54 @@
+"""add operation daily rollups table
+
+Revision ID: 5c7e0d2a91f3
+Revises: 294af1bd36f4
+Create Date: 2026-10-18 18:12:36.204518
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5c7e0d2a91f3'
+down_revision = '294af1bd36f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'operation_daily_rollups',
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('operation_type', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('base_amount_sum', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['company_id'],
+            ['companies.id'],
+            name=op.f('fk_operation_daily_rollups_company_id_companies'),
+            ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint(
+            'company_id',
+            'day',
+            'operation_type',
+            'category',
+            name=op.f('pk_operation_daily_rollups'),
+        ),
+    )
+    op.execute(
+        """
+        insert into operation_daily_rollups (company_id, day, operation_type, category, base_amount_sum, count)
+        select o.company_id, date(o.created_at), o.operation_type, coalesce(o.category, ''),
+               coalesce(sum(o.base_amount), 0), count(*)
+        from operations o
+        where o.is_approved = true and o.is_regular_operation = false
+        group by o.company_id, date(o.created_at), o.operation_type, coalesce(o.category, '')
+        """,
+    )
+
+
+def downgrade():
+    op.drop_table('operation_daily_rollups')
@@ -0,0 +1,59 @@
+"""add rate and base amount to operations
+
+Revision ID: 8344b6d6201e
+Revises: b0cd535f56b3
+Create Date: 2026-10-18 14:27:09.581346
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8344b6d6201e'
+down_revision = 'b0cd535f56b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('operations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rate', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('base_amount', sa.Float(), nullable=True))
+
+    # As-of lookups below (and the rate history in general) go by currency and date
+    op.create_index(
+        op.f('ix_currencies_ccy_created_at'),
+        'currencies',
+        ['ccy', 'created_at'],
+        unique=False,
+    )
+
+    # The last rate not later than the operation, or the earliest known rate for operations older than the history
+    op.execute(
+        """
+        update operations
+        set rate = case
+                       when currency = 'uah' then 1
+                       else coalesce(
+                               (select c.buy
+                                from currencies c
+                                where c.ccy = operations.currency
+                                  and c.created_at <= operations.created_at
+                                order by c.created_at desc
+                                limit 1),
+                               (select c.buy
+                                from currencies c
+                                where c.ccy = operations.currency
+                                order by c.created_at
+                                limit 1)
+                           ) end
+        """,
+    )
+    op.execute('update operations set base_amount = received_amount * rate')
+
+
+def downgrade():
+    op.drop_index(op.f('ix_currencies_ccy_created_at'), table_name='currencies')
+    with op.batch_alter_table('operations', schema=None) as batch_op:
+        batch_op.drop_column('base_amount')
+        batch_op.drop_column('rate')
@@ -0,0 +1,42 @@
+"""add selected companies table
+
+Revision ID: 9e41b7c3d8a2
+Revises: 5c7e0d2a91f3
+Create Date: 2026-10-18 20:41:03.718254
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9e41b7c3d8a2'
+down_revision = '5c7e0d2a91f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'selected_companies',
+        sa.Column('chat_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['chat_id'],
+            ['users.chat_id'],
+            name=op.f('fk_selected_companies_chat_id_users'),
+            ondelete='CASCADE',
+        ),
+        sa.ForeignKeyConstraint(
+            ['company_id'],
+            ['companies.id'],
+            name=op.f('fk_selected_companies_company_id_companies'),
+            ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint('chat_id', name=op.f('pk_selected_companies')),
+    )
+    op.create_index('ix_selected_companies_company_id', 'selected_companies', ['company_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_selected_companies_company_id', table_name='selected_companies')
+    op.drop_table('selected_companies')
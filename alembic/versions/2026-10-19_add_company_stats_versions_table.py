@@ -0,0 +1,34 @@
+"""add company stats versions table
+
+Revision ID: 7b2d94e0c6a1
+Revises: 3f8a6c1e5b07
+Create Date: 2026-10-19 10:14:52.481907
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '7b2d94e0c6a1'
+down_revision = '3f8a6c1e5b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'company_stats_versions',
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['company_id'],
+            ['companies.id'],
+            name=op.f('fk_company_stats_versions_company_id_companies'),
+            ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint('company_id', name=op.f('pk_company_stats_versions')),
+    )
+
+
+def downgrade():
+    op.drop_table('company_stats_versions')
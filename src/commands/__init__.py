@@ -1,4 +1,19 @@
+from commands.benchmarks import (
+    BenchmarkCurrencyRates,
+    BenchmarkDashboardStats,
+    BenchmarkOperationRows,
+    BenchmarkStatementCache,
+)
 from commands.currencies import FetchCurrency
-from commands.operations import CreateRegularOperation
+from commands.maintenance import DeleteExpiredStates, MaintainSQLite
+from commands.nlp import (
+    BenchmarkNlpMemory,
+    BenchmarkNlpStartup,
+    BuildNlpSnapshots,
+    CheckLemmatizerParity,
+    RunInferenceServer,
+)
+from commands.operations import CreateRegularOperation, RebuildOperationRollups, RecategorizeOperations
+from commands.queries import CheckQueryPlans
 from commands.reports import SendMonthlyReport, SendWeeklyReport
 from commands.schedule import Schedule
@@ -0,0 +1,429 @@
+import asyncio
+import calendar
+import random
+import sqlite3
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+import sqlalchemy as sa
+from sqlalchemy.sql import ClauseElement
+
+from commands.base import Command
+from database import database
+from modules.operations.repositories import OperationRepository
+from modules.operations.schemas import Operation
+from sdk.repositories import BaseRepository
+
+DashboardPeriods = Tuple[datetime, datetime, datetime, datetime]
+DashboardStats = Tuple[Dict[str, float], Dict[str, float]]
+
+
+class BenchmarkCurrencyRates(Command):
+    """
+    Сравнивает запросы статистики с подзапросом max(created_at) по currencies, с join на latest_currency_rates
+    и по зафиксированной base_amount на синтетической SQLite базе в памяти
+    """
+
+    command_name = 'benchmark_currency_rates'
+    operations_count = 1_000_000
+    companies_count = 1000
+    history_days = 5 * 365
+    queries_count = 200
+    currencies = (
+        'usd', 'eur', 'pln', 'gbp', 'chf', 'czk', 'cad', 'jpy', 'cny', 'try',
+        'sek', 'nok', 'dkk', 'huf', 'ron', 'bgn', 'ils', 'aud', 'nzd', 'sgd',
+        'hkd', 'krw', 'inr', 'mxn', 'brl', 'zar', 'kzt', 'mdl', 'gel', 'azn',
+    )  # fmt: skip
+    # Share of operations in each currency, the rest are in uah
+    operation_currencies = (('usd', 0.2), ('eur', 0.1))
+
+    schema = """
+    create table currencies (
+        id integer primary key autoincrement,
+        created_at datetime,
+        updated_at datetime,
+        ccy varchar not null,
+        base_ccy varchar not null,
+        buy float not null,
+        sale float not null
+    );
+    create index ix_currencies_id on currencies (id);
+    create table latest_currency_rates (
+        created_at datetime,
+        updated_at datetime,
+        ccy varchar primary key,
+        base_ccy varchar not null,
+        buy float not null,
+        sale float not null
+    );
+    create table operations (
+        id integer primary key autoincrement,
+        created_at datetime,
+        amount integer not null,
+        received_amount integer,
+        currency varchar not null,
+        operation_type varchar not null,
+        is_approved boolean not null,
+        is_regular_operation boolean not null,
+        category varchar,
+        rate float,
+        base_amount float,
+        company_id integer not null
+    );
+    create index ix_operations_id on operations (id);
+    """
+
+    stats_query = """
+    select sum(case when (o.operation_type = 'income')
+                    then o.received_amount * (case when (o.currency = 'uah') then 1 else c.buy end)
+                    else 0 end) as income,
+           sum(case when (o.operation_type = 'expense')
+                    then o.received_amount * (case when (o.currency = 'uah') then 1 else c.buy end)
+                    else 0 end) as expense
+    from operations o
+             {join}
+    where o.created_at between :date_from and :date_to
+      and o.is_approved = true
+      and o.is_regular_operation = false
+      and o.company_id = :company_id
+    """
+    correlated_join = """left join currencies c on
+                c.ccy = o.currency and
+                c.created_at = (select max(created_at) from currencies where ccy = o.currency)"""
+    latest_join = 'left join latest_currency_rates c on c.ccy = o.currency'
+    base_amount_stats_query = """
+    select sum(case when (o.operation_type = 'income') then o.base_amount else 0 end) as income,
+           sum(case when (o.operation_type = 'expense') then o.base_amount else 0 end) as expense
+    from operations o
+    where o.created_at between :date_from and :date_to
+      and o.is_approved = true
+      and o.is_regular_operation = false
+      and o.company_id = :company_id
+    """
+
+    @classmethod
+    def create_database(cls: Type['BenchmarkCurrencyRates']) -> sqlite3.Connection:
+        rng = random.Random(0)
+        connection = sqlite3.connect(':memory:')
+        connection.executescript(cls.schema)
+        started_at = datetime(2020, 1, 1)
+        rates = [{ccy: rng.uniform(1, 50) for ccy in cls.currencies} for _ in range(cls.history_days)]
+        connection.executemany(
+            'insert into currencies (created_at, ccy, base_ccy, buy, sale) values (?, ?, ?, ?, ?)',
+            (
+                ((started_at + timedelta(days=day)).strftime('%Y-%m-%d %H:%M:%S'), ccy, 'uah', rate, rate)
+                for day, day_rates in enumerate(rates)
+                for ccy, rate in day_rates.items()
+            ),
+        )
+        connection.execute(
+            """
+            insert into latest_currency_rates (ccy, base_ccy, buy, sale, created_at, updated_at)
+            select ccy, base_ccy, buy, sale, created_at, created_at from currencies
+            where id in (select max(id) from currencies group by ccy)
+            """,
+        )
+        connection.executemany(
+            """
+            insert into operations (
+                created_at, amount, received_amount, currency, operation_type, category, rate, base_amount,
+                company_id, is_approved, is_regular_operation
+            )
+            values (?, ?, ?, ?, ?, ?, ?, ?, ?, true, false)
+            """,
+            cls.get_operations(rng, rates, started_at),
+        )
+        connection.commit()
+        return connection
+
+    @classmethod
+    def get_currency(cls: Type['BenchmarkCurrencyRates'], rng: random.Random) -> str:
+        value = rng.random()
+        for ccy, share in cls.operation_currencies:
+            if value < share:
+                return ccy
+            value -= share
+        return 'uah'
+
+    @classmethod
+    def get_operations(
+        cls: Type['BenchmarkCurrencyRates'],
+        rng: random.Random,
+        rates: List[Dict[str, float]],
+        started_at: datetime,
+    ) -> List[tuple]:
+        """Строки операций со случайными суммами, валютами и компаниями за history_days дней"""
+        seconds = cls.history_days * 24 * 60 * 60
+        operations: List[tuple] = []
+        for _ in range(cls.operations_count):
+            amount = rng.randint(1, 10000)
+            created_at = rng.randrange(seconds)
+            currency = cls.get_currency(rng)
+            rate = 1 if currency == 'uah' else rates[created_at // (24 * 60 * 60)][currency]
+            operations.append(
+                (
+                    (started_at + timedelta(seconds=created_at)).strftime('%Y-%m-%d %H:%M:%S'),
+                    amount,
+                    amount,
+                    currency,
+                    'expense' if rng.random() < 0.8 else 'income',
+                    rng.choice(('food', 'house', 'pet', 'other')),
+                    rate,
+                    amount * rate,
+                    rng.randint(1, cls.companies_count),
+                ),
+            )
+        return operations
+
+    @classmethod
+    def get_query_values(cls: Type['BenchmarkCurrencyRates']) -> List[dict]:
+        """Статистика за случайный месяц случайной компании, как в /stats"""
+        rng = random.Random(1)
+        values = []
+        for _ in range(cls.queries_count):
+            date_from = datetime(2020, 1, 1) + timedelta(days=rng.randrange(cls.history_days - 31))
+            values.append(
+                {
+                    'company_id': rng.randint(1, cls.companies_count),
+                    'date_from': date_from.strftime('%Y-%m-%d %H:%M:%S'),
+                    'date_to': (date_from + timedelta(days=31)).strftime('%Y-%m-%d %H:%M:%S'),
+                },
+            )
+        return values
+
+    @classmethod
+    def measure(
+        cls: Type['BenchmarkCurrencyRates'],
+        execute: Callable[[dict], list],
+        values: List[dict],
+    ) -> Tuple[float, float, list]:
+        """Общее и медианное время запросов и их результаты"""
+        timings, results = [], []
+        for query_values in values:
+            started_at = time.perf_counter()
+            results.append(execute(query_values))
+            timings.append(time.perf_counter() - started_at)
+        return sum(timings), statistics.median(timings), results
+
+    @classmethod
+    async def run(cls: Type['BenchmarkCurrencyRates']) -> None:
+        started_at = time.perf_counter()
+        connection = cls.create_database()
+        print(f'Database is created in {time.perf_counter() - started_at:.1f}s')  # noqa: T201
+        values = cls.get_query_values()
+        queries = (
+            ('correlated subquery', cls.stats_query.format(join=cls.correlated_join)),
+            ('latest_currency_rates', cls.stats_query.format(join=cls.latest_join)),
+            # Historical operations at their own rates, so the sums differ from the two queries above
+            ('frozen base_amount', cls.base_amount_stats_query),
+        )
+        measurements = []
+        for name, query in queries:
+            total, median, results = cls.measure(
+                lambda x: connection.execute(query, x).fetchall(),  # noqa: B023
+                values,
+            )
+            measurements.append((total, results))
+            speedup = measurements[0][0] / total
+            print(f'{name}: total {total:.3f}s, median {median * 1000:.2f}ms, x{speedup:.1f}')  # noqa: T201
+        if measurements[0][1] != measurements[1][1]:
+            raise ValueError('Queries at the latest rates returned different results')
+
+
+class BenchmarkStatementCache(Command):
+    """
+    Сравнивает подготовку запросов репозиториев для databases: компиляция на каждый вызов
+    и кэш скомпилированных запросов BaseRepository. Запросы к базе не выполняются
+    """
+
+    command_name = 'benchmark_statement_cache'
+    calls_count = 10000
+
+    @classmethod
+    def get_statements(cls: Type['BenchmarkStatementCache']) -> Dict[str, Callable[[int], Any]]:
+        """Запросы с разными значениями на каждый вызов, как в работе бота"""
+        model = OperationRepository.model
+        return {
+            'get by id': lambda i: OperationRepository.get_base_query().where(sa.and_(model.id == i)).limit(1),
+            'count by fields': lambda i: sa.select([sa.func.count()])
+            .select_from(model)
+            .where(sa.and_(model.company_id == i, model.is_approved == True)),  # noqa: E712
+            'update by id': lambda i: sa.update(model).values(category='food').where(model.id == i),
+            'raw sql': lambda i: sa.text(
+                'select * from operations o where o.company_id = :company_id and o.is_approved = true limit :limit',
+            ).bindparams(company_id=i, limit=5),
+        }
+
+    @classmethod
+    def compile_statement(cls: Type['BenchmarkStatementCache'], statement: ClauseElement) -> Dict[str, Any]:
+        """То же, что делает databases с запросом без кэша"""
+        compiled = statement.compile(
+            dialect=database._backend._dialect,
+            compile_kwargs={'render_postcompile': True},
+        )
+        return compiled.construct_params()
+
+    @classmethod
+    async def run(cls: Type['BenchmarkStatementCache']) -> None:
+        for name, build in cls.get_statements().items():
+            timings = []
+            for prepare in (cls.compile_statement, lambda x: BaseRepository.prepare(x).construct_params()):
+                started_at = time.perf_counter()
+                for i in range(cls.calls_count):
+                    prepare(build(i))
+                timings.append((time.perf_counter() - started_at) / cls.calls_count)
+            compiled, cached = timings
+            print(  # noqa: T201
+                f'{name}: compile {compiled * 1e6:.1f}us, cached {cached * 1e6:.1f}us per call, '
+                f'x{compiled / cached:.1f}',
+            )
+        print(BaseRepository.compiled_cache)  # noqa: T201
+
+
+class BenchmarkOperationRows(Command):
+    """
+    Сравнивает стоимость строки при создании схем операций с валидацией pydantic и без нее:
+    большая страница операций из репозитория и проекция регулярных операций на месяц вперед
+    """
+
+    command_name = 'benchmark_operation_rows'
+    rows_count = 10000
+    regular_count = 100
+    days_count = 30
+
+    @classmethod
+    def get_rows(cls: Type['BenchmarkOperationRows']) -> List[Dict[str, Any]]:
+        """Строки в том виде, в котором их возвращает репозиторий"""
+        rng = random.Random(0)
+        return [
+            {
+                'id': i,
+                'created_at': datetime(2026, 1, 1) + timedelta(minutes=i),
+                'updated_at': None,
+                'amount': rng.randint(1, 10000),
+                'received_amount': rng.randint(1, 10000),
+                'currency': rng.choice(('uah', 'usd', 'eur')),
+                'operation_type': rng.choice(('expense', 'income')),
+                'description': 'продукты',
+                'repeat_type': rng.choice(('no_repeat', 'every_month')),
+                'repeat_days': rng.choice((None, [1, 15, 'last'])),
+                'is_approved': True,
+                'is_regular_operation': False,
+                'category': rng.choice((None, 'food', 'salary')),
+                'rate': 1.0,
+                'base_amount': 100.0,
+                'creator_id': 1,
+                'company_id': 1,
+            }
+            for i in range(cls.rows_count)
+        ]
+
+    @classmethod
+    def measure(cls: Type['BenchmarkOperationRows'], name: str, calls: List[Callable[[], Any]]) -> None:
+        timings = []
+        for call in calls:
+            started_at = time.perf_counter()
+            count = len(call())
+            timings.append((time.perf_counter() - started_at) / count)
+        validated, constructed = timings
+        print(  # noqa: T201
+            f'{name}: validated {validated * 1e6:.1f}us, constructed {constructed * 1e6:.1f}us per row, '
+            f'x{validated / constructed:.1f}',
+        )
+
+    @classmethod
+    async def run(cls: Type['BenchmarkOperationRows']) -> None:
+        rows = cls.get_rows()
+        regular_count = cls.regular_count
+        cls.measure(
+            'operations page',
+            [
+                lambda: [Operation(**row) for row in rows],
+                lambda: [Operation.from_row(row) for row in rows],
+            ],
+        )
+        base_operations = [
+            Operation.from_row(row).dict(exclude={'created_at', 'is_regular_operation'})
+            for row in rows[:regular_count]
+        ]
+        days = [datetime(2026, 1, day + 1, 8) for day in range(cls.days_count)]
+        cls.measure(
+            'future operations',
+            [
+                lambda: [Operation(**x, created_at=day) for x in base_operations for day in days],
+                lambda: [Operation.construct(**x, created_at=day) for x in base_operations for day in days],
+            ],
+        )
+
+
+class BenchmarkDashboardStats(Command):
+    """
+    Сравнивает запросы /today на кэш промахе: статистика дня и месяца двумя запросами и регулярные операции
+    последовательно, и статистика одним проходом параллельно с регулярными операциями.
+    Читает компанию с наибольшим числом дневных сводок из настроенной базы, ничего не записывает
+    """
+
+    command_name = 'benchmark_dashboard_stats'
+    rounds = 200
+
+    @classmethod
+    async def sequential(
+        cls: Type['BenchmarkDashboardStats'],
+        periods: DashboardPeriods,
+        company_id: int,
+    ) -> DashboardStats:
+        day_from, day_to, month_from, month_to = periods
+        day_stats = await OperationRepository.get_stats(day_from, day_to, company_id)
+        month_stats = await OperationRepository.get_stats(month_from, month_to, company_id)
+        await OperationRepository.get_regular_operations(company_id)
+        return day_stats, month_stats
+
+    @classmethod
+    async def single_pass(
+        cls: Type['BenchmarkDashboardStats'],
+        periods: DashboardPeriods,
+        company_id: int,
+    ) -> DashboardStats:
+        stats, _ = await asyncio.gather(
+            OperationRepository.get_dashboard_stats(*periods, company_id),
+            OperationRepository.get_regular_operations(company_id),
+        )
+        return stats
+
+    @classmethod
+    async def run(cls: Type['BenchmarkDashboardStats']) -> None:
+        company_id = await database.fetch_val(
+            'select company_id from operation_daily_rollups group by company_id order by count(*) desc limit 1',
+        )
+        if company_id is None:
+            print('No operations to benchmark')  # noqa: T201
+            return
+        # The month of the latest operations of the company, so the periods are not empty
+        last_day = await database.fetch_val(
+            'select max(day) from operation_daily_rollups where company_id = :company_id',
+            values={'company_id': company_id},
+        )
+        if isinstance(last_day, str):
+            last_day = datetime.strptime(last_day, '%Y-%m-%d')
+        day = datetime(last_day.year, last_day.month, last_day.day)
+        month_to = datetime(day.year, day.month, calendar.monthrange(day.year, day.month)[1])
+        periods = (day, day.replace(hour=23, minute=59, second=59), day.replace(day=1), month_to)
+
+        medians, results = [], []
+        for measured in (cls.sequential, cls.single_pass):
+            timings = []
+            for _ in range(cls.rounds):
+                started_at = time.perf_counter()
+                result = await measured(periods, company_id)
+                timings.append(time.perf_counter() - started_at)
+            medians.append(statistics.median(timings))
+            results.append(result)
+        sequential, single_pass = medians
+        print(  # noqa: T201
+            f'company {company_id}, {day:%Y-%m-%d}: sequential {sequential * 1000:.2f}ms, '
+            f'single pass {single_pass * 1000:.2f}ms, x{sequential / single_pass:.1f}',
+        )
+        if results[0] != results[1]:
+            raise ValueError(f'Stats differ: {results[0]} != {results[1]}')
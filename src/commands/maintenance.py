@@ -0,0 +1,49 @@
+from typing import Type
+
+from commands.base import Command
+from database import database
+from sdk.fsm import storage
+
+
+class MaintainSQLite(Command):
+    """
+    Обслуживание базы SQLite: статистика планировщика, возврат свободных страниц и checkpoint WAL
+    """
+
+    command_name = 'maintain_sqlite'
+
+    @classmethod
+    async def run(cls: Type['MaintainSQLite']) -> None:
+        if database.url.dialect != 'sqlite':
+            print(f'Skipped: {database.url.dialect} database')  # noqa: T201
+            return
+        await database.execute('ANALYZE')
+        await database.execute('PRAGMA optimize')
+
+        auto_vacuum = await database.fetch_val('PRAGMA auto_vacuum')
+        free_pages = await database.fetch_val('PRAGMA freelist_count')
+        # Every execute() may get a new connection, while the pragmas below only act on the connection they run on.
+        # sqlite3 execute() also steps incremental_vacuum once and frees a single page, executescript() runs it through
+        async with database.connection() as connection:
+            # 2 - incremental. Switching an existing database to it needs one full VACUUM
+            if auto_vacuum != 2:
+                await connection.raw_connection.executescript('PRAGMA auto_vacuum = INCREMENTAL; VACUUM;')
+                print('auto_vacuum is switched to incremental')  # noqa: T201
+            await connection.raw_connection.executescript('PRAGMA incremental_vacuum;')
+        # (busy, log pages, checkpointed pages)
+        checkpoint = await database.fetch_one('PRAGMA wal_checkpoint(TRUNCATE)')
+        assert checkpoint is not None
+        print(  # noqa: T201
+            f'Freed {free_pages} pages, WAL checkpoint: '
+            f'busy={checkpoint[0]} log={checkpoint[1]} checkpointed={checkpoint[2]}',
+        )
+
+
+class DeleteExpiredStates(Command):
+    """Удаляет состояния FSM, не менявшиеся дольше FSM_STATE_TTL: они уже не читаются, но занимают место"""
+
+    command_name = 'delete_expired_states'
+
+    @classmethod
+    async def run(cls: Type['DeleteExpiredStates']) -> None:
+        await storage.delete_expired()
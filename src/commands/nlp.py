@@ -0,0 +1,212 @@
+import gc
+import multiprocessing
+import os
+import statistics
+import time
+from multiprocessing.queues import Queue
+from multiprocessing.synchronize import Barrier
+from typing import Callable, Dict, List, Type
+
+import spacy
+
+from commands.base import Command
+from config import LemmatizerMode, settings
+from modules.operations.enums import ExpenseCategoryEnum
+from modules.operations.repositories import OperationRepository
+from modules.operations.services import OperationService, inference_pool
+from sdk.inference_server import InferenceServer
+from sdk.lemmatizer import Lemmatizer
+from sdk.nlp import models
+from sdk.snapshots import build_snapshot, get_snapshot_path, load_snapshot
+
+
+class CheckLemmatizerParity(Command):
+    """
+    Сравнивает топ-2 категории, предсказанные после полного и lookup лемматизатора
+    """
+
+    command_name = 'check_lemmatizer_parity'
+    corpus_limit = 5000
+    reference_corpus = (
+        'продукты',
+        'аренду квартиры',
+        'подписку YouTube Family',
+        'интернет',
+        'теннис',
+        'кофе',
+        'такси до работы',
+        'бензин',
+        'корм для кота',
+        'лекарства в аптеке',
+        'сигареты',
+        'курсы английского',
+        'билеты в кино',
+        'новые кроссовки',
+        'ремонт ванной',
+        'обед в кафе',
+        # Words with several normal forms: the full lemmatizer chooses by the part of speech, lookup takes the first
+        'лук и картошка',
+        'замок на дверь',
+        'вина к ужину',
+        'мыло и шампунь',
+        'стекло на телефон',
+        'печь на дачу',
+        'пила для дров',
+        'три пиццы',
+        'стали для ножей',
+        'мой абонемент в зал',
+    )
+
+    @classmethod
+    async def run(cls: Type['CheckLemmatizerParity']) -> None:
+        category_model = spacy.load(os.path.join(settings.AI_MODELS_DIR, settings.CATEGORY_MODEL))
+        corpus = list(cls.reference_corpus) + await OperationRepository.get_expense_descriptions(cls.corpus_limit)
+        results: List[List[List[ExpenseCategoryEnum]]] = []
+        for mode in (LemmatizerMode.FULL, LemmatizerMode.LOOKUP):
+            lemmatizer = Lemmatizer(mode, lookup_mode=settings.LEMMATIZER_LOOKUP_MODE)
+            texts = [
+                OperationService.clean_tokens(lemma.strip() for lemma in lemmas)
+                for lemmas in lemmatizer.lemmatize_many(text.lower() for text in corpus)
+            ]
+            results.append([OperationService.get_top_categories(doc.cats) for doc in category_model.pipe(texts)])
+
+        mismatches = [(text, full, lookup) for text, full, lookup in zip(corpus, *results) if full != lookup]
+        for text, full, lookup in mismatches:
+            print(f'{text!r}: full={[x.value for x in full]} lookup={[x.value for x in lookup]}')  # noqa: T201
+        print(f'Checked {len(corpus)} descriptions, {len(mismatches)} mismatches')  # noqa: T201
+        if mismatches:
+            raise ValueError('Lookup lemmatizer changes predicted categories')
+
+
+class BuildNlpSnapshots(Command):
+    """
+    Сохраняет снимки всех пайплайнов реестра моделей для быстрого старта бота и воркеров
+    """
+
+    command_name = 'build_nlp_snapshots'
+
+    @classmethod
+    async def run(cls: Type['BuildNlpSnapshots']) -> None:
+        for name, exclude in models.pipelines:
+            snapshot_path = build_snapshot(name, exclude)
+            size = os.path.getsize(snapshot_path) / 1024 / 1024
+            print(f'{name}: {snapshot_path} ({size:.1f} MB)')  # noqa: T201
+
+
+class BenchmarkNlpStartup(Command):
+    """
+    Сравнивает время загрузки пайплайнов через spacy.load и из снимков
+    """
+
+    command_name = 'benchmark_nlp_startup'
+    repeats = 5
+
+    @classmethod
+    def measure(cls: Type['BenchmarkNlpStartup'], load: Callable[[], object]) -> float:
+        timings = []
+        for _ in range(cls.repeats):
+            gc.collect()
+            started_at = time.perf_counter()
+            load()
+            timings.append(time.perf_counter() - started_at)
+        return statistics.median(timings)
+
+    @classmethod
+    async def run(cls: Type['BenchmarkNlpStartup']) -> None:
+        total_source, total_snapshot = 0.0, 0.0
+        for name, exclude in models.pipelines:
+            if not os.path.exists(get_snapshot_path(name)):
+                raise ValueError(f'Snapshot for {name} not found, run build_nlp_snapshots first')
+            if load_snapshot(name, exclude) is None:
+                raise ValueError(f'Snapshot for {name} is outdated, run build_nlp_snapshots first')
+            source = cls.measure(lambda: spacy.load(name, exclude=list(exclude)))  # noqa: B023
+            snapshot = cls.measure(lambda: load_snapshot(name, exclude))  # noqa: B023
+            total_source += source
+            total_snapshot += snapshot
+            print(f'{name}: spacy.load {source:.3f}s, snapshot {snapshot:.3f}s, x{source / snapshot:.1f}')  # noqa: T201
+        print(  # noqa: T201
+            f'Total (median of {cls.repeats}): spacy.load {total_source:.3f}s, snapshot {total_snapshot:.3f}s',
+        )
+
+
+class BenchmarkNlpMemory(Command):
+    """
+    Сравнивает память процессов с загруженными моделями с обычными и memory-mapped векторами
+    """
+
+    command_name = 'benchmark_nlp_memory'
+    processes = 3
+    # RSS counts shared page cache pages in every process, PSS splits them between the processes
+    memory_fields = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+
+    @classmethod
+    def read_memory(cls: Type['BenchmarkNlpMemory']) -> Dict[str, int]:
+        """Память текущего процесса в MB из /proc/self/smaps_rollup"""
+        memory = {}
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                field, _, value = line.partition(':')
+                if field in cls.memory_fields:
+                    memory[field] = int(value.split()[0]) // 1024
+        return memory
+
+    @classmethod
+    def measure_process(
+        cls: Type['BenchmarkNlpMemory'],
+        barrier: Barrier,
+        results: Queue,
+    ) -> None:
+        models.load()
+        # All processes hold the models while being measured, otherwise shared pages are not shared
+        barrier.wait()
+        results.put(cls.read_memory())
+        barrier.wait()
+
+    @classmethod
+    def measure(cls: Type['BenchmarkNlpMemory']) -> List[Dict[str, int]]:
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(cls.processes)
+        results = context.Queue()
+        processes = [
+            context.Process(target=cls.measure_process, args=(barrier, results)) for _ in range(cls.processes)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            return [results.get() for _ in processes]
+        finally:
+            for process in processes:
+                process.join()
+
+    @classmethod
+    async def run(cls: Type['BenchmarkNlpMemory']) -> None:
+        mmap_vectors = settings.NLP_MMAP_VECTORS
+        try:
+            for value in (False, True):
+                settings.NLP_MMAP_VECTORS = value
+                memory = cls.measure()
+                print(f'NLP_MMAP_VECTORS={settings.NLP_MMAP_VECTORS}, {cls.processes} processes:')  # noqa: T201
+                for field in cls.memory_fields:
+                    values = [x[field] for x in memory]
+                    print(f'  {field}: {values} MB, total {sum(values)} MB')  # noqa: T201
+        finally:
+            settings.NLP_MMAP_VECTORS = mmap_vectors
+
+
+class RunInferenceServer(Command):
+    """
+    Inference сервер: загружает модели один раз и отвечает на запросы процессов бота по Unix сокету NLP_SERVER_SOCKET
+    """
+
+    command_name = 'run_inference_server'
+
+    @classmethod
+    async def run(cls: Type['RunInferenceServer']) -> None:
+        if not settings.NLP_SERVER_SOCKET:
+            raise ValueError('NLP_SERVER_SOCKET is not set')
+        inference_pool.start()
+        await inference_pool.warmup()
+        try:
+            await InferenceServer(inference_pool, settings.NLP_SERVER_SOCKET).serve_forever()
+        finally:
+            inference_pool.shutdown()
@@ -1,13 +1,16 @@
 import json
+import os
+import time
 from calendar import monthrange
 from datetime import datetime
-from typing import Type
+from typing import Dict, Type
 
 import sentry_sdk
 
 from commands.base import Command
 from config import bot, settings
-from modules.operations.enums import OperationType
+from modules.operations.enums import ExpenseCategoryEnum, OperationType
+from modules.operations.repositories import OperationRepository
 from modules.operations.schemas import OperationImport
 from modules.operations.services import OperationService
 from sdk import utils
@@ -59,3 +62,53 @@ class ImportOperations(Command):
             ]
             await OperationService.create_many_operations(operations)
             sentry_sdk.capture_message(f'Imported {len(operations)} operations')
+
+
+class RecategorizeOperations(Command):
+    """
+    Проставляет категории расходам без категории (импортированным или созданным до появления поля category)
+    """
+
+    command_name = 'recategorize_operations'
+    chunk_size = 10000
+    batch_size = 512
+    n_process = max((os.cpu_count() or 1) - 1, 1)
+
+    @classmethod
+    async def run(cls: Type['RecategorizeOperations']) -> None:
+        # Descriptions repeat a lot (groceries, rent, ...), each one is classified once per run
+        categories: Dict[str, ExpenseCategoryEnum] = {}
+        started_at = time.perf_counter()
+        last_id, total = 0, 0
+        while True:
+            operations = await OperationRepository.get_uncategorized_expenses(last_id, cls.chunk_size)
+            if not operations:
+                break
+            await OperationService.recategorize_operations(
+                [(x['id'], x['description']) for x in operations],
+                categories,
+                batch_size=cls.batch_size,
+                n_process=cls.n_process,
+            )
+            last_id = operations[-1]['id']
+            total += len(operations)
+            elapsed = time.perf_counter() - started_at
+            print(f'{total} operations, {total / elapsed:.0f} ops/sec')  # noqa: T201
+        elapsed = time.perf_counter() - started_at
+        message = f'Recategorized {total} operations in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} ops/sec)'
+        print(message)  # noqa: T201
+        sentry_sdk.capture_message(message)
+
+
+class RebuildOperationRollups(Command):
+    """
+    Пересчитывает дневные сводки операций (operation_daily_rollups) по таблице operations
+    """
+
+    command_name = 'rebuild_operation_rollups'
+
+    @classmethod
+    async def run(cls: Type['RebuildOperationRollups']) -> None:
+        started_at = time.perf_counter()
+        await OperationRepository.rebuild_rollups()
+        print(f'Operation rollups are rebuilt in {time.perf_counter() - started_at:.1f}s')  # noqa: T201
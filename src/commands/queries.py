@@ -0,0 +1,141 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type, Union
+
+import sqlalchemy as sa
+from sqlalchemy.sql import ClauseElement
+
+from commands.base import Command
+from database import database
+from modules.companies.repositories import CompanyRepository, CompanyUserRepository, SelectedCompanyRepository
+from modules.fsm.repositories import FSMStateRepository
+from modules.operations.repositories import OperationRepository
+from sdk.pagination import Cursor, CursorDirection
+from sdk.repositories import CompiledStatement
+
+RecordedQuery = Tuple[str, Dict[str, Any]]
+
+
+class CheckQueryPlans(Command):
+    """
+    Проверяет планы запросов репозиториев: EXPLAIN QUERY PLAN в SQLite, EXPLAIN в Postgres.
+    Падает, если какой-то из запросов читает таблицу полным сканированием
+    """
+
+    command_name = 'check_query_plans'
+    # Queries that read the whole table by design
+    full_scan_allowed = (
+        'CompanyRepository.get_all_companies',
+        'OperationRepository.get_expense_descriptions',
+    )
+
+    @classmethod
+    def get_queries(cls: Type['CheckQueryPlans']) -> Dict[str, Callable[[], Awaitable[Any]]]:
+        now = datetime.now()
+        return {
+            'OperationRepository.get_regular_operations': lambda: OperationRepository.get_regular_operations(),
+            'OperationRepository.get_regular_operations(company_id)': (
+                lambda: OperationRepository.get_regular_operations(company_id=1)
+            ),
+            'OperationRepository.get_stats': lambda: OperationRepository.get_stats(now, now, company_id=1),
+            'OperationRepository.get_dashboard_stats': (
+                lambda: OperationRepository.get_dashboard_stats(now, now, now, now, company_id=1)
+            ),
+            'OperationRepository.get_operations': (
+                lambda: OperationRepository.get_operations(is_regular_operation=False, company_id=1)
+            ),
+            'OperationRepository.get_operations(cursor)': (
+                lambda: OperationRepository.get_operations(
+                    is_regular_operation=False,
+                    company_id=1,
+                    cursor=Cursor(CursorDirection.AFTER, key=(now, 1)),
+                )
+            ),
+            'OperationRepository.count_operations': lambda: OperationRepository.count_operations(False, 1),
+            'OperationRepository.get_stats_by_categories': (
+                lambda: OperationRepository.get_stats_by_categories(now, now, company_id=1)
+            ),
+            'OperationRepository.get_expense_descriptions': lambda: OperationRepository.get_expense_descriptions(1),
+            'OperationRepository.get_approved_categories': lambda: OperationRepository.get_approved_categories(1),
+            'OperationRepository.get_uncategorized_expenses': (
+                lambda: OperationRepository.get_uncategorized_expenses(0, 1)
+            ),
+            'OperationRepository.get_stats_version': lambda: OperationRepository.get_stats_version(1),
+            'CompanyRepository.get_my_companies': lambda: CompanyRepository.get_my_companies(1),
+            'CompanyUserRepository.get_company_ids': lambda: CompanyUserRepository.get_company_ids(1),
+            'CompanyUserRepository.get_participants': lambda: CompanyUserRepository.get_participants(1),
+            'CompanyRepository.get_all_companies': lambda: CompanyRepository.get_all_companies(),
+            'SelectedCompanyRepository.get_company_id': lambda: SelectedCompanyRepository.get_company_id(1),
+            'FSMStateRepository.get_state': lambda: FSMStateRepository.get_state(1, 1, now),
+        }
+
+    @classmethod
+    def compile_query(
+        cls: Type['CheckQueryPlans'],
+        query: Union[str, ClauseElement, CompiledStatement],
+        values: Optional[Dict[str, Any]] = None,
+    ) -> RecordedQuery:
+        """SQL запроса с именованными параметрами и значения параметров этого вызова"""
+        if isinstance(query, str):
+            query = sa.text(query).bindparams(**values) if values else sa.text(query)
+        elif isinstance(query, CompiledStatement):
+            query = query.statement
+        # The cached compilation may use positional parameters, so the statement is compiled again with named ones
+        dialect = type(database._backend._dialect)(paramstyle='named')
+        compiled = query.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+        return str(compiled), compiled.params
+
+    @classmethod
+    async def record_queries(cls: Type['CheckQueryPlans'], call: Callable[[], Awaitable[Any]]) -> List[RecordedQuery]:
+        """Вызывает метод репозитория, подменив запросы к базе записью SQL и параметров"""
+        recorded: List[RecordedQuery] = []
+
+        def recorder(result: Any) -> Callable[..., Awaitable[Any]]:  # noqa: ANN401
+            async def record(
+                query: Union[str, ClauseElement, CompiledStatement],
+                values: Optional[Dict[str, Any]] = None,
+            ) -> Any:  # noqa: ANN401
+                recorded.append(cls.compile_query(query, values))
+                return result
+
+            return record
+
+        database.fetch_all = recorder([])  # type: ignore[assignment]
+        database.fetch_one = recorder(None)  # type: ignore[assignment]
+        database.fetch_val = recorder(None)  # type: ignore[assignment]
+        try:
+            await call()
+        finally:
+            for name in ('fetch_all', 'fetch_one', 'fetch_val'):
+                database.__dict__.pop(name, None)
+        return recorded
+
+    @classmethod
+    async def get_full_scans(cls: Type['CheckQueryPlans'], query: str, values: Dict[str, Any]) -> List[str]:
+        if database.url.dialect == 'sqlite':
+            plan = [row['detail'] for row in await database.fetch_all(f'EXPLAIN QUERY PLAN {query}', values)]
+            # "SCAN (subquery-N)" reads an already filtered subquery, "SCAN CONSTANT ROW" reads nothing
+            return [x for x in plan if x.startswith('SCAN ') and not x.startswith(('SCAN (', 'SCAN CONSTANT ROW'))]
+        async with database.transaction():
+            # Empty tables are cheaper to scan, so without this the planner ignores indexes on a fresh database
+            await database.execute('SET LOCAL enable_seqscan = off')
+            plan = [row[0] for row in await database.fetch_all(f'EXPLAIN {query}', values)]
+        return [x.strip() for x in plan if 'Seq Scan' in x]
+
+    @classmethod
+    async def check_query(cls: Type['CheckQueryPlans'], name: str, query: str, values: Dict[str, Any]) -> bool:
+        """Печатает полные сканирования таблиц запроса, возвращает True, если они не разрешены"""
+        full_scans = await cls.get_full_scans(query, values)
+        is_failed = bool(full_scans) and name not in cls.full_scan_allowed
+        status = 'FULL SCAN' if is_failed else 'ok'
+        print(f'{name}: {status} {full_scans if full_scans else ""}')  # noqa: T201
+        return is_failed
+
+    @classmethod
+    async def run(cls: Type['CheckQueryPlans']) -> None:
+        failed = []
+        for name, call in cls.get_queries().items():
+            for query, values in await cls.record_queries(call):
+                if await cls.check_query(name, query, values):
+                    failed.append(name)
+        if failed:
+            raise ValueError(f'Full table scans in {", ".join(failed)}')
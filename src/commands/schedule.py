@@ -5,6 +5,7 @@ from croniter import croniter
 from commands import SendWeeklyReport
 from commands.base import Command
 from commands.currencies import FetchCurrency
+from commands.maintenance import DeleteExpiredStates, MaintainSQLite
 from commands.operations import CreateRegularOperation
 from commands.reports import SendMonthlyReport
 
@@ -53,6 +54,8 @@ class Schedule(Command):
             cls.schedule.command(CreateRegularOperation).cron('0 9 * * *'),
             cls.schedule.command(SendWeeklyReport).cron('0 10 * * 1'),
             cls.schedule.command(SendMonthlyReport).cron('0 11 1 * *'),
+            cls.schedule.command(MaintainSQLite).cron('0 4 * * *'),
+            cls.schedule.command(DeleteExpiredStates).every_hour(),
         ]
 
     @classmethod
@@ -1,13 +1,9 @@
 import os
-import sys
 from enum import Enum
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
-import spacy
 from aiogram import Bot, Dispatcher
-from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from pydantic import BaseSettings
-from spacy import Language
 
 
 class Environment(str, Enum):
@@ -15,6 +11,20 @@ class Environment(str, Enum):
     DEV = 'dev'
 
 
+class LemmatizerMode(str, Enum):
+    # Полный пайплайн ru_core_news_md без parser и ner: леммы с учетом части речи
+    FULL = 'full'
+    # Только токенизатор и словарный лемматизатор pymorphy, без векторов и нейросетевых компонентов
+    LOOKUP = 'lookup'
+
+
+class SelectedCompanyBackend(str, Enum):
+    # Таблица selected_companies в основной базе
+    DATABASE = 'database'
+    # Redis (или сервер с его протоколом), общий для нескольких процессов бота
+    REDIS = 'redis'
+
+
 class EnvSettings(BaseSettings):
     """
     Настройки из переменных окружения
@@ -27,6 +37,20 @@ class EnvSettings(BaseSettings):
     BASE_DIR: str = os.path.dirname(os.path.abspath(__file__))
 
     DB_URI: str = 'sqlite:///db.sqlite3'
+    # Compiled SQLAlchemy statements kept by BaseRepository
+    DB_COMPILED_CACHE_SIZE: int = 500
+    # Prepared statements kept by the driver per connection: asyncpg statement_cache_size, sqlite3 cached_statements
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    # PostgreSQL connection pool, SQLite opens a connection per query
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    # SQLite connection pragmas, applied to every connection
+    SQLITE_JOURNAL_MODE: str = 'wal'
+    SQLITE_SYNCHRONOUS: str = 'normal'
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # Negative values are in KiB
+    SQLITE_CACHE_SIZE: int = -64 * 1024
 
     # Telegram
     BOT_TOKEN: Optional[str] = None
@@ -36,7 +60,52 @@ class EnvSettings(BaseSettings):
 
     AI_MODELS_DIR: str
 
+    # NLP inference
+    NLP_WORKERS: int = 1
+    NLP_BATCH_SIZE: int = 16
+    NLP_BATCH_WAIT_MS: float = 5
+    NLP_CACHE_SIZE: int = 10000
+    NLP_CACHE_TTL: int = 24 * 60 * 60
+    LEMMATIZER_MODE: LemmatizerMode = LemmatizerMode.FULL
+    LEMMATIZER_LOOKUP_MODE: str = 'pymorphy3_lookup'
+    LEMMATIZER_MEMO_SIZE: int = 100000
+    CATEGORY_INDEX_SIZE: int = 1000
+    NLP_SNAPSHOTS: bool = True
+    NLP_SNAPSHOTS_DIR: Optional[str] = None
+    NLP_MMAP_VECTORS: bool = False
+    NLP_SERVER_SOCKET: Optional[str] = None
+    NLP_SERVER_POOL_SIZE: int = 4
+    NLP_SERVER_TIMEOUT: float = 5
+    NLP_SERVER_RETRY_AFTER: float = 30
+
+    # Companies
+    SELECTED_COMPANY_BACKEND: SelectedCompanyBackend = SelectedCompanyBackend.DATABASE
+    # Selections are cached in each process, changes in other processes are seen after the ttl
+    SELECTED_COMPANY_CACHE_SIZE: int = 10000
+    SELECTED_COMPANY_CACHE_TTL: int = 60
+    # Company ids of a user and participants of a company
+    COMPANY_MEMBERSHIP_CACHE_SIZE: int = 10000
+    COMPANY_MEMBERSHIP_CACHE_TTL: int = 60
+    REDIS_URL: str = 'redis://localhost:6379/0'
+    REDIS_TIMEOUT: float = 5
+
+    # FSM states: unchanged for FSM_STATE_TTL seconds are reset, existing ones are cached for FSM_CACHE_TTL
+    FSM_STATE_TTL: int = 24 * 60 * 60
+    FSM_CACHE_SIZE: int = 10000
+    FSM_CACHE_TTL: float = 5
+
+    # Operations
+    OPERATION_COUNT_CACHE_SIZE: int = 10000
+    OPERATION_COUNT_CACHE_TTL: int = 60
+    # Stats and future operations for /today and /month. Invalidated by changes made in this process and by new
+    # currency rates, operations written by other processes (the schedule) are seen after the ttl
+    STATS_CACHE_SIZE: int = 10000
+    STATS_CACHE_TTL: int = 60
+
     SENTRY_DSN: Optional[str] = None
+    LOG_LEVEL: str = 'INFO'
+    # Hit rates of the caches and fast paths are logged this often, in seconds
+    METRICS_LOG_INTERVAL: int = 3600
 
     class Config:
         env_file = '.env'
@@ -65,9 +134,25 @@ class HardSettings:
     +/-{amount: int} {currency: длина 3 символа} {regular_period: период повторения} {description:*}
     """
     OPERATION_REGULAR_REGEX_PATTERN: str = (
-        r'^(?P<amount>[+-].?[0-9]+) (?P<currency>\w{3}) (?P<repeat_time>\S.*) за (?P<description>\S.*)'  # noqa: E501
+        r'^(?P<amount>[+-].?[0-9]+) (?P<currency>\w{3}) (?P<repeat_time>\S.*?) за (?P<description>\S.*)'  # noqa: E501
+    )
+
+    """
+    Паттерн добавления регулярных операций с периодом в конце
+    +/-{amount: int} {currency: длина 3 символа} {description:*} {regular_period: каждый/каждую/каждое ...}
+    """
+    OPERATION_REGULAR_SUFFIX_REGEX_PATTERN: str = (
+        r'^(?P<amount>[+-].?[0-9]+) (?P<currency>\w{3}) (?P<description>\S.*?) (?P<repeat_time>кажд\w* \S.*)'
     )
 
+    # Rates from NBU are quoted in hryvnia, so stats and operations' base_amount are in it too
+    BASE_CURRENCY: str = 'uah'
+
+    # Bulk inserts: rows per statement, bounded by the bind parameters limit of a statement
+    # (SQLITE_MAX_VARIABLE_NUMBER since SQLite 3.32, one less than the asyncpg limit)
+    DB_BULK_CHUNK_SIZE: int = 1000
+    DB_MAX_BIND_PARAMETERS: int = 32766
+
     # API configuration.
     DEFAULT_DATETIME_FORMAT: str = '%Y-%m-%dT%H:%M:%S%z'
 
@@ -78,6 +163,11 @@ class HardSettings:
     # AI Models
     CATEGORY_MODEL: str = 'category-classifier'
     OPERATION_MODEL: str = 'operation-ner'
+    NLP_WARMUP_TEXTS: Tuple[str, ...] = (
+        '-1300 грн за продукты',
+        '-7 usd за подписку YouTube Family каждое 4 число',
+        '+500 usd зарплата',
+    )
 
     EXPENSE_CATEGORIES: Dict[str, str] = {
         'bad_habits': '🚬 Вредные привычки',
@@ -99,9 +189,6 @@ class HardSettings:
         'other': '🗃 Другое',
     }
 
-    # Companies that user selected. In the future, it will be moved to Redis
-    SELECTED_COMPANIES: Dict[int, int] = {}
-
 
 class Settings(EnvSettings, HardSettings):
     pass
@@ -110,13 +197,6 @@ class Settings(EnvSettings, HardSettings):
 settings = Settings()
 
 bot = Bot(token=settings.BOT_TOKEN)
-nlp: Language
-operation_model: Language
-category_model: Language
-if os.path.basename(sys.argv[0]) == 'main.py':
-    nlp = spacy.load('ru_core_news_md')
-    operation_model = spacy.load(os.path.join(settings.AI_MODELS_DIR, settings.OPERATION_MODEL))
-    category_model = spacy.load(os.path.join(settings.AI_MODELS_DIR, settings.CATEGORY_MODEL))
-
-storage = MemoryStorage()
-dp = Dispatcher(bot, storage=storage)
+
+# FSM storage uses the database, so it is set in main
+dp = Dispatcher(bot)
@@ -1,4 +1,5 @@
-from typing import TypeVar
+import sqlite3
+from typing import Any, Dict, List, TypeVar
 
 import databases
 from sqlalchemy import MetaData
@@ -8,11 +9,48 @@ from config import settings
 
 __all__ = ('database', 'metadata', 'Base')
 
+
+def get_sqlite_pragmas() -> List[str]:
+    # busy_timeout goes first, so that switching the journal mode waits for other connections too
+    return [
+        f'PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}',
+        f'PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}',
+        f'PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}',
+        # Always on: deleting a company relies on ON DELETE CASCADE
+        'PRAGMA foreign_keys = ON',
+        f'PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}',
+        f'PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}',
+    ]
+
+
+class SQLiteConnection(sqlite3.Connection):
+    """
+    Соединение SQLite с pragma из настроек. databases открывает новое соединение на каждый запрос
+    вне транзакции, поэтому pragma применяются при создании соединения
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        for pragma in get_sqlite_pragmas():
+            self.execute(pragma)
+
+
+def get_database_options() -> Dict[str, Any]:
+    """Параметры подключения драйвера: databases передает их в asyncpg.create_pool или sqlite3.connect"""
+    if databases.DatabaseURL(settings.DB_URI).dialect == 'postgresql':
+        return {
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'min_size': settings.DB_POOL_MIN_SIZE,
+            'max_size': settings.DB_POOL_MAX_SIZE,
+        }
+    return {'cached_statements': settings.DB_STATEMENT_CACHE_SIZE, 'factory': SQLiteConnection}
+
+
 database: databases.core.Database
 if settings.TESTING:
-    database = databases.Database(str(settings.DB_URI), force_rollback=True)
+    database = databases.Database(str(settings.DB_URI), force_rollback=True, **get_database_options())
 else:
-    database = databases.Database(str(settings.DB_URI))
+    database = databases.Database(str(settings.DB_URI), **get_database_options())
 
 meta = MetaData(
     naming_convention={
@@ -1,3 +1,6 @@
+import asyncio
+import logging
+
 import sentry_sdk
 from aiogram import executor
 
@@ -5,23 +8,67 @@ from config import dp, settings
 from database import database
 from modules.analytics.views import *  # noqa: F403, F401
 from modules.companies.views import *  # noqa: F403, F401
+from modules.companies.services import CompanyService
 from modules.currencies.views import *  # noqa: F403, F401
 from modules.helps.views import *  # noqa: F403, F401
+from modules.operations.parsers import RuleBasedOperationParser
+from modules.operations.services import OperationService, inference_client, inference_pool
 from modules.operations.views import *  # noqa: F403, F401
 from modules.users.views import *  # noqa: F403, F401
+from sdk.fsm import storage
+
+dp.storage = storage
+
+# Hit counters reported by log_metrics
+metrics = [
+    RuleBasedOperationParser.counter,
+    OperationService.entities_cache,
+    OperationService.categories_cache,
+    CompanyService.memberships,
+    CompanyService.participants,
+]
+
+
+def log_metrics() -> None:
+    for metric in metrics:
+        logging.info(metric)
+
+
+async def report_metrics() -> None:
+    while True:
+        await asyncio.sleep(settings.METRICS_LOG_INTERVAL)
+        log_metrics()
+
+
+async def warmup_models() -> None:
+    try:
+        await OperationService.start_inference()
+    except Exception as e:
+        sentry_sdk.capture_exception(e)
+        raise
 
 
 async def on_startup(*args, **kwargs) -> None:
+    if inference_client is None:
+        inference_pool.start()
     await database.connect()
     sentry_sdk.init(
         dsn=settings.SENTRY_DSN,
         traces_sample_rate=1.0,
     )
+    # Models are loaded in the background so the bot answers non-NLP commands right away
+    asyncio.get_running_loop().create_task(warmup_models())
+    asyncio.get_running_loop().create_task(report_metrics())
 
 
 async def on_shutdown(*args, **kwargs) -> None:
     await database.disconnect()
+    inference_pool.shutdown()
+    if inference_client is not None:
+        inference_client.close()
+    log_metrics()
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=settings.LOG_LEVEL)
     executor.start_polling(dp, on_startup=on_startup, on_shutdown=on_shutdown, skip_updates=True)
@@ -1,5 +1,6 @@
 import argparse
 import asyncio
+import logging
 from typing import Optional, Type
 
 import sentry_sdk
@@ -51,6 +52,7 @@ if __name__ == '__main__':
         required=True,
     )
     args = parser.parse_args()
+    logging.basicConfig(level=settings.LOG_LEVEL)
     loop = asyncio.get_event_loop()
     loop.run_until_complete(startup())
     loop.run_until_complete(ConsoleManager.execute_command(args.command))
@@ -1,9 +1,10 @@
+import asyncio
 import datetime
 from typing import Union
 
 from aiogram import types
 
-from config import bot, dp, settings
+from config import bot, dp
 from modules.helps.enums import Command
 from modules.operations.enums import BackScreenType, OperationType
 from modules.operations.services import OperationService
@@ -25,18 +26,17 @@ async def get_today_analytics(data: Union[types.Message, types.CallbackQuery]) -
         chat_id = data.chat.id
     month_date_from, month_date_to = await utils.get_current_month_period()
     date_from, date_to = await utils.get_current_day_period()
-    company_id = settings.SELECTED_COMPANIES[chat_id]
-    today_stats = await OperationService.get_stats(
-        date_from=date_from,
-        date_to=date_to,
-        company_id=company_id,
+    company_id = await SelectCompanyRequired.get_company_id(chat_id)
+    (today_stats, month_stats), future_operations = await asyncio.gather(
+        OperationService.get_dashboard_stats(
+            day_from=date_from,
+            day_to=date_to,
+            month_from=month_date_from,
+            month_to=month_date_to,
+            company_id=company_id,
+        ),
+        OperationService.get_future_operations(company_id),
     )
-    month_stats = await OperationService.get_stats(
-        date_from=month_date_from,
-        date_to=month_date_to,
-        company_id=company_id,
-    )
-    future_operations = await OperationService.get_future_operations(company_id)
     tomorrow = datetime.datetime.now() + datetime.timedelta(days=1)
     future_expense = sum(
         operation.received_amount or 0
@@ -84,7 +84,7 @@ async def get_today_analytics(data: Union[types.Message, types.CallbackQuery]) -
 async def get_month_analytics(message: types.Message) -> None:
     date_from, date_to = await utils.get_current_month_period()
     now_day = datetime.datetime.now().day
-    company_id = settings.SELECTED_COMPANIES[message.chat.id]
+    company_id = await SelectCompanyRequired.get_company_id(message.chat.id)
     stats = await OperationService.get_stats(
         date_from=date_from,
         date_to=date_to,
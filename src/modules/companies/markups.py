@@ -1,8 +1,7 @@
-from typing import Callable, List
+from typing import Callable, List, Optional
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from config import settings
 from modules.companies.enums import CompanyCallback
 from modules.companies.schemas import Company
 from modules.users.schemas import User
@@ -10,14 +9,14 @@ from modules.users.schemas import User
 
 def get_companies_list_markup(
     companies: List[Company],
-    chat_id: int,
+    selected_company_id: Optional[int],
     callback_type: Callable[[int], str] = CompanyCallback.detail,
 ) -> InlineKeyboardMarkup:
     markup = InlineKeyboardMarkup()
     for company in companies:
         markup.add(
             InlineKeyboardButton(
-                text=('⭐ ' if settings.SELECTED_COMPANIES.get(chat_id) == company.id else '') + company.name,
+                text=('⭐ ' if selected_company_id == company.id else '') + company.name,
                 callback_data=callback_type(company.id),
             ),
         )
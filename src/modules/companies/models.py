@@ -26,6 +26,8 @@ class Company(
 class CompanyUser(Base):
 
     __tablename__ = 'companies_users'
+    # Lookups by chat_id use the primary key (chat_id, company_id)
+    __table_args__ = (sa.Index('ix_companies_users_company_id', 'company_id'),)
 
     chat_id = sa.Column(
         sa.Integer,
@@ -44,3 +46,22 @@ class CompanyUser(Base):
         nullable=False,
         server_default=sa.func.now(),
     )
+
+
+class SelectedCompany(Base):
+    """Компания, выбранная пользователем для операций и статистики"""
+
+    __tablename__ = 'selected_companies'
+    # Deleting a company looks up its selections by company_id
+    __table_args__ = (sa.Index('ix_selected_companies_company_id', 'company_id'),)
+
+    chat_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey('users.chat_id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    company_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey('companies.id', ondelete='CASCADE'),
+        nullable=False,
+    )
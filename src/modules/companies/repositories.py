@@ -1,68 +1,82 @@
-from typing import List, Type
+from typing import List, Optional, Type
 
-from asyncpg import Record
+from databases.interfaces import Record
 
-from database import database
-from modules.companies.models import Company, CompanyUser
-from sdk.repositories import BaseRepository
+from modules.companies.models import Company, CompanyUser, SelectedCompany
+from sdk.repositories import BaseRepository, WhereModifier
 
 
 class CompanyUserRepository(BaseRepository):
     model: Type[CompanyUser] = CompanyUser
 
-
-class CompanyRepository(BaseRepository):
-    model: Type[Company] = Company
+    @classmethod
+    async def get_company_ids(cls, chat_id: int) -> List[int]:
+        query = 'select cu.company_id from companies_users cu where cu.chat_id = :chat_id'
+        return [x[0] for x in await cls.fetch_all(query, values={'chat_id': chat_id})]
 
     @classmethod
-    async def get_my_companies(cls, chat_id: int) -> List[Record]:
+    async def get_participants(cls, company_id: int) -> List[Record]:
         query = """
-        select c.id, c.name, c.creator_id, json_group_array(json_object(
-            'chat_id', u.chat_id,
-            'first_name', u.first_name,
-            'last_name', u.last_name,
-            'username', u.username
-        )) as participants
-        from companies c
-        join companies_users cu on c.id = cu.company_id
+        select u.chat_id, u.first_name, u.last_name, u.username
+        from companies_users cu
         join users u on cu.chat_id = u.chat_id
-        where cu.chat_id = :chat_id
-        group by c.id
+        where cu.company_id = :company_id
+        order by cu.join_date
         """
+        return await cls.fetch_all(query, values={'company_id': company_id})
 
-        return await database.fetch_all(query=query, values={'chat_id': chat_id})
+
+class SelectedCompanyRepository(BaseRepository):
+    model: Type[SelectedCompany] = SelectedCompany
 
     @classmethod
-    async def get_company_detail(cls, company_id: int) -> Record:
-        query = """
-        select c.id, c.name, c.creator_id, json_group_array(json_object(
-            'chat_id', u.chat_id,
-            'first_name', u.first_name,
-            'last_name', u.last_name,
-            'username', u.username
-        )) as participants
+    async def get_company_id(cls, chat_id: int) -> Optional[int]:
+        return await cls.fetch_val(
+            'select company_id from selected_companies where chat_id = :chat_id',
+            values={'chat_id': chat_id},
+        )
+
+    @classmethod
+    async def select_company(cls, chat_id: int, company_id: int) -> None:
+        query = cls.get_insert().values(chat_id=chat_id, company_id=company_id)
+        await cls.execute(
+            query.on_conflict_do_update(index_elements=['chat_id'], set_={'company_id': query.excluded.company_id}),
+        )
+
+    @classmethod
+    async def unselect_company(cls, chat_id: int, company_id: int) -> None:
+        await cls.delete([WhereModifier(chat_id=chat_id, company_id=company_id)])
+
+
+class CompanyRepository(BaseRepository):
+    model: Type[Company] = Company
+
+    @classmethod
+    def get_companies_query(cls, where: str = '') -> str:
+        """Компании с участниками, where - условие отбора строк компаний и участников"""
+        participants = cls.json_array_agg(
+            chat_id='u.chat_id',
+            first_name='u.first_name',
+            last_name='u.last_name',
+            username='u.username',
+        )
+        return f"""
+        select c.id, c.name, c.creator_id, {participants} as participants
         from companies c
         join companies_users cu on c.id = cu.company_id
         join users u on cu.chat_id = u.chat_id
-        where c.id = :company_id
+        {where}
         group by c.id
         """
 
-        return await database.fetch_one(query=query, values={'company_id': company_id})
+    @classmethod
+    async def get_my_companies(cls, chat_id: int) -> List[Record]:
+        query = cls.get_companies_query('where cu.chat_id = :chat_id')
+
+        return await cls.fetch_all(query, values={'chat_id': chat_id})
 
     @classmethod
     async def get_all_companies(cls) -> List[Record]:
-        query = """
-        select c.id, c.name, c.creator_id, json_group_array(json_object(
-            'chat_id', u.chat_id,
-            'first_name', u.first_name,
-            'last_name', u.last_name,
-            'username', u.username
-        )) as participants
-        from companies c
-        join companies_users cu on c.id = cu.company_id
-        join users u on cu.chat_id = u.chat_id
-        group by c.id
-        """
+        query = cls.get_companies_query()
 
-        return await database.fetch_all(query=query)
+        return await cls.fetch_all(query)
@@ -0,0 +1,95 @@
+import abc
+from typing import Optional
+
+from config import SelectedCompanyBackend, settings
+from modules.companies.repositories import SelectedCompanyRepository
+from sdk.cache import LRUCache
+from sdk.resp import RespClient
+
+# Compares and deletes in one step, so a selection changed in between is kept
+_UNSELECT_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+_MISSING = object()
+
+
+class SelectionBackend(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    async def get(self, chat_id: int) -> Optional[int]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def set(self, chat_id: int, company_id: int) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def unselect(self, chat_id: int, company_id: int) -> None:
+        """Снимает выбор, только если выбрана компания company_id"""
+        raise NotImplementedError
+
+
+class DatabaseSelectionBackend(SelectionBackend):
+    async def get(self, chat_id: int) -> Optional[int]:
+        return await SelectedCompanyRepository.get_company_id(chat_id)
+
+    async def set(self, chat_id: int, company_id: int) -> None:
+        await SelectedCompanyRepository.select_company(chat_id, company_id)
+
+    async def unselect(self, chat_id: int, company_id: int) -> None:
+        await SelectedCompanyRepository.unselect_company(chat_id, company_id)
+
+
+class RedisSelectionBackend(SelectionBackend):
+    def __init__(self, client: RespClient, prefix: str = 'selected_company') -> None:
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, chat_id: int) -> Optional[int]:
+        company_id = await self.client.execute('GET', self._key(chat_id))
+        return int(company_id) if company_id is not None else None  # type: ignore[arg-type]
+
+    async def set(self, chat_id: int, company_id: int) -> None:
+        await self.client.execute('SET', self._key(chat_id), company_id)
+
+    async def unselect(self, chat_id: int, company_id: int) -> None:
+        await self.client.execute('EVAL', _UNSELECT_SCRIPT, 1, self._key(chat_id), company_id)
+
+    def _key(self, chat_id: int) -> str:
+        return f'{self.prefix}:{chat_id}'
+
+
+class SelectedCompanyStore:
+    """
+    Выбранные пользователями компании: LRU кэш процесса перед общим хранилищем, запись сразу в оба.
+    Отсутствие выбора тоже кэшируется, чтобы не обращаться к хранилищу на каждое сообщение
+    """
+
+    def __init__(self, backend: SelectionBackend, maxsize: int, ttl: Optional[float] = None) -> None:
+        self.backend = backend
+        self.cache: LRUCache[Optional[int]] = LRUCache('selected_companies', maxsize=maxsize, ttl=ttl)
+
+    async def get(self, chat_id: int) -> Optional[int]:
+        company_id = self.cache.get(chat_id, _MISSING)
+        if company_id is _MISSING:
+            company_id = await self.backend.get(chat_id)
+            self.cache.set(chat_id, company_id)
+        return company_id
+
+    async def set(self, chat_id: int, company_id: int) -> None:
+        await self.backend.set(chat_id, company_id)
+        self.cache.set(chat_id, company_id)
+
+    async def unselect(self, chat_id: int, company_id: int) -> None:
+        await self.backend.unselect(chat_id, company_id)
+        self.cache.pop(chat_id)
+
+
+def get_selection_backend() -> SelectionBackend:
+    if settings.SELECTED_COMPANY_BACKEND == SelectedCompanyBackend.REDIS:
+        return RedisSelectionBackend(RespClient(settings.REDIS_URL, timeout=settings.REDIS_TIMEOUT))
+    return DatabaseSelectionBackend()
+
+
+selected_companies = SelectedCompanyStore(
+    get_selection_backend(),
+    maxsize=settings.SELECTED_COMPANY_CACHE_SIZE,
+    ttl=settings.SELECTED_COMPANY_CACHE_TTL,
+)
@@ -1,18 +1,54 @@
-from typing import List
+from typing import List, Tuple
 
 from config import settings
 from modules.companies.repositories import CompanyRepository, CompanyUserRepository
 from modules.companies.schemas import Company
-from modules.operations.repositories import OperationRepository
+from modules.companies.selection import selected_companies
+from modules.users.schemas import User
+from sdk.cache import LRUCache
 from sdk.repositories import WhereModifier
 
 
 class CompanyService:
     repository = CompanyRepository
+    # Company ids by chat_id and participants by company_id. Invalidated on membership changes in this process,
+    # changes made by other processes are seen after the ttl
+    memberships: LRUCache[Tuple[int, ...]] = LRUCache(
+        'company_memberships',
+        maxsize=settings.COMPANY_MEMBERSHIP_CACHE_SIZE,
+        ttl=settings.COMPANY_MEMBERSHIP_CACHE_TTL,
+    )
+    participants: LRUCache[Tuple[User, ...]] = LRUCache(
+        'company_participants',
+        maxsize=settings.COMPANY_MEMBERSHIP_CACHE_SIZE,
+        ttl=settings.COMPANY_MEMBERSHIP_CACHE_TTL,
+    )
 
     @classmethod
     async def get_my_companies(cls, chat_id: int) -> List[Company]:
-        return [Company(**x) for x in await cls.repository.get_my_companies(chat_id)]
+        return [Company.parse_obj(dict(x)) for x in await cls.repository.get_my_companies(chat_id)]
+
+    @classmethod
+    async def get_company_ids(cls, chat_id: int) -> Tuple[int, ...]:
+        company_ids = cls.memberships.get(chat_id)
+        if company_ids is None:
+            company_ids = tuple(await CompanyUserRepository.get_company_ids(chat_id))
+            cls.memberships.set(chat_id, company_ids)
+        return company_ids
+
+    @classmethod
+    async def get_participants(cls, company_id: int) -> Tuple[User, ...]:
+        participants = cls.participants.get(company_id)
+        if participants is None:
+            rows = await CompanyUserRepository.get_participants(company_id)
+            participants = tuple(User.parse_obj(dict(x)) for x in rows)
+            cls.participants.set(company_id, participants)
+        return participants
+
+    @classmethod
+    def invalidate_membership(cls, company_id: int, chat_id: int) -> None:
+        cls.memberships.pop(chat_id)
+        cls.participants.pop(company_id)
 
     @classmethod
     async def create_company(cls, name: str, creator_id: int) -> int:
@@ -26,6 +62,7 @@ class CompanyService:
         if is_exists:
             raise ValueError('Вы уже состоите в этой компании!')
         await CompanyUserRepository.create(company_id=company_id, chat_id=chat_id)
+        cls.invalidate_membership(company_id, chat_id)
 
     @classmethod
     async def get_company(cls, company_id: int, **kwargs) -> Company:
@@ -36,29 +73,27 @@ class CompanyService:
 
     @classmethod
     async def company_detail(cls, company_id: int) -> Company:
-        company = await cls.repository.get_company_detail(company_id)
-        if not company:
-            raise ValueError('Компания не найдена!')
-        return Company(**company)
+        company = await cls.get_company(company_id)
+        company.participants = list(await cls.get_participants(company_id))
+        return company
 
     @classmethod
     async def delete_company(cls, company_id: int) -> None:
-        await cls.repository.delete([WhereModifier(id=company_id)])
-
-        # We need to delete relationships manually, because sqlite doesn't support ON DELETE CASCADE by default
-        # Maybe we would use PostgreSQL in future
         company_users = await CompanyUserRepository.all([WhereModifier(company_id=company_id)])
-        await CompanyUserRepository.delete([WhereModifier(company_id=company_id)])
-        await OperationRepository.delete([WhereModifier(company_id=company_id)])
+        # Participants, operations and their rollups are deleted by ON DELETE CASCADE (foreign_keys is on in SQLite)
+        await cls.repository.delete([WhereModifier(id=company_id)])
 
-        # Remove deleted company from selected companies. In the future, it will be moved to Redis
+        # The selections table is cleared by the cascade too, but not the other backends and the process caches
         for user in company_users:
-            settings.SELECTED_COMPANIES.pop(user['chat_id'], None)
+            cls.invalidate_membership(company_id, user['chat_id'])
+            await selected_companies.unselect(user['chat_id'], company_id)
 
     @classmethod
     async def remove_participant(cls, company_id: int, chat_id: int) -> None:
         await CompanyUserRepository.delete([WhereModifier(company_id=company_id, chat_id=chat_id)])
+        cls.invalidate_membership(company_id, chat_id)
+        await selected_companies.unselect(chat_id, company_id)
 
     @classmethod
     async def get_all_companies(cls) -> List[Company]:
-        return [Company(**x) for x in await cls.repository.get_all_companies()]
+        return [Company.parse_obj(dict(x)) for x in await cls.repository.get_all_companies()]
@@ -10,6 +10,7 @@ from config import bot, dp, settings
 from modules.companies.enums import CompanyCallback
 from modules.companies.markups import get_companies_list_markup, get_company_leave_markup, get_participants_list_markup
 from modules.companies.schemas import CompanyCreateState
+from modules.companies.selection import selected_companies
 from modules.companies.services import CompanyService
 from modules.helps.enums import Command
 from sdk import utils
@@ -27,7 +28,7 @@ async def get_companies(data: Union[types.Message, types.CallbackQuery]) -> None
     else:
         message = data
     companies = await CompanyService.get_my_companies(message.chat.id)
-    markup = get_companies_list_markup(companies, message.chat.id)
+    markup = get_companies_list_markup(companies, await selected_companies.get(message.chat.id))
     if isinstance(data, types.CallbackQuery):
         await bot.edit_message_text(
             chat_id=message.chat.id,
@@ -48,7 +49,11 @@ async def get_companies(data: Union[types.Message, types.CallbackQuery]) -> None
 async def choose_company(message: types.Message) -> None:
     companies = await CompanyService.get_my_companies(message.chat.id)
     chat_id = message.chat.id
-    markup = get_companies_list_markup(companies, chat_id, callback_type=CompanyCallback.select)
+    markup = get_companies_list_markup(
+        companies,
+        await selected_companies.get(chat_id),
+        callback_type=CompanyCallback.select,
+    )
     await bot.send_message(
         chat_id=message.chat.id,
         text='Выбор активной компании:',
@@ -202,10 +207,14 @@ async def select_company(callback: types.CallbackQuery) -> None:
         ),
     )
     await CompanyService.get_company(company_id)
-    settings.SELECTED_COMPANIES[callback.message.chat.id] = company_id
+    await selected_companies.set(callback.message.chat.id, company_id)
     companies = await CompanyService.get_my_companies(callback.message.chat.id)
     chat_id = callback.message.chat.id
-    markup = get_companies_list_markup(companies, chat_id, callback_type=CompanyCallback.select)
+    markup = get_companies_list_markup(
+        companies,
+        await selected_companies.get(chat_id),
+        callback_type=CompanyCallback.select,
+    )
     await bot.edit_message_reply_markup(
         chat_id=chat_id,
         message_id=callback.message.message_id,
@@ -10,8 +10,23 @@ class Currency(
     Base,
 ):
     __tablename__ = 'currencies'
+    __table_args__ = (sa.Index('ix_currencies_ccy_created_at', 'ccy', 'created_at'),)
 
     ccy = sa.Column(sa.String, nullable=False)
     base_ccy = sa.Column(sa.String, nullable=False)
     buy = sa.Column(sa.Float, nullable=False)
     sale = sa.Column(sa.Float, nullable=False)
+
+
+class LatestCurrencyRate(
+    AuditMixin,
+    Base,
+):
+    """Последний курс каждой валюты. Обновляется в одной транзакции с добавлением курсов в currencies"""
+
+    __tablename__ = 'latest_currency_rates'
+
+    ccy = sa.Column(sa.String, primary_key=True)
+    base_ccy = sa.Column(sa.String, nullable=False)
+    buy = sa.Column(sa.Float, nullable=False)
+    sale = sa.Column(sa.Float, nullable=False)
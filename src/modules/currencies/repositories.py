@@ -1,8 +1,35 @@
-from typing import Type
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Type
 
-from modules.currencies.models import Currency
+from database import database
+from modules.currencies.models import Currency, LatestCurrencyRate
 from sdk.repositories import BaseRepository
 
 
+class LatestCurrencyRateRepository(BaseRepository):
+    model: Type[LatestCurrencyRate] = LatestCurrencyRate
+
+
 class CurrencyRepository(BaseRepository):
     model: Type[Currency] = Currency
+
+    @classmethod
+    async def create_rates(cls: Type['CurrencyRepository'], values: List[Dict[str, Any]]) -> None:
+        """Добавляет курсы в историю и обновляет latest_currency_rates в одной транзакции"""
+        now = datetime.now()
+        async with database.transaction():
+            await cls.bulk_insert(values)
+            await LatestCurrencyRateRepository.bulk_upsert(
+                [{**x, 'created_at': now, 'updated_at': now} for x in values],
+                conflict_keys=['ccy'],
+            )
+
+    @classmethod
+    async def get_latest_rate(cls: Type['CurrencyRepository'], ccy: str) -> Optional[float]:
+        query = 'select buy from latest_currency_rates where ccy = :ccy'
+        return await cls.fetch_val(query, values={'ccy': ccy})
+
+    @classmethod
+    async def get_rates_version(cls: Type['CurrencyRepository']) -> Any:  # noqa: ANN401
+        """Время последнего обновления курсов. Меняется при каждой записи курсов, в том числе другим процессом"""
+        return await cls.fetch_val('select max(updated_at) from latest_currency_rates')
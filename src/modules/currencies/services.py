@@ -1,5 +1,6 @@
-from typing import List, Type
+from typing import Any, List, Optional, Type
 
+from config import settings
 from modules.currencies.repositories import CurrencyRepository
 from modules.currencies.schemas import CurrencyCreate
 
@@ -9,4 +10,15 @@ class CurrencyService:
 
     @classmethod
     async def create_many(cls: Type['CurrencyService'], currencies: List[CurrencyCreate]) -> None:
-        await cls.repository.create_many([currency.dict() for currency in currencies])
+        await cls.repository.create_rates([currency.dict() for currency in currencies])
+
+    @classmethod
+    async def get_rate(cls: Type['CurrencyService'], ccy: str) -> Optional[float]:
+        """Текущий курс валюты к базовой. None, если курса валюты нет"""
+        if ccy == settings.BASE_CURRENCY:
+            return 1.0
+        return await cls.repository.get_latest_rate(ccy)
+
+    @classmethod
+    async def get_rates_version(cls: Type['CurrencyService']) -> Any:  # noqa: ANN401
+        return await cls.repository.get_rates_version()
@@ -0,0 +1,18 @@
+import sqlalchemy as sa
+
+from database import Base
+
+
+class FSMState(Base):
+    """Состояние диалога пользователя в чате (aiogram FSM)"""
+
+    __tablename__ = 'fsm_states'
+    # Expired states are deleted by updated_at
+    __table_args__ = (sa.Index('ix_fsm_states_updated_at', 'updated_at'),)
+
+    # Telegram ids of groups do not fit into 32 bits
+    chat_id = sa.Column(sa.BigInteger, primary_key=True)
+    user_id = sa.Column(sa.BigInteger, primary_key=True)
+    state = sa.Column(sa.String, nullable=True)
+    data = sa.Column(sa.Text, nullable=False)
+    updated_at = sa.Column(sa.DateTime(timezone=True), nullable=False)
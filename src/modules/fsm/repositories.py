@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional, Type
+
+from databases.interfaces import Record
+
+from modules.fsm.models import FSMState
+from sdk.repositories import BaseRepository, WhereModifier
+
+
+class FSMStateRepository(BaseRepository):
+    model: Type[FSMState] = FSMState
+
+    @classmethod
+    async def get_state(cls, chat_id: int, user_id: int, updated_after: datetime) -> Optional[Record]:
+        query = """
+        select s.state, s.data
+        from fsm_states s
+        where s.chat_id = :chat_id and s.user_id = :user_id and s.updated_at >= :updated_after
+        """
+        return await cls.fetch_one(
+            query,
+            values={'chat_id': chat_id, 'user_id': user_id, 'updated_after': updated_after},
+        )
+
+    @classmethod
+    async def save_state(
+        cls,
+        chat_id: int,
+        user_id: int,
+        state: Optional[str],
+        data: str,
+        updated_at: datetime,
+    ) -> None:
+        query = cls.get_insert().values(chat_id=chat_id, user_id=user_id, state=state, data=data, updated_at=updated_at)
+        await cls.execute(
+            query.on_conflict_do_update(
+                index_elements=['chat_id', 'user_id'],
+                set_={x: query.excluded[x] for x in ('state', 'data', 'updated_at')},
+            ),
+        )
+
+    @classmethod
+    async def delete_state(cls, chat_id: int, user_id: int) -> None:
+        await cls.delete([WhereModifier(chat_id=chat_id, user_id=user_id)])
+
+    @classmethod
+    async def delete_expired(cls, updated_before: datetime) -> None:
+        await cls.execute(
+            'delete from fsm_states where updated_at < :updated_before',
+            values={'updated_before': updated_before},
+        )
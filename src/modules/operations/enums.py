@@ -1,8 +1,9 @@
 from enum import Enum
-from typing import Optional
+from typing import Optional, Tuple
 
 from config import settings
 from modules.helps.enums import Command
+from sdk.pagination import Cursor
 
 
 class OperationType(str, Enum):
@@ -119,8 +120,15 @@ class OperationAllCallback(str, Enum):
         return OperationAllCallback.DETAIL + f'_{operation_id}_{page}_{back_type}'
 
     @staticmethod
-    def pagination(page: int, is_regular_operation: bool) -> str:
-        return OperationAllCallback.PAGINATION + f'_{page}_{int(is_regular_operation)}'
+    def pagination(page: int, is_regular_operation: bool, cursor: Optional[str] = None) -> str:
+        data = OperationAllCallback.PAGINATION + f'_{page}_{int(is_regular_operation)}'
+        return f'{data}_{cursor}' if cursor else data
+
+    @staticmethod
+    def parse_pagination(data: str) -> Tuple[int, bool, Optional[Cursor]]:
+        """Страница, регулярные ли операции и курсор из callback data `pagination`"""
+        page, is_regular_operation, *cursor = data.replace(OperationAllCallback.PAGINATION + '_', '').split('_')
+        return int(page), bool(int(is_regular_operation)), Cursor.decode(cursor[0]) if cursor else None
 
     @staticmethod
     def delete(
@@ -175,6 +183,13 @@ class IncomeCategoryEnum(str, Enum):
         return settings.INCOME_CATEGORIES.get(self.value, self.value.capitalize())
 
 
+class InferenceTask(str, Enum):
+    """Вид задачи для NLP моделей"""
+
+    PARSE = 'parse'
+    CATEGORIZE = 'categorize'
+
+
 class CategoryCallback(str, Enum):
 
     UNIQUE_PREFIX = 'cat_'
@@ -0,0 +1,48 @@
+from typing import Dict, Optional, Type
+
+from config import settings
+from modules.operations.enums import ExpenseCategoryEnum
+from modules.operations.repositories import OperationRepository
+from sdk.cache import LRUCache
+
+
+class LearnedCategoryIndex:
+    """
+    Категории, которые участники компании уже подтверждали для описаний расходов.
+    Индекс компании строится при первом обращении и дополняется при каждом подтверждении операции
+    """
+
+    indexes: LRUCache[Dict[str, ExpenseCategoryEnum]] = LRUCache(
+        'learned_categories',
+        maxsize=settings.CATEGORY_INDEX_SIZE,
+    )
+
+    @staticmethod
+    def normalize(description: str) -> str:
+        return ' '.join(description.lower().split())
+
+    @classmethod
+    async def get(
+        cls: Type['LearnedCategoryIndex'],
+        company_id: int,
+        description: str,
+    ) -> Optional[ExpenseCategoryEnum]:
+        index = cls.indexes.get(company_id)
+        if index is None:
+            index = {
+                cls.normalize(row['description']): ExpenseCategoryEnum(row['category'])
+                for row in await OperationRepository.get_approved_categories(company_id)
+            }
+            cls.indexes.set(company_id, index)
+        return index.get(cls.normalize(description))
+
+    @classmethod
+    def add(
+        cls: Type['LearnedCategoryIndex'],
+        company_id: int,
+        description: str,
+        category: ExpenseCategoryEnum,
+    ) -> None:
+        # Индекс, который еще не загружен, прочитает это подтверждение из базы
+        if company_id in cls.indexes:
+            cls.indexes.get(company_id)[cls.normalize(description)] = category
@@ -12,6 +12,24 @@ class Operation(
     """Базовая модель пользователя"""
 
     __tablename__ = 'operations'
+    __table_args__ = (
+        # Stats, pagination and learned categories of a company: approved, (non) regular operations by created_at
+        sa.Index(
+            'ix_operations_company_id_is_approved_created_at',
+            'company_id',
+            'is_approved',
+            'is_regular_operation',
+            'created_at',
+            postgresql_include=['operation_type', 'category', 'base_amount'],
+        ),
+        # Regular operations of all companies for create_regular_operations
+        sa.Index(
+            'ix_operations_is_regular_operation_is_approved',
+            'is_regular_operation',
+            'is_approved',
+            'repeat_type',
+        ),
+    )
 
     amount = sa.Column(sa.Integer, nullable=False)
     received_amount = sa.Column(sa.Integer, nullable=True)
@@ -23,6 +41,9 @@ class Operation(
     is_approved = sa.Column(sa.Boolean, default=False, nullable=False)
     is_regular_operation = sa.Column(sa.Boolean, default=False, nullable=False)
     category = sa.Column(sa.String, nullable=True)
+    # Rate of the currency at the moment of creation and received_amount in the base currency at that rate
+    rate = sa.Column(sa.Float, nullable=True)
+    base_amount = sa.Column(sa.Float, nullable=True)
     creator_id = sa.Column(
         sa.Integer,
         sa.ForeignKey('users.chat_id', ondelete='CASCADE'),
@@ -33,3 +54,40 @@ class Operation(
         sa.ForeignKey('companies.id', ondelete='CASCADE'),
         nullable=False,
     )
+
+
+class OperationDailyRollup(Base):
+    """
+    Сумма base_amount и количество подтвержденных нерегулярных операций компании за день по типу и категории.
+    Обновляется в одной транзакции с изменением операций
+    """
+
+    __tablename__ = 'operation_daily_rollups'
+
+    company_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey('companies.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    day = sa.Column(sa.Date, primary_key=True)
+    operation_type = sa.Column(sa.String, primary_key=True)
+    # '' for operations without a category, primary key columns can't be null
+    category = sa.Column(sa.String, primary_key=True)
+    base_amount_sum = sa.Column(sa.Float, nullable=False, default=0)
+    count = sa.Column(sa.Integer, nullable=False, default=0)
+
+
+class CompanyStatsVersion(Base):
+    """
+    Версия операций компании для кэшей статистики и будущих операций всех процессов бота.
+    Увеличивается в одной транзакции с изменением операций и дневных сводок
+    """
+
+    __tablename__ = 'company_stats_versions'
+
+    company_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey('companies.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    version = sa.Column(sa.Integer, nullable=False, default=0)
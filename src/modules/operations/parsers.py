@@ -0,0 +1,122 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Match, Optional, Pattern, Tuple, Type, Union
+
+from config import settings
+from modules.operations.enums import CurrencyEnum, RepeatType
+from sdk import utils
+from sdk.metrics import HitCounter
+
+_WEEKDAY = r'(?:понедельник|вторник|сред|четверг|пятниц|суббот|воскресень)\w*'
+_WEEKDAYS = rf'{_WEEKDAY}(?:(?:,|,? и) {_WEEKDAY})*'
+_MONTH_DAY = r'(?:\d{1,2}|последн\w*)'
+_MONTH_DAYS = rf'{_MONTH_DAY}(?:(?:,|,? и) {_MONTH_DAY})*'
+
+
+class RuleBasedOperationParser:
+    """
+    Быстрый разбор типовых операций регулярками до запуска NER модели.
+    Возвращает сущности в том же формате, что и `OperationService.get_operation_entities`,
+    или None, если текст не удалось однозначно разобрать
+    """
+
+    add_pattern: Pattern = re.compile(settings.OPERATION_ADD_REGEX_PATTERN, re.IGNORECASE)
+    regular_pattern: Pattern = re.compile(settings.OPERATION_REGULAR_REGEX_PATTERN, re.IGNORECASE)
+    regular_suffix_pattern: Pattern = re.compile(settings.OPERATION_REGULAR_SUFFIX_REGEX_PATTERN, re.IGNORECASE)
+    # Слова периодичности, оставшиеся в описании, значат что регулярка разобрала текст неправильно
+    ambiguous_pattern: Pattern = re.compile(
+        r'\b(кажд\w*|ежедневн\w*|еженедельн\w*|ежемесячн\w*|числ[оа]|понедельник\w*|вторник\w*|сред[аеоуы]\w*'
+        r'|четверг\w*|пятниц\w*|суббот\w*|воскресень\w*)\b',
+        re.IGNORECASE,
+    )
+
+    # Периоды, которые целиком понимает `utils.get_operation_regularity`
+    repeat_time_patterns: Dict[RepeatType, Pattern] = {
+        RepeatType.EVERY_DAY: re.compile(r'кажд\w* день'),
+        RepeatType.EVERY_WEEK: re.compile(rf'кажд\w*(?: неделю во?)? {_WEEKDAYS}'),
+        RepeatType.EVERY_MONTH: re.compile(rf'(?:каждое|кажд\w* месяц) {_MONTH_DAYS} числ[оа]'),
+    }
+
+    counter = HitCounter('rule_based_operation_parser')
+
+    @classmethod
+    def parse(cls: Type['RuleBasedOperationParser'], text: str) -> Optional[Dict[str, Union[str, List]]]:
+        entities = cls._parse(' '.join(text.split()))
+        if entities is None:
+            cls.counter.miss()
+        else:
+            cls.counter.hit()
+        return entities
+
+    @classmethod
+    def _parse(
+        cls: Type['RuleBasedOperationParser'],
+        text: str,
+    ) -> Optional[Dict[str, Union[str, List]]]:
+        match, repeat_time = cls._match(re.sub(r'^([+-]) ', r'\1', text))
+        if match is None or not cls._is_valid(match):
+            return None
+        description = re.sub(r'^за ', '', match['description'].strip(), flags=re.IGNORECASE)
+        if not description or cls.ambiguous_pattern.search(description):
+            return None
+
+        entities: Dict[str, Union[str, List]] = defaultdict(list)
+        entities['AMOUNT'] = match['amount']
+        entities['CURRENCY'] = match['currency']
+        entities['FOR'] = description
+        if repeat_time is None:
+            return entities
+        regularity = cls._get_regularity(repeat_time)
+        if regularity is None:
+            return None
+        entities.update(regularity)
+        return entities
+
+    @classmethod
+    def _match(cls: Type['RuleBasedOperationParser'], text: str) -> Tuple[Optional[Match], Optional[str]]:
+        """Совпадение с одним из паттернов и период повторения, если операция регулярная"""
+        match = cls.regular_pattern.match(text)
+        if match and match['repeat_time'].lower().startswith('кажд'):
+            return match, match['repeat_time'].lower()
+        match = cls.regular_suffix_pattern.match(text)
+        if match:
+            return match, match['repeat_time'].lower()
+        return cls.add_pattern.match(text), None
+
+    @classmethod
+    def _is_valid(cls: Type['RuleBasedOperationParser'], match: Match) -> bool:
+        if not match['amount'][1:].isdigit():
+            return False
+        try:
+            CurrencyEnum.get(match['currency'])
+        except ValueError:
+            return False
+        return True
+
+    @classmethod
+    def _get_regularity(
+        cls: Type['RuleBasedOperationParser'],
+        repeat_time: str,
+    ) -> Optional[Dict[str, Union[str, List]]]:
+        """
+        Сущности периода повторения. `utils.get_operation_regularity` разбирает только начало текста
+        и пропускает незнакомые слова, поэтому период должен целиком совпасть с паттерном своего типа
+        """
+        regularity = utils.get_operation_regularity(repeat_time)
+        if regularity is None:
+            return None
+        repeat_type = RepeatType(regularity['type'])
+        if not cls.repeat_time_patterns[repeat_type].fullmatch(repeat_time):
+            return None
+        days = regularity['days']
+        if repeat_type == RepeatType.EVERY_DAY:
+            return {'EVERYDAY': repeat_time}
+        if repeat_type == RepeatType.EVERY_WEEK and days:
+            return {'EVERYWEEK': repeat_time, 'WEEKDAYS': days}
+        if repeat_type == RepeatType.EVERY_MONTH and days and all(cls._is_month_day(x) for x in days):
+            return {'EVERYMONTH': repeat_time, 'NUMBEROFDAY': days}
+        return None
+
+    @staticmethod
+    def _is_month_day(day: Union[str, int]) -> bool:
+        return day == 'last' or (isinstance(day, int) and 1 <= day <= 31)
@@ -1,19 +1,14 @@
 from datetime import datetime
-from typing import Dict, List, Optional, Type, TypedDict, Union
+from typing import Any, Collection, Dict, List, Optional, Tuple, Type, Union
 
-from asyncpg import Record
+from databases.interfaces import Record
 
 from config import settings
 from database import database
 from modules.operations.enums import RepeatType
 from modules.operations.models import Operation
-from sdk.repositories import BaseRepository
-
-
-class PaginatedDict(TypedDict):
-    operations: List[Record]
-    total: int
-    page_count: int
+from sdk.pagination import Cursor, CursorDirection
+from sdk.repositories import BaseRepository, InWhereModifier, WhereModifier
 
 
 class OperationRepository(BaseRepository):
@@ -32,14 +27,120 @@ class OperationRepository(BaseRepository):
             values['category'] = category
         query = f"""
         update operations
-        set is_approved = true, received_amount = amount {update_category}
+        set is_approved = true, received_amount = amount, base_amount = amount * rate {update_category}
         where id = :operation_id
         """
 
-        await database.execute(
-            query=query,
-            values=values,
-        )
+        async with database.transaction():
+            await cls.update_rollups([operation_id], -1)
+            await cls.execute(
+                query=query,
+                values=values,
+            )
+            await cls.update_rollups([operation_id], 1)
+
+    @classmethod
+    async def create_operation(cls: Type['OperationRepository'], **kwargs) -> int:
+        async with database.transaction():
+            operation_id = await cls.create(**kwargs)
+            await cls.update_rollups([operation_id], 1)
+        return operation_id
+
+    @classmethod
+    async def update_operation(cls: Type['OperationRepository'], operation_id: int, fields: Dict[str, Any]) -> None:
+        """Новая сумма пересчитывается в базовую валюту по курсу, сохраненному при создании операции"""
+        async with database.transaction():
+            await cls.update_rollups([operation_id], -1)
+            await cls.update(fields=fields, modifiers=[WhereModifier(id=operation_id)])
+            if fields.get('received_amount') is not None:
+                await cls.execute(
+                    'update operations set base_amount = received_amount * rate where id = :operation_id',
+                    values={'operation_id': operation_id},
+                )
+            await cls.update_rollups([operation_id], 1)
+
+    @classmethod
+    async def delete_operation(cls: Type['OperationRepository'], operation_id: int) -> None:
+        async with database.transaction():
+            await cls.update_rollups([operation_id], -1)
+            await cls.delete([WhereModifier(id=operation_id)])
+
+    @classmethod
+    async def update_rollups(cls: Type['OperationRepository'], operation_ids: Collection[int], sign: int) -> None:
+        """
+        Добавляет (sign=1) или вычитает (sign=-1) операции из дневных сводок.
+        Вызывается в транзакции изменения операций: вычитание до изменения, добавление после
+        """
+        if not operation_ids:
+            return
+        # Ids are integers, so they are inlined instead of a parameter per id
+        ids = ', '.join(str(int(x)) for x in operation_ids)
+        query = f"""
+        insert into operation_daily_rollups (company_id, day, operation_type, category, base_amount_sum, count)
+        select o.company_id, date(o.created_at), o.operation_type, coalesce(o.category, ''),
+               :sign * coalesce(sum(o.base_amount), 0), :sign * count(*)
+        from operations o
+        where o.id in ({ids}) and o.is_approved = true and o.is_regular_operation = false
+        group by o.company_id, date(o.created_at), o.operation_type, coalesce(o.category, '')
+        on conflict (company_id, day, operation_type, category) do update
+        set base_amount_sum = operation_daily_rollups.base_amount_sum + excluded.base_amount_sum,
+            count = operation_daily_rollups.count + excluded.count
+        """
+        # Not through the compiled statements cache: the SQL differs for every set of ids
+        await database.execute(query=query, values={'sign': sign})
+        await cls.bump_stats_versions(operation_ids)
+
+    @classmethod
+    async def bump_stats_versions(cls: Type['OperationRepository'], operation_ids: Collection[int]) -> None:
+        """Увеличивает версии статистики компаний операций, в том числе регулярных и неподтвержденных"""
+        ids = ', '.join(str(int(x)) for x in operation_ids)
+        query = f"""
+        insert into company_stats_versions (company_id, version)
+        select distinct o.company_id, 1
+        from operations o
+        where o.id in ({ids})
+        on conflict (company_id) do update
+        set version = company_stats_versions.version + 1
+        """
+        await database.execute(query=query)
+
+    @classmethod
+    async def get_stats_version(cls: Type['OperationRepository'], company_id: int) -> int:
+        query = 'select v.version from company_stats_versions v where v.company_id = :company_id'
+        return await cls.fetch_val(query, values={'company_id': company_id}) or 0
+
+    @classmethod
+    async def rebuild_rollups(cls: Type['OperationRepository'], company_id: Optional[int] = None) -> None:
+        """Пересчитывает дневные сводки компании (или всех компаний) по операциям"""
+        company_filter = ''
+        values: Dict[str, int] = {}
+        if company_id is not None:
+            company_filter = 'and o.company_id = :company_id'
+            values['company_id'] = company_id
+        query = f"""
+        insert into operation_daily_rollups (company_id, day, operation_type, category, base_amount_sum, count)
+        select o.company_id, date(o.created_at), o.operation_type, coalesce(o.category, ''),
+               coalesce(sum(o.base_amount), 0), count(*)
+        from operations o
+        where o.is_approved = true and o.is_regular_operation = false {company_filter}
+        group by o.company_id, date(o.created_at), o.operation_type, coalesce(o.category, '')
+        """
+        company_where = 'where c.id = :company_id' if values else 'where true'
+        bump_versions = f"""
+        insert into company_stats_versions (company_id, version)
+        select c.id, 1
+        from companies c
+        {company_where}
+        on conflict (company_id) do update
+        set version = company_stats_versions.version + 1
+        """
+        async with database.transaction():
+            await database.execute(
+                query='delete from operation_daily_rollups' + (' where company_id = :company_id' if values else ''),
+                values=values,
+            )
+            await database.execute(query=query, values=values)
+            await database.execute(query=bump_versions, values=values)
 
     @classmethod
     async def get_regular_operations(
@@ -47,13 +148,15 @@ class OperationRepository(BaseRepository):
         company_id: Optional[int] = None,
     ) -> List[Record]:
         values: Dict[str, Union[int, str]] = {'no_repeat': RepeatType.NO_REPEAT.value}
+        # received_amount at the current rate replaces the stored one, so the columns are listed explicitly
         query = """
-        select o.*, round(o.amount * (case when (o.currency = 'uah') then 1 else c.buy end)) as received_amount
+        select o.id, o.created_at, o.updated_at, o.amount, o.currency, o.operation_type, o.description,
+               o.repeat_type, o.repeat_days, o.is_approved, o.is_regular_operation, o.category, o.rate,
+               o.base_amount, o.creator_id, o.company_id,
+               cast(round(o.amount * (case when (o.currency = 'uah') then 1 else c.buy end)) as integer)
+                   as received_amount
         from operations o
-                 left join currencies c
-                           on
-                                       c.ccy = o.currency and
-                                       c.created_at = (select max(created_at) from currencies where ccy = o.currency)
+                 left join latest_currency_rates c on c.ccy = o.currency
         where o.is_approved = true
           and o.is_regular_operation = true
           and o.repeat_type != :no_repeat
@@ -61,7 +164,7 @@ class OperationRepository(BaseRepository):
         if company_id is not None:
             query += ' and o.company_id = :company_id'
             values['company_id'] = company_id
-        return await database.fetch_all(query, values=values)
+        return await cls.fetch_all(query, values=values, types=cls.get_column_types())
 
     @classmethod
     async def get_stats(
@@ -69,38 +172,23 @@ class OperationRepository(BaseRepository):
         date_from: datetime,
         date_to: datetime,
         company_id: int,
-    ) -> Dict[str, float]:  # TODO: Фиксировать курс на момент создания транзакции
+    ) -> Dict[str, float]:
+        """Доход и расход за дни с date_from по date_to включительно"""
         query = """
-        select sum(
-               case
-                   when (o.operation_type = 'income') then o.received_amount *
-                                                           (case when (o.currency = 'uah') then 1 else c.buy end)
-                   else 0 end
-           ) as income,
-       sum(
-               case
-                   when (o.operation_type = 'expense') then o.received_amount *
-                                                            (case when (o.currency = 'uah') then 1 else c.buy end)
-                   else 0 end
-           ) as expense
-        from operations o
-                 left join currencies c on
-                    c.ccy = o.currency and
-                    c.created_at = (select max(created_at) from currencies where ccy = o.currency)
-        where o.created_at between :date_from
-            and :date_to
-          and o.is_approved = true
-          and o.is_regular_operation = false
-          and o.company_id = :company_id
-        """  # noqa: E501
+        select sum(case when (r.operation_type = 'income') then r.base_amount_sum else 0 end) as income,
+               sum(case when (r.operation_type = 'expense') then r.base_amount_sum else 0 end) as expense
+        from operation_daily_rollups r
+        where r.company_id = :company_id
+          and r.day between :date_from and :date_to
+        """
 
         values = {
-            'date_from': date_from.strftime('%Y-%m-%d %H:%M:%S'),
-            'date_to': date_to.strftime('%Y-%m-%d %H:%M:%S'),
+            'date_from': date_from.date(),
+            'date_to': date_to.date(),
             'company_id': company_id,
         }
 
-        result = await database.fetch_one(query=query, values=values)
+        result = await cls.fetch_one(query, values=values)
         return (
             {
                 'income': result['income'] or 0,
@@ -110,41 +198,110 @@ class OperationRepository(BaseRepository):
             else {'income': 0, 'expense': 0}
         )
 
+    @classmethod
+    async def get_dashboard_stats(
+        cls: Type['OperationRepository'],
+        day_from: datetime,
+        day_to: datetime,
+        month_from: datetime,
+        month_to: datetime,
+        company_id: int,
+    ) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Доход и расход за дни с day_from по day_to и за дни с month_from по month_to одним проходом по сводкам.
+        Первый период должен входить во второй
+        """
+        query = """
+        select sum(case when (r.day between :day_from and :day_to and r.operation_type = 'income')
+                        then r.base_amount_sum else 0 end) as day_income,
+               sum(case when (r.day between :day_from and :day_to and r.operation_type = 'expense')
+                        then r.base_amount_sum else 0 end) as day_expense,
+               sum(case when (r.operation_type = 'income') then r.base_amount_sum else 0 end) as month_income,
+               sum(case when (r.operation_type = 'expense') then r.base_amount_sum else 0 end) as month_expense
+        from operation_daily_rollups r
+        where r.company_id = :company_id
+          and r.day between :month_from and :month_to
+        """
+
+        values = {
+            'day_from': day_from.date(),
+            'day_to': day_to.date(),
+            'month_from': month_from.date(),
+            'month_to': month_to.date(),
+            'company_id': company_id,
+        }
+
+        result = await cls.fetch_one(query, values=values)
+        if not result:
+            return {'income': 0, 'expense': 0}, {'income': 0, 'expense': 0}
+        return (
+            {'income': result['day_income'] or 0, 'expense': result['day_expense'] or 0},
+            {'income': result['month_income'] or 0, 'expense': result['month_expense'] or 0},
+        )
+
     @classmethod
     async def get_operations(
         cls: Type['OperationRepository'],
         is_regular_operation: bool,
         company_id: int,
         page: int = 1,
-    ) -> PaginatedDict:
-        query = """
-        select *, count(*) over () as total
+        cursor: Optional[Cursor] = None,
+        limit: int = settings.PAGE_SIZE,
+    ) -> List[Record]:
+        """
+        Страница операций от новых к старым. С курсором страница ищется по индексу от (created_at, id)
+        соседней страницы, без курсора (переход по номеру страницы) - через offset
+        """
+        values: Dict[str, Union[bool, int, datetime]] = {
+            'limit': limit,
+            'is_regular_operation': is_regular_operation,
+            'company_id': company_id,
+        }
+        key_filter, order, page_values = cls.get_page_filter(page, cursor)
+        values.update(page_values)
+
+        query = f"""
+        select *
         from operations o
         where o.is_approved = true and o.is_regular_operation = :is_regular_operation and o.company_id = :company_id
-        order by o.created_at desc
+        {key_filter}
+        order by o.created_at {order}, o.id {order}
         limit :limit offset :offset
         """
 
-        values = {
-            'offset': (page - 1) * settings.PAGE_SIZE,
-            'limit': settings.PAGE_SIZE,
-            'is_regular_operation': is_regular_operation,
-            'company_id': company_id,
-        }
+        operations = await cls.fetch_all(query, values=values, types=cls.get_column_types())
+        return operations[::-1] if order == 'asc' else operations
 
-        operations = await database.fetch_all(query=query, values=values)
-        data: PaginatedDict = {
-            'operations': operations,
-            'total': operations[0]['total'] if operations else 0,
-            'page_count': 0,
-        }
-        data['page_count'] = (
-            data['total'] // settings.PAGE_SIZE + 1
-            if data['total'] % settings.PAGE_SIZE
-            else data['total'] // settings.PAGE_SIZE
+    @classmethod
+    def get_page_filter(
+        cls: Type['OperationRepository'],
+        page: int,
+        cursor: Optional[Cursor],
+    ) -> Tuple[str, str, Dict[str, Union[int, datetime]]]:
+        """Условие по ключу курсора, порядок чтения строк и параметры страницы для get_operations"""
+        if cursor is None:
+            return '', 'desc', {'offset': (page - 1) * settings.PAGE_SIZE}
+        # Pages before the key and the last page are read in ascending order and reversed by get_operations
+        order = 'desc' if cursor.direction == CursorDirection.AFTER else 'asc'
+        if cursor.key is None:
+            return '', order, {'offset': cursor.skip}
+        created_at, operation_id = cursor.key
+        operator = '<' if cursor.direction == CursorDirection.AFTER else '>'
+        return (
+            f'and (o.created_at, o.id) {operator} (:created_at, :operation_id)',
+            order,
+            {'offset': cursor.skip, 'created_at': created_at, 'operation_id': operation_id},
         )
 
-        return data
+    @classmethod
+    async def count_operations(cls: Type['OperationRepository'], is_regular_operation: bool, company_id: int) -> int:
+        query = """
+        select count(*)
+        from operations o
+        where o.is_approved = true and o.is_regular_operation = :is_regular_operation and o.company_id = :company_id
+        """
+        values = {'is_regular_operation': is_regular_operation, 'company_id': company_id}
+        return await cls.fetch_val(query, values=values)
 
     @classmethod
     async def get_stats_by_categories(
@@ -153,34 +310,108 @@ class OperationRepository(BaseRepository):
         date_to: datetime,
         company_id: int,
     ) -> Dict[str, float]:
+        """Расход по категориям за дни с date_from по date_to включительно"""
         query = """
-        select
-               o.category,
-               sum(
-                       case
-                           when (o.operation_type = 'expense') then o.received_amount *
-                                                                    (case when (o.currency = 'uah')
-                                                                    then 1 else c.buy end)
-                           else 0 end
-                   ) as expense
-        from operations o
-                 left join currencies c on
-                    c.ccy = o.currency and
-                    c.created_at = (select max(created_at) from currencies where ccy = o.currency)
-        where o.created_at between :date_from
-            and :date_to
-          and o.is_approved = true
-          and o.is_regular_operation = false
-          and o.company_id = :company_id
-          and o.operation_type = 'expense'
-        group by o.category
+        select r.category, sum(r.base_amount_sum) as expense
+        from operation_daily_rollups r
+        where r.company_id = :company_id
+          and r.day between :date_from and :date_to
+          and r.operation_type = 'expense'
+        group by r.category
+        having sum(r.count) > 0
         order by expense desc
         """
 
         values = {
-            'date_from': date_from.strftime('%Y-%m-%d %H:%M:%S'),
-            'date_to': date_to.strftime('%Y-%m-%d %H:%M:%S'),
+            'date_from': date_from.date(),
+            'date_to': date_to.date(),
             'company_id': company_id,
         }
 
-        return {x[0]: x[1] for x in await database.fetch_all(query=query, values=values)}
+        # Operations without a category are stored under '' in the rollups
+        return {x[0] or None: x[1] for x in await cls.fetch_all(query, values=values)}
+
+    @classmethod
+    async def get_expense_descriptions(cls, limit: int) -> List[str]:
+        query = """
+        select distinct o.description
+        from operations o
+        where o.operation_type = 'expense' and o.description is not null
+        limit :limit
+        """
+        return [x[0] for x in await cls.fetch_all(query, values={'limit': limit})]
+
+    @classmethod
+    async def get_approved_categories(cls, company_id: int) -> List[Record]:
+        query = """
+        select o.description, o.category
+        from operations o
+        where o.company_id = :company_id
+          and o.is_approved = true
+          and o.operation_type = 'expense'
+          and o.category is not null
+          and o.description is not null
+        order by o.created_at
+        """
+        return await cls.fetch_all(query, values={'company_id': company_id})
+
+    @classmethod
+    async def get_uncategorized_expenses(cls, after_id: int, limit: int) -> List[Record]:
+        query = """
+        select o.id, o.description
+        from operations o
+        where o.operation_type = 'expense'
+          and o.category is null
+          and o.description is not null
+          and o.id > :after_id
+        order by o.id
+        limit :limit
+        """
+        return await cls.fetch_all(query, values={'after_id': after_id, 'limit': limit})
+
+    @classmethod
+    async def set_categories(cls, operation_ids: Dict[str, List[int]]) -> None:
+        """Одним запросом на категорию: {категория: [id операций]}"""
+        async with database.transaction():
+            for category, ids in operation_ids.items():
+                await cls.update_rollups(ids, -1)
+                await cls.update(
+                    fields={'category': category},
+                    modifiers=[InWhereModifier('id', set(ids))],
+                )
+                await cls.update_rollups(ids, 1)
+
+    @classmethod
+    async def freeze_rates(cls) -> None:
+        """
+        Фиксирует курс на дату создания операциям без курса (импортированным): последний курс не позже created_at,
+        для операций старше истории курсов - самый ранний
+        """
+        query = """
+        update operations
+        set rate = case
+            when currency = :base_currency then 1
+            else coalesce(
+                (
+                    select c.buy
+                    from currencies c
+                    where c.ccy = operations.currency and c.created_at <= operations.created_at
+                    order by c.created_at desc
+                    limit 1
+                ),
+                (
+                    select c.buy
+                    from currencies c
+                    where c.ccy = operations.currency
+                    order by c.created_at
+                    limit 1
+                )
+            )
+        end
+        where rate is null
+        """
+        async with database.transaction():
+            await database.execute(query=query, values={'base_currency': settings.BASE_CURRENCY})
+            await database.execute(
+                'update operations set base_amount = received_amount * rate where base_amount is null',
+            )
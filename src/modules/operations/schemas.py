@@ -1,13 +1,22 @@
 import json
 from datetime import datetime
-from typing import List, Optional, Type, Union
+from typing import Any, List, Mapping, Optional, Type, Union
 
+from databases.interfaces import Record
 from pydantic import validator
 
 from modules.operations.enums import CurrencyEnum, ExpenseCategoryEnum, IncomeCategoryEnum, OperationType, RepeatType
 from sdk.schemas import BaseSchema, IDSchemaMixin
 
 
+def get_category(value: str) -> Union[ExpenseCategoryEnum, IncomeCategoryEnum]:
+    """Категория в том же порядке, что и при валидации поля category: сначала расходы"""
+    try:
+        return ExpenseCategoryEnum(value)
+    except ValueError:
+        return IncomeCategoryEnum(value)
+
+
 class OperationBase(BaseSchema):
     amount: int
     received_amount: Optional[int] = None
@@ -62,3 +71,20 @@ class OperationUpdate(BaseSchema):
 class Operation(IDSchemaMixin, OperationBase):
     created_at: datetime
     company_id: int
+    rate: Optional[float] = None
+    base_amount: Optional[float] = None
+
+    @classmethod
+    def from_row(cls: Type['Operation'], row: Union[Record, Mapping[str, Any]]) -> 'Operation':
+        """
+        Операция из строки репозитория без валидации: данные записаны приложением и уже приведены
+        к типам колонок, остается только восстановить перечисления
+        """
+        row = dict(row)
+        values = {name: row[name] for name in cls.__fields__ if name in row}
+        values['operation_type'] = OperationType(values['operation_type'])
+        values['currency'] = CurrencyEnum(values['currency'])
+        values['repeat_type'] = RepeatType(values['repeat_type'] or RepeatType.NO_REPEAT)
+        if values['category'] is not None:
+            values['category'] = get_category(values['category'])
+        return cls.construct(**values)
@@ -1,21 +1,55 @@
+import logging
 import string
 from calendar import monthrange
 from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
 
 from spacy.lang.ru import STOP_WORDS
+from spacy.tokens import Doc
 
-from config import category_model, nlp, operation_model
-from modules.operations.enums import CurrencyEnum, ExpenseCategoryEnum, OperationType, RepeatType
+from config import settings
+from modules.currencies.services import CurrencyService
+from modules.operations.enums import CurrencyEnum, ExpenseCategoryEnum, InferenceTask, OperationType, RepeatType
+from modules.operations.indexes import LearnedCategoryIndex
+from modules.operations.parsers import RuleBasedOperationParser
 from modules.operations.repositories import OperationRepository
 from modules.operations.schemas import Operation, OperationCreate, OperationUpdate
+from sdk.cache import LRUCache
+from sdk.inference import InferencePool
+from sdk.inference_server import InferenceClient, InferenceServerError
+from sdk.nlp import load_models, models
+from sdk.pagination import Cursor, CursorDirection
 from sdk.repositories import WhereModifier
 from sdk.schemas import PaginatedSchema
 
 
 class OperationService:
     repository = OperationRepository
+    entities_cache: LRUCache[Dict[str, Union[str, List[str], List[tuple]]]] = LRUCache(
+        'operation_entities',
+        maxsize=settings.NLP_CACHE_SIZE,
+        ttl=settings.NLP_CACHE_TTL,
+    )
+    categories_cache: LRUCache[List[ExpenseCategoryEnum]] = LRUCache(
+        'operation_categories',
+        maxsize=settings.NLP_CACHE_SIZE,
+        ttl=settings.NLP_CACHE_TTL,
+    )
+    # Approved operations of a company by (company_id, is_regular_operation), for the pages count
+    operation_counts: LRUCache[int] = LRUCache(
+        'operation_counts',
+        maxsize=settings.OPERATION_COUNT_CACHE_SIZE,
+        ttl=settings.OPERATION_COUNT_CACHE_TTL,
+    )
+    # Stats by (company_id, version, period) and future operations by (company_id, version, rates version, day).
+    # The version is bumped in the database with every change of the company's operations, also by other processes,
+    # so entries of every period become unreachable at once and are evicted by the LRU
+    stats_cache: LRUCache[Any] = LRUCache(
+        'operation_stats',
+        maxsize=settings.STATS_CACHE_SIZE,
+        ttl=settings.STATS_CACHE_TTL,
+    )
 
     @classmethod
     async def create_operation(
@@ -26,29 +60,52 @@ class OperationService:
         values = operation_create.dict()
         values['created_at'] = datetime.now()
         values['company_id'] = company_id
-        operation_id = await cls.repository.create(**values)
+        values['rate'] = await CurrencyService.get_rate(values['currency'])
+        values['base_amount'] = cls.get_base_amount(values['received_amount'], values['rate'])
+        operation_id = await cls.repository.create_operation(**values)
+        cls.invalidate_operation_count(company_id)
         return Operation(
             id=operation_id,
             **values,
         )
 
     @classmethod
-    def preprocess_text(cls: Type['OperationService'], text: str) -> str:
-        text = text.lower()
-
-        tokens = [token.lemma_.strip() for token in nlp(text)]
+    def get_base_amount(cls: Type['OperationService'], amount: Optional[int], rate: Optional[float]) -> Optional[float]:
+        return amount * rate if amount is not None and rate is not None else None
 
+    @classmethod
+    def clean_tokens(cls: Type['OperationService'], tokens: Iterable[str]) -> str:
         return ' '.join(
             [t for t in tokens if t not in STOP_WORDS and t not in string.punctuation and not t.isdigit()],
         )
 
     @classmethod
-    def get_operation_entities(
+    def preprocess_text(cls: Type['OperationService'], text: str) -> str:
+        text = text.lower()
+
+        return cls.clean_tokens(lemma.strip() for lemma in models.lemmatizer.lemmatize(text))
+
+    @classmethod
+    def preprocess_texts(
         cls: Type['OperationService'],
-        text: str,
-    ) -> Dict[str, Union[str, List[str], List[tuple]]]:
-        text = text.replace('- ', '-') if text.startswith('- ') else text
-        doc = operation_model(text)
+        texts: Sequence[str],
+        batch_size: Optional[int] = None,
+        n_process: int = 1,
+    ) -> List[str]:
+        lemmas = models.lemmatizer.lemmatize_many(
+            (text.lower() for text in texts),
+            batch_size=batch_size,
+            n_process=n_process,
+        )
+        return [cls.clean_tokens(lemma.strip() for lemma in text_lemmas) for text_lemmas in lemmas]
+
+    @classmethod
+    def normalize_operation_text(cls: Type['OperationService'], text: str) -> str:
+        text = ' '.join(text.split())
+        return text.replace('- ', '-') if text.startswith('- ') else text
+
+    @classmethod
+    def extract_entities(cls: Type['OperationService'], doc: Doc) -> Dict[str, Union[str, List[str], List[tuple]]]:
         single_entities = ('AMOUNT', 'CURRENCY', 'FOR', 'EVERYDAY', 'EVERYWEEK', 'EVERYMONTH')
         multiple_entities = ('NUMBEROFDAY',)
         weekdays = {
@@ -74,11 +131,94 @@ class OperationService:
         return entities
 
     @classmethod
-    def get_categories(cls: Type['OperationService'], text: str) -> List[ExpenseCategoryEnum]:
-        doc = category_model(cls.preprocess_text(text))
-        categories = doc.cats
+    def get_operation_entities(
+        cls: Type['OperationService'],
+        text: str,
+    ) -> Dict[str, Union[str, List[str], List[tuple]]]:
+        text = cls.normalize_operation_text(text)
+        entities = cls.entities_cache.get(text)
+        if entities is None:
+            entities = cls.extract_entities(models.operation_model(text))
+            cls.entities_cache.set(text, entities)
+        return entities
+
+    @classmethod
+    def get_operation_entities_many(
+        cls: Type['OperationService'],
+        texts: Sequence[str],
+    ) -> List[Dict[str, Union[str, List[str], List[tuple]]]]:
+        texts = [cls.normalize_operation_text(text) for text in texts]
+        entities = {text: cls.entities_cache.get(text) for text in texts}
+        missed = [text for text, operation_entities in entities.items() if operation_entities is None]
+        for text, doc in zip(missed, models.operation_model.pipe(missed)):
+            entities[text] = cls.extract_entities(doc)
+            cls.entities_cache.set(text, entities[text])
+        return [entities[text] for text in texts]
+
+    @classmethod
+    def get_top_categories(cls: Type['OperationService'], categories: Dict[str, float]) -> List[ExpenseCategoryEnum]:
         return [ExpenseCategoryEnum(x.lower()) for x in sorted(categories, key=categories.get, reverse=True)[:2]]
 
+    @classmethod
+    def normalize_description(cls: Type['OperationService'], text: str) -> str:
+        """Ключ кэша категорий. Считается без моделей, поэтому кэш проверяется и до отправки запроса в inference"""
+        return ' '.join(text.lower().split())
+
+    @classmethod
+    def get_categories(cls: Type['OperationService'], text: str) -> List[ExpenseCategoryEnum]:
+        key = cls.normalize_description(text)
+        categories = cls.categories_cache.get(key)
+        if categories is None:
+            categories = cls.get_top_categories(models.category_model(cls.preprocess_text(key)).cats)
+            cls.categories_cache.set(key, categories)
+        return categories
+
+    @classmethod
+    def get_categories_many(cls: Type['OperationService'], texts: Sequence[str]) -> List[List[ExpenseCategoryEnum]]:
+        keys = [cls.normalize_description(text) for text in texts]
+        categories = {key: cls.categories_cache.get(key) for key in keys}
+        missed = [key for key, key_categories in categories.items() if key_categories is None]
+        for key, doc in zip(missed, models.category_model.pipe(cls.preprocess_texts(missed))):
+            categories[key] = cls.get_top_categories(doc.cats)
+            cls.categories_cache.set(key, categories[key])
+        return [categories[key] for key in keys]
+
+    @classmethod
+    def predict_categories(
+        cls: Type['OperationService'],
+        texts: Sequence[str],
+        batch_size: Optional[int] = None,
+        n_process: int = 1,
+    ) -> List[ExpenseCategoryEnum]:
+        """Наиболее вероятная категория каждого описания. Без кэша предсказаний - для пакетной обработки"""
+        texts = cls.preprocess_texts(texts, batch_size=batch_size, n_process=n_process)
+        docs = models.category_model.pipe(texts, batch_size=batch_size, n_process=n_process)
+        return [cls.get_top_categories(doc.cats)[0] for doc in docs]
+
+    @classmethod
+    async def recategorize_operations(
+        cls: Type['OperationService'],
+        operations: List[Tuple[int, str]],
+        categories: Dict[str, ExpenseCategoryEnum],
+        batch_size: Optional[int] = None,
+        n_process: int = 1,
+    ) -> None:
+        """
+        Проставляет категории операциям без категории: (id, описание). categories - уже предсказанные категории
+        описаний, дополняется новыми. Операции одной категории обновляются одним запросом
+        """
+        missed = list({description for _, description in operations if description not in categories})
+        categories.update(zip(missed, cls.predict_categories(missed, batch_size=batch_size, n_process=n_process)))
+        operation_ids: Dict[str, List[int]] = defaultdict(list)
+        for operation_id, description in operations:
+            operation_ids[categories[description].value].append(operation_id)
+        await cls.repository.set_categories(operation_ids)
+
+    @classmethod
+    def clear_nlp_caches(cls: Type['OperationService']) -> None:
+        cls.entities_cache.clear()
+        cls.categories_cache.clear()
+
     @classmethod
     def get_operation_regularity(
         cls: Type['OperationService'],
@@ -93,13 +233,138 @@ class OperationService:
         return None
 
     @classmethod
-    def parse_operation(
+    def get_expense_description(
+        cls: Type['OperationService'],
+        entities: Dict[str, Union[str, List[str], List[tuple]]],
+    ) -> Optional[str]:
+        """Описание операции, по которому нужно определить категорию. Только для расходов"""
+        description: Optional[str] = entities.get('FOR')  # type: ignore[assignment]
+        try:
+            amount = int(entities['AMOUNT'])  # type: ignore[arg-type]
+        except (KeyError, TypeError, ValueError):
+            return None
+        if OperationType.get_operation_type(amount) != OperationType.EXPENSE:
+            return None
+        return description
+
+    @classmethod
+    def run_inference_batch(
+        cls: Type['OperationService'],
+        requests: List[Tuple[InferenceTask, str]],
+    ) -> List[Tuple[Dict[str, Union[str, List[str], List[tuple]]], List[ExpenseCategoryEnum]]]:
+        """
+        Выполняется в процессе inference pool.
+        PARSE - NER и классификация категории по тексту сообщения, CATEGORIZE - только классификация описания
+        """
+        texts = [text for task, text in requests if task == InferenceTask.PARSE]
+        parsed_entities = iter(cls.get_operation_entities_many(texts))
+        entities = [next(parsed_entities) if task == InferenceTask.PARSE else {} for task, _ in requests]
+        descriptions = [
+            cls.get_expense_description(operation_entities) if task == InferenceTask.PARSE else text
+            for (task, text), operation_entities in zip(requests, entities)
+        ]
+        categories = iter(cls.get_categories_many([x for x in descriptions if x]))
+        return [
+            (operation_entities, next(categories) if description else [])
+            for operation_entities, description in zip(entities, descriptions)
+        ]
+
+    @classmethod
+    async def start_inference(cls: Type['OperationService']) -> None:
+        """Подключается к inference серверу, если он настроен. Без сервера или если он недоступен - прогревает pool"""
+        # Predictions cached by this process may come from models that are not loaded anymore
+        cls.clear_nlp_caches()
+        if inference_client is not None:
+            try:
+                await inference_client.connect()
+                return
+            except InferenceServerError:
+                logging.warning('Inference server is unavailable, loading models in process', exc_info=True)
+        inference_pool.start()
+        await inference_pool.warmup()
+
+    @classmethod
+    def is_inference_ready(cls: Type['OperationService']) -> bool:
+        return (inference_client is not None and inference_client.is_ready) or inference_pool.is_ready
+
+    @classmethod
+    async def run_inference(
+        cls: Type['OperationService'],
+        request: Tuple[InferenceTask, str],
+    ) -> Tuple[Dict[str, Union[str, List[str], List[tuple]]], List[ExpenseCategoryEnum]]:
+        """
+        Выполняет запрос на inference сервере, если он настроен и доступен, иначе в inference pool процесса.
+        Кэши сущностей и категорий проверяются в текущем процессе, в inference отправляется только недостающее
+        """
+        task, text = request
+        entities: Dict[str, Union[str, List[str], List[tuple]]] = {}
+        description: Optional[str] = text
+        if task == InferenceTask.PARSE:
+            cached_entities = cls.entities_cache.get(cls.normalize_operation_text(text))
+            if cached_entities is None:
+                return await cls.submit_inference(request)
+            entities = cached_entities
+            description = cls.get_expense_description(entities)
+        if not description:
+            return entities, []
+        categories = cls.categories_cache.get(cls.normalize_description(description))
+        if categories is None:
+            _, categories = await cls.submit_inference((InferenceTask.CATEGORIZE, description))
+        return entities, categories
+
+    @classmethod
+    async def submit_inference(
+        cls: Type['OperationService'],
+        request: Tuple[InferenceTask, str],
+    ) -> Tuple[Dict[str, Union[str, List[str], List[tuple]]], List[ExpenseCategoryEnum]]:
+        """Отправляет запрос на inference сервер или в inference pool и кэширует ответ в текущем процессе"""
+        result = None
+        if inference_client is not None:
+            try:
+                entities, categories = await inference_client.submit(request)
+                result = defaultdict(list, entities), [ExpenseCategoryEnum(x) for x in categories]
+            except InferenceServerError:
+                logging.warning('Inference server request failed, running inference in process', exc_info=True)
+        if result is None:
+            result = await inference_pool.submit(request)
+        entities, categories = result
+        task, text = request
+        description: Optional[str] = text
+        if task == InferenceTask.PARSE:
+            cls.entities_cache.set(cls.normalize_operation_text(text), entities)
+            description = cls.get_expense_description(entities)
+        if description:
+            cls.categories_cache.set(cls.normalize_description(description), categories)
+        return entities, categories
+
+    @classmethod
+    async def parse_operation(
         cls: Type['OperationService'],
         text: str,
         creator_id: int,
+        company_id: int,
     ) -> Optional[Tuple[OperationCreate, List[ExpenseCategoryEnum]]]:
-        """ """
-        entities = cls.get_operation_entities(text)
+        categories: Optional[List[ExpenseCategoryEnum]] = None
+        entities = RuleBasedOperationParser.parse(text)
+        if entities is None:
+            entities, categories = await cls.run_inference((InferenceTask.PARSE, text))
+
+        description = cls.get_expense_description(entities)
+        learned_category = await LearnedCategoryIndex.get(company_id, description) if description else None
+        if learned_category is not None:
+            # Подтвержденная ранее категория идет первой, классификатор для нее не нужен
+            categories = [learned_category] + [x for x in categories or [] if x != learned_category][:1]
+        elif categories is None and description:
+            _, categories = await cls.run_inference((InferenceTask.CATEGORIZE, description))
+        return cls.build_operation(entities, categories or [], creator_id)
+
+    @classmethod
+    def build_operation(
+        cls: Type['OperationService'],
+        entities: Dict[str, Union[str, List[str], List[tuple]]],
+        categories: List[ExpenseCategoryEnum],
+        creator_id: int,
+    ) -> Tuple[OperationCreate, List[ExpenseCategoryEnum]]:
         description: Optional[str] = entities.get('FOR')  # type: ignore[assignment]
         amount = int(entities['AMOUNT'])  # type: ignore[arg-type]
         possible_currency: Optional[str] = entities.get('CURRENCY')  # type: ignore[assignment]
@@ -108,10 +373,6 @@ class OperationService:
         repeat_days = None
         if repeat_time is not None:
             repeat_days = repeat_time['days']
-        if description is None:
-            categories = []
-        else:
-            categories = cls.get_categories(description) if operation_type == OperationType.EXPENSE else []
         try:
             currency = CurrencyEnum.get(possible_currency)
         except ValueError:
@@ -130,7 +391,7 @@ class OperationService:
                 repeat_days=repeat_days,
                 is_regular_operation=repeat_time is not None,
             ),
-            categories,
+            categories if operation_type == OperationType.EXPENSE and description is not None else [],
         )
 
     @classmethod
@@ -140,10 +401,20 @@ class OperationService:
         category: Optional[str] = None,
     ) -> None:
         await cls.repository.approve_operation(operation_id, category)
+        operation = await cls.get_operation(operation_id)
+        if operation:
+            cls.invalidate_operation_count(operation.company_id)
+        if category is None:
+            return
+        if operation and operation.operation_type == OperationType.EXPENSE and operation.description:
+            LearnedCategoryIndex.add(operation.company_id, operation.description, ExpenseCategoryEnum(category))
 
     @classmethod
     async def delete_operation(cls: Type['OperationService'], operation_id: int) -> None:
-        await cls.repository.delete([WhereModifier(id=operation_id)])
+        operation = await cls.get_operation(operation_id)
+        await cls.repository.delete_operation(operation_id)
+        if operation:
+            cls.invalidate_operation_count(operation.company_id)
 
     @classmethod
     async def get_operation(
@@ -153,7 +424,7 @@ class OperationService:
         operation = await cls.repository.get([WhereModifier(id=operation_id)])
         if not operation:
             return None
-        return Operation(**operation)
+        return Operation.from_row(operation)
 
     @classmethod
     async def update_operation(
@@ -161,10 +432,11 @@ class OperationService:
         operation_id: int,
         operation_data: OperationUpdate,
     ) -> None:
-        await cls.repository.update(
-            fields=operation_data.dict(exclude_unset=True),
-            modifiers=[WhereModifier(id=operation_id)],
-        )
+        fields = operation_data.dict(exclude_unset=True)
+        await cls.repository.update_operation(operation_id, fields)
+        operation = await cls.get_operation(operation_id)
+        if operation and ('is_approved' in fields or 'is_regular_operation' in fields):
+            cls.invalidate_operation_count(operation.company_id)
 
     @classmethod
     async def get_regular_operations(
@@ -172,7 +444,7 @@ class OperationService:
         company_id: Optional[int] = None,
     ) -> List[Operation]:
         operations = await cls.repository.get_regular_operations(company_id)
-        return [Operation(**dict(operation)) for operation in operations]
+        return [Operation.from_row(operation) for operation in operations]
 
     @classmethod
     def get_every_day_operations(
@@ -182,7 +454,7 @@ class OperationService:
         days_range: Sequence[int],
     ) -> List[Operation]:
         return [
-            Operation(
+            Operation.construct(
                 **base_operation_data,
                 created_at=datetime(
                     year=now.year,
@@ -205,7 +477,7 @@ class OperationService:
         last_day: int,
     ) -> List[Operation]:
         return [
-            Operation(
+            Operation.construct(
                 **base_operation_data,
                 created_at=datetime(
                     year=now.year,
@@ -229,7 +501,7 @@ class OperationService:
         weekdays: Dict[int, List[int]],
     ) -> List[Operation]:
         return [
-            Operation(
+            Operation.construct(
                 **base_operation_data,
                 created_at=datetime(
                     year=now.year,
@@ -246,9 +518,22 @@ class OperationService:
 
     @classmethod
     async def get_future_operations(cls, company_id: int) -> Tuple[Operation, ...]:
+        now = datetime.now()
+        # Rates are written by the schedule process, so their version is read from the database on every call
+        rates_version = await CurrencyService.get_rates_version()
+        version = await cls.repository.get_stats_version(company_id)
+        key = ('future', company_id, version, rates_version, now.date())
+        future_operations = cls.stats_cache.get(key)
+        if future_operations is None:
+            future_operations = await cls.project_future_operations(company_id, now)
+            cls.stats_cache.set(key, future_operations)
+        return future_operations
+
+    @classmethod
+    async def project_future_operations(cls, company_id: int, now: datetime) -> Tuple[Operation, ...]:
+        """Будущие операции по регулярным операциям компании на оставшиеся дни месяца после now"""
         operations = await OperationService.get_regular_operations(company_id)
         future_operations = []
-        now = datetime.now()
         last_day = monthrange(now.year, now.month)[1]
         days_range = tuple(range(now.day + 1, last_day + 1))
         weekdays = defaultdict(list)
@@ -256,6 +541,7 @@ class OperationService:
             weekdays[datetime(year=now.year, month=now.month, day=day).weekday()].append(day)
 
         for operation in operations:
+            # Projections of already parsed operations, so they are constructed without validation
             base_operation_data = operation.dict(exclude={'created_at', 'is_regular_operation'})
             base_operation_data['is_regular_operation'] = False
             if operation.repeat_type == RepeatType.EVERY_DAY:
@@ -288,11 +574,50 @@ class OperationService:
         date_to: datetime,
         company_id: int,
     ) -> Dict[str, float]:
-        return await cls.repository.get_stats(
-            date_from=date_from,
-            date_to=date_to,
-            company_id=company_id,
+        # Stats are read from daily rollups, so only the days of the period matter
+        version = await cls.repository.get_stats_version(company_id)
+        key = ('stats', company_id, version, date_from.date(), date_to.date())
+        stats = cls.stats_cache.get(key)
+        if stats is None:
+            stats = await cls.repository.get_stats(
+                date_from=date_from,
+                date_to=date_to,
+                company_id=company_id,
+            )
+            cls.stats_cache.set(key, stats)
+        return dict(stats)
+
+    @classmethod
+    async def get_dashboard_stats(
+        cls: Type['OperationService'],
+        day_from: datetime,
+        day_to: datetime,
+        month_from: datetime,
+        month_to: datetime,
+        company_id: int,
+    ) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Доход и расход за день и за месяц, в который он входит"""
+        key = (
+            'dashboard',
+            company_id,
+            await cls.repository.get_stats_version(company_id),
+            day_from.date(),
+            day_to.date(),
+            month_from.date(),
+            month_to.date(),
         )
+        stats = cls.stats_cache.get(key)
+        if stats is None:
+            stats = await cls.repository.get_dashboard_stats(
+                day_from=day_from,
+                day_to=day_to,
+                month_from=month_from,
+                month_to=month_to,
+                company_id=company_id,
+            )
+            cls.stats_cache.set(key, stats)
+        day_stats, month_stats = stats
+        return dict(day_stats), dict(month_stats)
 
     @classmethod
     async def get_operations(
@@ -300,21 +625,43 @@ class OperationService:
         company_id: int,
         page: int = 1,
         is_regular_operation: bool = False,
+        cursor: Optional[Cursor] = None,
     ) -> PaginatedSchema[Operation]:
+        total = await cls.count_operations(company_id, is_regular_operation)
+        page_count = -(-total // settings.PAGE_SIZE)
+        limit = settings.PAGE_SIZE
+        if cursor is not None and cursor.direction == CursorDirection.LAST:
+            limit = total - (page_count - 1) * settings.PAGE_SIZE
         operations = await cls.repository.get_operations(
             page=page,
             is_regular_operation=is_regular_operation,
             company_id=company_id,
+            cursor=cursor,
+            limit=limit,
         )
 
         return PaginatedSchema(
-            total_count=operations['total'],
-            page_count=operations['page_count'],
-            next=page + 1 if page < operations['page_count'] else None,
+            total_count=total,
+            page_count=page_count,
+            next=page + 1 if page < page_count else None,
             previous=page - 1 if page > 1 else None,
-            results=[Operation(**operation) for operation in operations['operations']],
+            results=[Operation.from_row(operation) for operation in operations],
         )
 
+    @classmethod
+    async def count_operations(cls: Type['OperationService'], company_id: int, is_regular_operation: bool) -> int:
+        key = (company_id, is_regular_operation)
+        total = cls.operation_counts.get(key)
+        if total is None:
+            total = await cls.repository.count_operations(is_regular_operation, company_id)
+            cls.operation_counts.set(key, total)
+        return total
+
+    @classmethod
+    def invalidate_operation_count(cls: Type['OperationService'], company_id: int) -> None:
+        cls.operation_counts.pop((company_id, False))
+        cls.operation_counts.pop((company_id, True))
+
     @classmethod
     async def get_operation_count(cls: Type['OperationService']) -> int:
         return await cls.repository.count([WhereModifier(is_approved=True)])
@@ -324,7 +671,11 @@ class OperationService:
         cls: Type['OperationService'],
         operations: List[OperationCreate],
     ) -> None:
-        await cls.repository.create_many([operation.dict() for operation in operations])
+        await cls.repository.bulk_insert([operation.dict() for operation in operations])
+        await cls.repository.freeze_rates()
+        await cls.repository.rebuild_rollups()
+        cls.operation_counts.clear()
+        cls.stats_cache.clear()
 
     @classmethod
     async def create_regular_operation(  # noqa: CCR001 TODO: Cognitive complexity is too high (9 > 7). Need to refactor
@@ -380,3 +731,29 @@ class OperationService:
             date_to=date_to,
             company_id=company_id,
         )
+
+
+inference_pool = InferencePool(
+    OperationService.run_inference_batch,
+    workers=settings.NLP_WORKERS,
+    batch_size=settings.NLP_BATCH_SIZE,
+    wait_ms=settings.NLP_BATCH_WAIT_MS,
+    initializer=load_models,
+)
+
+# With NLP_SERVER_SOCKET the models are owned by the inference server (manage.py run_inference_server)
+inference_client = (
+    InferenceClient(
+        settings.NLP_SERVER_SOCKET,
+        pool_size=settings.NLP_SERVER_POOL_SIZE,
+        timeout=settings.NLP_SERVER_TIMEOUT,
+        retry_after=settings.NLP_SERVER_RETRY_AFTER,
+    )
+    if settings.NLP_SERVER_SOCKET
+    else None
+)
+
+models.reload_hooks.append(OperationService.clear_nlp_caches)
+if inference_client is not None:
+    # The server may have been restarted with other models
+    inference_client.connect_hooks.append(OperationService.clear_nlp_caches)
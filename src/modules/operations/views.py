@@ -20,6 +20,7 @@ from modules.operations.schemas import Operation, OperationUpdate
 from modules.operations.services import OperationService
 from sdk import utils
 from sdk.decorators import SelectCompanyRequired, error_handler_decorator
+from sdk.pagination import get_page_keys
 from sdk.utils import get_message_handler
 
 
@@ -33,14 +34,11 @@ async def get_operations(data: Union[types.Message, types.CallbackQuery]) -> Non
     if isinstance(data, types.Message):
         is_regular_operations = data.text == f'/{Command.REGULAR}'
         page = 1
+        cursor = None
         message = data
         chat_id = data.chat.id
     else:
-        page, is_regular_operations = map(
-            int,
-            data.data.replace(f'{OperationAllCallback.PAGINATION}_', '').split('_'),
-        )
-        is_regular_operations = bool(is_regular_operations)
+        page, is_regular_operations, cursor = OperationAllCallback.parse_pagination(data.data)
         message = data.message
         is_message_modified = bool(
             [
@@ -61,13 +59,16 @@ async def get_operations(data: Union[types.Message, types.CallbackQuery]) -> Non
         message_text = 'Регулярные операции'
 
     paginated_operations = await OperationService.get_operations(
-        settings.SELECTED_COMPANIES[chat_id],
+        await SelectCompanyRequired.get_company_id(chat_id),
         page,
         is_regular_operation=is_regular_operations,
+        cursor=cursor,
     )
+    results = paginated_operations.results
+    first_key, last_key = get_page_keys(results)
 
     reply_markup = utils.get_operations_markup(
-        paginated_operations.results,
+        results,
         page,
         back_screen_type,
     )
@@ -76,6 +77,8 @@ async def get_operations(data: Union[types.Message, types.CallbackQuery]) -> Non
             page,
             max_page=paginated_operations.page_count,
             is_regular_operation=is_regular_operations,
+            first_key=first_key,
+            last_key=last_key,
         ),
     )
 
@@ -103,7 +106,7 @@ async def get_future_operations(data: Union[types.Message, types.CallbackQuery])
     else:
         chat_id = data.message.chat.id
     future_operations = await OperationService.get_future_operations(
-        settings.SELECTED_COMPANIES[chat_id],
+        await SelectCompanyRequired.get_company_id(chat_id),
     )
     markup = utils.get_future_operation_markup(
         future_operations,
@@ -195,14 +198,20 @@ async def delete_operation(callback_query: types.CallbackQuery) -> None:
 @SelectCompanyRequired
 @error_handler_decorator
 async def create_operation(message: types.Message) -> None:
-    operation_data = OperationService.parse_operation(message.text, message.chat.id)
+    company_id = await SelectCompanyRequired.get_company_id(message.chat.id)
+    if not OperationService.is_inference_ready():
+        await bot.send_message(
+            message.chat.id,
+            text='⏳ Модели еще загружаются, операция будет обработана через пару секунд',
+        )
+    operation_data = await OperationService.parse_operation(message.text, message.chat.id, company_id)
     if not operation_data:
         return
 
     operation_data, possible_categories = operation_data
     operation: Operation = await OperationService.create_operation(
         operation_data,
-        company_id=settings.SELECTED_COMPANIES[message.chat.id],
+        company_id=company_id,
     )
 
     if operation.operation_type == OperationType.EXPENSE:
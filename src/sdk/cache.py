@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+from sdk.metrics import HitCounter
+
+ValueType = TypeVar('ValueType')
+
+
+class LRUCache(Generic[ValueType]):
+    """
+    Ограниченный по размеру LRU кэш с временем жизни записей (ttl в секундах, None - без ограничения)
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.counter = HitCounter(name)
+        self._data: 'OrderedDict[Hashable, Tuple[float, ValueType]]' = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:  # noqa: ANN401
+        item = self._data.get(key)
+        if item is None:
+            self.counter.miss()
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.counter.miss()
+            return default
+        self._data.move_to_end(key)
+        self.counter.hit()
+        return value
+
+    def set(self, key: Hashable, value: ValueType) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f'{self.counter} size={len(self)}/{self.maxsize}'
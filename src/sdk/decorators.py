@@ -7,6 +7,7 @@ from aiogram import types
 
 from config import Environment, bot, settings
 from database import database
+from modules.companies.selection import selected_companies
 from modules.companies.services import CompanyService
 from sdk.exceptions.exception_handler_mapping import catch_exception
 
@@ -57,20 +58,31 @@ class SelectCompanyRequired:
             return None
         return await self.func(*args, **kwargs)
 
+    @staticmethod
+    async def get_company_id(chat_id: int) -> int:
+        """
+        Выбранная компания в обработчике с SelectCompanyRequired.
+        Выбор мог быть снят другим процессом после проверки, тогда пользователь получает сообщение об ошибке
+        """
+        company_id = await selected_companies.get(chat_id)
+        if company_id is None:
+            raise ValueError('У Вас не выбрана компания, чтобы это исправить введите /choose_company')
+        return company_id
+
     @staticmethod
     async def is_company_selected(chat_id: int) -> bool:
-        company_id = settings.SELECTED_COMPANIES.get(chat_id)
-        if company_id:
+        # Both are cached, so in steady state the check does not query the database
+        company_ids = await CompanyService.get_company_ids(chat_id)
+        if await selected_companies.get(chat_id) in company_ids:
             return True
-        companies = await CompanyService.get_my_companies(chat_id)
-        if not companies:
+        if not company_ids:
             await bot.send_message(
                 chat_id,
                 text='Сначала нужно создать или вступить в компанию /companies',
             )
             return False
-        elif len(companies) == 1:
-            settings.SELECTED_COMPANIES[chat_id] = companies[0].id
+        elif len(company_ids) == 1:
+            await selected_companies.set(chat_id, company_ids[0])
             return True
         else:
             await bot.send_message(
@@ -1,20 +1,23 @@
+import sqlite3
 from types import TracebackType
-from typing import Optional, Type, Union
+from typing import Any, Awaitable, Callable, Dict, Optional, Type, Union
 
 import sentry_sdk
 from asyncpg import ForeignKeyViolationError
 from pydantic import ValidationError
 
 from sdk.exceptions.handlers import (
+    integrity_error_handler,
     unexpected_exception_handler,
     user_not_found_handler,
     validator_error_handler,
     value_error_handler,
 )
 
-exception_handler_mapping = {
+exception_handler_mapping: Dict[type, Callable[..., Awaitable[Any]]] = {
     ValidationError: validator_error_handler,
     ForeignKeyViolationError: user_not_found_handler,
+    sqlite3.IntegrityError: integrity_error_handler,
     ValueError: value_error_handler,
     Exception: unexpected_exception_handler,
 }
@@ -1,3 +1,6 @@
+import sqlite3
+from typing import Union
+
 from asyncpg import ForeignKeyViolationError
 from pydantic import ValidationError
 
@@ -11,13 +14,21 @@ async def validator_error_handler(exc: ValidationError, chat_id: int) -> None:
     )
 
 
-async def user_not_found_handler(exc: ForeignKeyViolationError, chat_id: int) -> None:
+async def user_not_found_handler(exc: Union[ForeignKeyViolationError, sqlite3.IntegrityError], chat_id: int) -> None:
     await bot.send_message(
         chat_id,
         text='Для начала нужно зарегистрироваться /start',
     )
 
 
+async def integrity_error_handler(exc: sqlite3.IntegrityError, chat_id: int) -> None:
+    # SQLite raises one exception for all constraints, asyncpg raises ForeignKeyViolationError for this one
+    if str(exc).startswith('FOREIGN KEY'):
+        await user_not_found_handler(exc, chat_id)
+    else:
+        await unexpected_exception_handler(exc, chat_id)
+
+
 async def value_error_handler(exc: ValueError, chat_id: int) -> None:
     await bot.send_message(
         chat_id,
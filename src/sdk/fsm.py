@@ -0,0 +1,148 @@
+import copy
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+
+from aiogram.dispatcher.storage import BaseStorage
+
+from config import settings
+from modules.fsm.repositories import FSMStateRepository
+from sdk.cache import LRUCache
+
+Address = Tuple[int, int]
+
+
+class StateRecord(NamedTuple):
+    state: Optional[str]
+    data: Dict[str, Any]
+
+
+EMPTY_STATE = StateRecord(None, {})
+
+
+class DatabaseStorage(BaseStorage):
+    """
+    Хранилище FSM в базе проекта. Состояния, не менявшиеся ttl секунд, считаются сброшенными.
+    Изменения записываются в базу до возврата из set_state/set_data/update_data. Найденные состояния кэшируются
+    на cache_ttl секунд, отсутствие состояния не кэшируется: новое состояние из другого процесса читается сразу
+    """
+
+    def __init__(self, ttl: float, cache_size: int, cache_ttl: float) -> None:
+        self.ttl = ttl
+        self.cache: LRUCache[StateRecord] = LRUCache('fsm_states', maxsize=cache_size, ttl=cache_ttl)
+
+    async def close(self) -> None:
+        pass
+
+    async def wait_closed(self) -> None:
+        pass
+
+    async def get_state(
+        self,
+        *,
+        chat: Union[str, int, None] = None,
+        user: Union[str, int, None] = None,
+        default: Optional[str] = None,
+    ) -> Optional[str]:
+        record = await self._read(chat, user)
+        return record.state or self.resolve_state(default)
+
+    async def get_data(
+        self,
+        *,
+        chat: Union[str, int, None] = None,
+        user: Union[str, int, None] = None,
+        default: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        record = await self._read(chat, user)
+        return copy.deepcopy(record.data) if record.data else (default or {})
+
+    async def set_state(
+        self,
+        *,
+        chat: Union[str, int, None] = None,
+        user: Union[str, int, None] = None,
+        state: Optional[str] = None,
+    ) -> None:
+        record = await self._read(chat, user)
+        await self._write(chat, user, StateRecord(self.resolve_state(state), record.data))
+
+    async def set_data(
+        self,
+        *,
+        chat: Union[str, int, None] = None,
+        user: Union[str, int, None] = None,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        record = await self._read(chat, user)
+        await self._write(chat, user, StateRecord(record.state, copy.deepcopy(data or {})))
+
+    async def update_data(
+        self,
+        *,
+        chat: Union[str, int, None] = None,
+        user: Union[str, int, None] = None,
+        data: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> None:
+        record = await self._read(chat, user)
+        updated = copy.deepcopy(record.data)
+        updated.update(data or {}, **kwargs)
+        await self._write(chat, user, StateRecord(record.state, updated))
+
+    async def reset_state(
+        self,
+        *,
+        chat: Union[str, int, None] = None,
+        user: Union[str, int, None] = None,
+        with_data: Optional[bool] = True,
+    ) -> None:
+        if with_data:
+            # One delete instead of writing the state and then the data
+            await self._write(chat, user, EMPTY_STATE)
+        else:
+            await self.set_state(chat=chat, user=user, state=None)
+
+    async def delete_expired(self) -> None:
+        await FSMStateRepository.delete_expired(datetime.utcnow() - timedelta(seconds=self.ttl))
+
+    def _resolve(self, chat: Union[str, int, None], user: Union[str, int, None]) -> Address:
+        chat_id, user_id = self.check_address(chat=chat, user=user)
+        return int(chat_id), int(user_id)
+
+    async def _read(self, chat: Union[str, int, None], user: Union[str, int, None]) -> StateRecord:
+        address = self._resolve(chat, user)
+        record = self.cache.get(address)
+        if record is not None:
+            return record
+        row = await FSMStateRepository.get_state(
+            *address,
+            updated_after=datetime.utcnow() - timedelta(seconds=self.ttl),
+        )
+        if row is None:
+            # Not cached: the state may be set by another process any moment
+            return EMPTY_STATE
+        record = StateRecord(row['state'], json.loads(row['data']))
+        self.cache.set(address, record)
+        return record
+
+    async def _write(self, chat: Union[str, int, None], user: Union[str, int, None], record: StateRecord) -> None:
+        address = self._resolve(chat, user)
+        if record == EMPTY_STATE:
+            self.cache.pop(address)
+            await FSMStateRepository.delete_state(*address)
+            return
+        await FSMStateRepository.save_state(
+            *address,
+            state=record.state,
+            data=json.dumps(record.data),
+            updated_at=datetime.utcnow(),
+        )
+        self.cache.set(address, record)
+
+
+storage = DatabaseStorage(
+    ttl=settings.FSM_STATE_TTL,
+    cache_size=settings.FSM_CACHE_SIZE,
+    cache_ttl=settings.FSM_CACHE_TTL,
+)
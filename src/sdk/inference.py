@@ -0,0 +1,89 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+BatchHandler = Callable[[List[Any]], List[Any]]
+
+
+class InferencePool:
+    """
+    Собирает запросы к моделям в течение короткого окна и выполняет их одним батчем вне event loop
+    """
+
+    def __init__(
+        self,
+        handler: BatchHandler,
+        workers: int = 1,
+        batch_size: int = 16,
+        wait_ms: float = 5,
+        initializer: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.handler = handler
+        self.initializer = initializer
+        self.is_ready = False
+        self.workers = workers
+        self.batch_size = batch_size
+        self.wait_ms = wait_ms
+        self._executor: Optional[Executor] = None
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def start(self) -> None:
+        if self._executor is not None or self.workers <= 0:
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+
+    async def warmup(self) -> None:
+        """Запускает все процессы пула (или инициализацию в текущем процессе) и ждет их готовности"""
+        loop = asyncio.get_running_loop()
+        if self.initializer is not None:
+            await asyncio.gather(
+                *[loop.run_in_executor(self._executor, self.initializer) for _ in range(max(self.workers, 1))],
+            )
+        self.is_ready = True
+
+    def shutdown(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, request: Any) -> Any:  # noqa: ANN401
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        requests = [request for request, _ in batch]
+        try:
+            # Without workers the batch runs in the default thread pool of the current process
+            results = await loop.run_in_executor(self._executor, self.handler, requests)
+        except Exception as e:
+            self._fail_batch(batch, e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _fail_batch(batch: List[Tuple[Any, asyncio.Future]], exception: Exception) -> None:
+        # Futures of cancelled requests are already done
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(exception)
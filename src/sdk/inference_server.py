@@ -0,0 +1,201 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+import os
+import struct
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import srsly
+
+from sdk.inference import InferencePool
+
+# Frame: <body length: uint32> <msgpack body>.
+# Request body: [request id, [request, ...]], response body: [request id, [result, ...] or None, error or None]
+_frame_length = struct.Struct('>I')
+
+
+class InferenceServerError(Exception):
+    pass
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Any:  # noqa: ANN401
+    (length,) = _frame_length.unpack(await reader.readexactly(_frame_length.size))
+    return srsly.msgpack_loads(await reader.readexactly(length))
+
+
+def write_frame(writer: asyncio.StreamWriter, body: Any) -> None:  # noqa: ANN401
+    data = srsly.msgpack_dumps(body)
+    writer.write(_frame_length.pack(len(data)) + data)
+
+
+class InferenceServer:
+    """
+    Отвечает на батчи запросов к моделям по Unix сокету. Запросы всех клиентов выполняются через один inference pool,
+    ответы на запросы одного соединения отправляются по мере готовности, а не в порядке получения
+    """
+
+    def __init__(self, pool: InferencePool, socket_path: str) -> None:
+        self.pool = pool
+        self.socket_path = socket_path
+
+    async def serve_forever(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        logging.info(f'Inference server is listening on {self.socket_path}')
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks: Set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    request_id, requests = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                task = asyncio.create_task(self._answer(writer, write_lock, request_id, requests))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _answer(
+        self,
+        writer: asyncio.StreamWriter,
+        write_lock: asyncio.Lock,
+        request_id: int,
+        requests: List[Any],
+    ) -> None:
+        try:
+            body = [request_id, await asyncio.gather(*[self.pool.submit(x) for x in requests]), None]
+        except Exception as e:
+            logging.exception('Inference request failed')
+            body = [request_id, None, repr(e)]
+        async with write_lock:
+            write_frame(writer, body)
+            await writer.drain()
+
+
+class _Connection:
+    """Соединение клиента с сервером. Несколько запросов могут ожидать ответа одновременно"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.reader_task = asyncio.get_running_loop().create_task(self._read_responses())
+
+    @property
+    def is_closed(self) -> bool:
+        return self.reader_task.done()
+
+    async def request(self, request_id: int, requests: List[Any]) -> List[Any]:
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            write_frame(self.writer, [request_id, requests])
+            await self.writer.drain()
+            return await future
+        finally:
+            self.pending.pop(request_id, None)
+
+    def close(self) -> None:
+        self.reader_task.cancel()
+
+    async def _read_responses(self) -> None:
+        try:
+            with contextlib.suppress(asyncio.IncompleteReadError, ConnectionError):
+                while True:
+                    self._set_response(*await read_frame(self.reader))
+        finally:
+            self.writer.close()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionResetError('Connection to the inference server is closed'))
+
+    def _set_response(self, request_id: int, results: Optional[List[Any]], error: Optional[str]) -> None:
+        future = self.pending.get(request_id)
+        # The request may have timed out before the response arrived
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(InferenceServerError(error))
+        else:
+            future.set_result(results)
+
+
+class InferenceClient:
+    """
+    Клиент inference сервера: пул соединений, в каждом из которых несколько запросов ожидают ответа одновременно.
+    После ошибки соединения сервер считается недоступным retry_after секунд, чтобы не ждать таймаут на каждом запросе
+    """
+
+    def __init__(self, socket_path: str, pool_size: int = 4, timeout: float = 5, retry_after: float = 30) -> None:
+        self.socket_path = socket_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.is_ready = False
+        self._connections: List[_Connection] = []
+        self._connection_numbers = itertools.count()
+        self._request_ids = itertools.count()
+        self._unavailable_until = 0.0
+        # Created on first use so it belongs to the running event loop
+        self._open_lock: Optional[asyncio.Lock] = None
+        # Called when the first connection is opened after all were closed, the server may have been restarted
+        self.connect_hooks: List[Callable[[], None]] = []
+
+    async def connect(self) -> None:
+        await self._call(self._open_connection())
+        self.is_ready = True
+
+    def close(self) -> None:
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+        self.is_ready = False
+
+    async def submit(self, request: Any) -> Any:  # noqa: ANN401
+        return (await self.submit_many([request]))[0]
+
+    async def submit_many(self, requests: List[Any]) -> List[Any]:
+        if time.monotonic() < self._unavailable_until:
+            raise InferenceServerError('Inference server is unavailable')
+        connection = await self._call(self._get_connection())
+        # A failed request marks the server as not ready again in _call
+        self.is_ready = True
+        return await self._call(connection.request(next(self._request_ids), requests))
+
+    async def _call(self, awaitable: Any) -> Any:  # noqa: ANN401
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            self._unavailable_until = time.monotonic() + self.retry_after
+            self.is_ready = False
+            raise InferenceServerError(f'Inference server {self.socket_path} is unavailable: {e!r}') from e
+
+    async def _get_connection(self) -> _Connection:
+        self._connections = [x for x in self._connections if not x.is_closed]
+        if len(self._connections) < self.pool_size:
+            if self._open_lock is None:
+                self._open_lock = asyncio.Lock()
+            # Connections are opened one at a time, so concurrent requests do not overflow the pool
+            async with self._open_lock:
+                if len(self._connections) < self.pool_size:
+                    return await self._open_connection()
+        return self._connections[next(self._connection_numbers) % len(self._connections)]
+
+    async def _open_connection(self) -> _Connection:
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        connection = _Connection(reader, writer)
+        if all(x.is_closed for x in self._connections):
+            for hook in self.connect_hooks:
+                hook()
+        self._connections.append(connection)
+        return connection
@@ -0,0 +1,60 @@
+from typing import Iterable, List, Optional, cast
+
+import spacy
+from spacy.lang.ru.lemmatizer import RussianLemmatizer
+from spacy.tokens import Doc, Token
+
+from config import LemmatizerMode
+from sdk.cache import LRUCache
+from sdk.snapshots import load_pipeline
+
+
+class Lemmatizer:
+    """
+    Лемматизатор для предобработки описаний операций перед классификатором категорий
+    """
+
+    full_pipeline: str = 'ru_core_news_md'
+    full_pipeline_exclude: List[str] = ['parser', 'ner', 'senter']
+
+    def __init__(
+        self,
+        mode: LemmatizerMode = LemmatizerMode.FULL,
+        lookup_mode: str = 'pymorphy3_lookup',
+        memo_size: int = 100000,
+    ) -> None:
+        self.mode = mode
+        # Лемма в lookup режиме не зависит от контекста, поэтому ее можно запоминать для каждого слова
+        self.memo: LRUCache[str] = LRUCache('lemma_memo', maxsize=memo_size)
+        if mode == LemmatizerMode.LOOKUP:
+            self.nlp = spacy.blank('ru')
+            self._lookup = cast(RussianLemmatizer, self.nlp.add_pipe('lemmatizer', config={'mode': lookup_mode}))
+        else:
+            self.nlp = load_pipeline(self.full_pipeline, exclude=self.full_pipeline_exclude)
+
+    def lemmatize(self, text: str) -> List[str]:
+        if self.mode == LemmatizerMode.LOOKUP:
+            return self._lookup_lemmas(self.nlp.make_doc(text))
+        return [token.lemma_ for token in self.nlp(text)]
+
+    def lemmatize_many(
+        self,
+        texts: Iterable[str],
+        batch_size: Optional[int] = None,
+        n_process: int = 1,
+    ) -> List[List[str]]:
+        if self.mode == LemmatizerMode.LOOKUP:
+            # Lookups are memoized per word, extra processes would only add startup cost
+            return [self._lookup_lemmas(self.nlp.make_doc(text)) for text in texts]
+        docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+        return [[token.lemma_ for token in doc] for doc in docs]
+
+    def _lookup_lemmas(self, doc: Doc) -> List[str]:
+        return [self._lookup_lemma(token) for token in doc]
+
+    def _lookup_lemma(self, token: Token) -> str:
+        lemma = self.memo.get(token.text)
+        if lemma is None:
+            lemma = self._lookup.lemmatize(token)[0]
+            self.memo.set(token.text, lemma)
+        return lemma
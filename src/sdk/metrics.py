@@ -0,0 +1,36 @@
+from typing import Dict, Union
+
+
+class HitCounter:
+    """
+    Счетчик попаданий и промахов (кэши, быстрые пути перед моделями)
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self) -> None:
+        self.hits += 1
+
+    def miss(self) -> None:
+        self.misses += 1
+
+    @property
+    def total(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.total if self.total else 0.0
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hit_rate, 4)}
+
+    def __repr__(self) -> str:
+        return f'{self.name}: hits={self.hits} misses={self.misses} hit_rate={self.hit_rate:.2%}'
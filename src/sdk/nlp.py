@@ -0,0 +1,99 @@
+import os
+import threading
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from spacy import Language
+
+from config import LemmatizerMode, settings
+from sdk.lemmatizer import Lemmatizer
+from sdk.snapshots import load_pipeline
+
+
+class ModelRegistry:
+    """
+    NLP модели бота. Загружаются при первом обращении или заранее в фоне (`load`),
+    после загрузки прогоняются на тестовом батче
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._lemmatizer: Optional[Lemmatizer] = None
+        self._operation_model: Optional[Language] = None
+        self._category_model: Optional[Language] = None
+        # Called after every (re)load of the models, e.g. to drop cached predictions
+        self.reload_hooks: List[Callable[[], None]] = []
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def lemmatizer(self) -> Lemmatizer:
+        self.load()
+        return self._lemmatizer  # type: ignore[return-value]
+
+    @property
+    def operation_model(self) -> Language:
+        self.load()
+        return self._operation_model  # type: ignore[return-value]
+
+    @property
+    def category_model(self) -> Language:
+        self.load()
+        return self._category_model  # type: ignore[return-value]
+
+    @property
+    def operation_model_path(self) -> str:
+        return os.path.join(settings.AI_MODELS_DIR, settings.OPERATION_MODEL)
+
+    @property
+    def category_model_path(self) -> str:
+        return os.path.join(settings.AI_MODELS_DIR, settings.CATEGORY_MODEL)
+
+    @property
+    def pipelines(self) -> List[Tuple[str, Sequence[str]]]:
+        """spaCy пайплайны, которые загружает реестр: (имя или путь, исключенные компоненты)"""
+        pipelines: List[Tuple[str, Sequence[str]]] = [(self.operation_model_path, ()), (self.category_model_path, ())]
+        if settings.LEMMATIZER_MODE == LemmatizerMode.FULL:
+            pipelines.append((Lemmatizer.full_pipeline, Lemmatizer.full_pipeline_exclude))
+        return pipelines
+
+    def load(self) -> None:
+        if self._ready.is_set():
+            return
+        with self._lock:
+            if not self._ready.is_set():
+                self._load()
+
+    def reload(self) -> None:
+        with self._lock:
+            self._ready.clear()
+            self._load()
+
+    def _load(self) -> None:
+        self._lemmatizer = Lemmatizer(
+            settings.LEMMATIZER_MODE,
+            lookup_mode=settings.LEMMATIZER_LOOKUP_MODE,
+            memo_size=settings.LEMMATIZER_MEMO_SIZE,
+        )
+        self._operation_model = load_pipeline(self.operation_model_path)
+        self._category_model = load_pipeline(self.category_model_path)
+        self._warmup()
+        for hook in self.reload_hooks:
+            hook()
+        self._ready.set()
+
+    def _warmup(self) -> None:
+        texts = list(settings.NLP_WARMUP_TEXTS)
+        list(self._operation_model.pipe(texts))  # type: ignore[union-attr]
+        lemmas = self._lemmatizer.lemmatize_many(texts)  # type: ignore[union-attr]
+        list(self._category_model.pipe(' '.join(x) for x in lemmas))  # type: ignore[union-attr]
+
+
+models = ModelRegistry()
+
+
+def load_models() -> None:
+    """Инициализатор процессов inference pool"""
+    models.load()
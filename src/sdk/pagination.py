@@ -0,0 +1,76 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, NamedTuple, Optional, Sequence, Tuple
+
+# (created_at, id) of a row, rows are shown from the newest to the oldest
+PageKey = Tuple[datetime, int]
+
+CURSOR_DATETIME_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+class CursorDirection(str, Enum):
+    # Older rows than the key: next pages
+    AFTER = 'a'
+    # Newer rows than the key: previous pages
+    BEFORE = 'b'
+    # The oldest rows: the last page, no key
+    LAST = 'l'
+
+
+class Cursor(NamedTuple):
+    """
+    Позиция страницы относительно ключа соседней страницы: skip строк после (или до) ключа.
+    Кодируется в callback data без символа `_`
+    """
+
+    direction: CursorDirection
+    skip: int = 0
+    key: Optional[PageKey] = None
+
+    def encode(self) -> str:
+        if self.key is None:
+            return f'{self.direction.value}.{self.skip}'
+        created_at, row_id = self.key
+        return f'{self.direction.value}.{self.skip}.{created_at.strftime(CURSOR_DATETIME_FORMAT)}.{row_id}'
+
+    @classmethod
+    def decode(cls, value: str) -> 'Cursor':
+        direction, skip, *key = value.split('.')
+        if not key:
+            return cls(CursorDirection(direction), int(skip))
+        created_at, row_id = key
+        return cls(
+            CursorDirection(direction),
+            int(skip),
+            (datetime.strptime(created_at, CURSOR_DATETIME_FORMAT), int(row_id)),
+        )
+
+
+def get_page_keys(rows: Sequence[Any]) -> Tuple[Optional[PageKey], Optional[PageKey]]:
+    """Ключи первой и последней строки страницы, строки с атрибутами created_at и id"""
+    if not rows:
+        return None, None
+    return (rows[0].created_at, rows[0].id), (rows[-1].created_at, rows[-1].id)
+
+
+def get_page_cursor(
+    page: int,
+    current_page: int,
+    max_page: int,
+    page_size: int,
+    first_key: Optional[PageKey],
+    last_key: Optional[PageKey],
+) -> Optional[Cursor]:
+    """
+    Курсор перехода с текущей страницы (ключи ее первой и последней строки) на страницу page.
+    None - первая страница или переход по номеру страницы
+    """
+    if page == 1:
+        return None
+    if page == max_page:
+        return Cursor(CursorDirection.LAST)
+    if page > current_page and last_key is not None:
+        return Cursor(CursorDirection.AFTER, (page - current_page - 1) * page_size, last_key)
+    if page < current_page and first_key is not None:
+        return Cursor(CursorDirection.BEFORE, (current_page - page - 1) * page_size, first_key)
+    return None
@@ -1,15 +1,24 @@
 import abc
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Type, Union
 
 import sqlalchemy as sa
-from sqlalchemy.sql import Delete, Select, Selectable
-from sqlalchemy.sql.elements import BooleanClauseList
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Compiled
+from sqlalchemy.sql import ClauseElement, Delete, Insert, Select, Selectable
+from sqlalchemy.sql.elements import BindParameter, BooleanClauseList
+from sqlalchemy.types import TypeEngine
 
+from config import settings
 from database import ModelType  # type: ignore[attr-defined]
 from database import database  # type: ignore[attr-defined]
+from sdk.cache import LRUCache
+
+if TYPE_CHECKING:
+    from database import Base
 
 Queryable = Union[Select, Delete, BooleanClauseList, Selectable]
+Statement = Union[str, ClauseElement]
 
 
 class BaseModifier(metaclass=abc.ABCMeta):
@@ -107,8 +116,117 @@ class SearchModifier(BaseModifier):
         )
 
 
+class CompiledStatement:
+    """
+    Запрос с готовой компиляцией из кэша и параметрами текущего вызова.
+    databases компилирует переданный запрос сам, поэтому compile() возвращает уже скомпилированный запрос
+    """
+
+    def __init__(
+        self: 'CompiledStatement',
+        statement: ClauseElement,
+        compiled: Compiled,
+        extracted_parameters: Sequence[BindParameter],
+    ) -> None:
+        self.statement = statement
+        self.compiled = compiled
+        self.extracted_parameters = extracted_parameters
+
+    def compile(self: 'CompiledStatement', *args, **kwargs) -> 'CompiledStatement':
+        return self
+
+    def construct_params(
+        self: 'CompiledStatement',
+        params: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        return self.compiled.construct_params(params, extracted_parameters=self.extracted_parameters, **kwargs)
+
+    @property
+    def params(self: 'CompiledStatement') -> Dict[str, Any]:
+        return self.construct_params()
+
+    def __getattr__(self: 'CompiledStatement', name: str) -> Any:  # noqa: ANN401
+        return getattr(self.compiled, name)
+
+
 class BaseRepository:
-    model: Type[ModelType]  # type: ignore[valid-type]
+    model: Type['Base']
+    # Compiled statements by their SQLAlchemy cache key: the statement structure (tables, columns,
+    # modifier classes and fields, operators) without the bound values, shared by all repositories
+    compiled_cache: LRUCache[Compiled] = LRUCache('compiled_statements', maxsize=settings.DB_COMPILED_CACHE_SIZE)
+
+    @classmethod
+    def prepare(
+        cls: Type['BaseRepository'],
+        query: Statement,
+        values: Optional[Dict[str, Any]] = None,
+        types: Optional[Dict[str, TypeEngine]] = None,
+    ) -> Union[ClauseElement, CompiledStatement]:
+        """
+        Запрос для databases: скомпилированный один раз на структуру запроса, с параметрами вызова.
+        types - типы колонок результата SQL строки по имени, значения этих колонок приводятся к типам как в ORM запросах
+        """
+        if isinstance(query, str):
+            query = cls.get_text_query(query, values, types)
+        cache_key = query._generate_cache_key()
+        # IN lists are rendered into the SQL with one parameter per value, so such statements are compiled each time
+        if cache_key is None or any(x.expanding or x.literal_execute for x in cache_key.bindparams):
+            return query
+        compiled = cls.compiled_cache.get(cache_key.key)
+        if compiled is None:
+            compiled = query.compile(
+                # The dialect databases compiles with, so the cached SQL is exactly what it would produce
+                dialect=database._backend._dialect,
+                cache_key=cache_key,
+                compile_kwargs={'render_postcompile': True},
+            )
+            cls.compiled_cache.set(cache_key.key, compiled)
+        return CompiledStatement(query, compiled, cache_key.bindparams)
+
+    @classmethod
+    def get_text_query(
+        cls: Type['BaseRepository'],
+        query: str,
+        values: Optional[Dict[str, Any]] = None,
+        types: Optional[Dict[str, TypeEngine]] = None,
+    ) -> ClauseElement:
+        text = sa.text(query).bindparams(**values) if values else sa.text(query)
+        return text.columns(**types) if types else text
+
+    @classmethod
+    async def fetch_all(
+        cls: Type['BaseRepository'],
+        query: Statement,
+        values: Optional[Dict[str, Any]] = None,
+        types: Optional[Dict[str, TypeEngine]] = None,
+    ) -> List[Any]:
+        return await database.fetch_all(cls.prepare(query, values, types))
+
+    @classmethod
+    async def fetch_one(
+        cls: Type['BaseRepository'],
+        query: Statement,
+        values: Optional[Dict[str, Any]] = None,
+        types: Optional[Dict[str, TypeEngine]] = None,
+    ) -> Any:  # noqa: ANN401
+        return await database.fetch_one(cls.prepare(query, values, types))
+
+    @classmethod
+    async def fetch_val(
+        cls: Type['BaseRepository'],
+        query: Statement,
+        values: Optional[Dict[str, Any]] = None,
+    ) -> Any:  # noqa: ANN401
+        return await database.fetch_val(cls.prepare(query, values))
+
+    @classmethod
+    async def execute(
+        cls: Type['BaseRepository'],
+        query: Statement,
+        values: Optional[Dict[str, Any]] = None,
+    ) -> Any:  # noqa: ANN401
+        return await database.execute(cls.prepare(query, values))
 
     @classmethod
     async def get(
@@ -116,7 +234,7 @@ class BaseRepository:
         modifiers: List[BaseModifier],
     ) -> Optional[Dict[Any, Any]]:
         query = cls._modify_query(cls.get_base_query(), modifiers).limit(1)  # type: ignore[union-attr]
-        result = await database.fetch_one(query)
+        result = await cls.fetch_one(query)
         return dict(result) if result else None
 
     @classmethod
@@ -129,7 +247,7 @@ class BaseRepository:
             modifiers = []
         # Issue: https://github.com/dropbox/sqlalchemy-stubs/issues/48
         query = cls._modify_query(sa.insert(cls.model).values(**kwargs), modifiers)  # type: ignore[arg-type]
-        return await database.execute(query)
+        return await cls.execute(query)
 
     @classmethod
     async def create_or_ignore(
@@ -141,22 +259,61 @@ class BaseRepository:
             modifiers = []
         # Issue: https://github.com/dropbox/sqlalchemy-stubs/issues/48
         query = cls._modify_query(
-            sa.insert(cls.model).values(**kwargs).prefix_with('OR IGNORE'),  # type: ignore[arg-type]
+            cls.get_insert().values(**kwargs).on_conflict_do_nothing(),  # type: ignore[arg-type]
             modifiers,
         )
-        return await database.execute(query)
+        return await cls.execute(query)
 
     @classmethod
-    async def create_many(
+    async def bulk_insert(
         cls: Type['BaseRepository'],
         values: List[Dict[str, Any]],
-        modifiers: Optional[List[BaseModifier]] = None,
-    ) -> Optional[Any]:
-        if modifiers is None:
-            modifiers = []
-        # Issue: https://github.com/dropbox/sqlalchemy-stubs/issues/48
-        query = cls._modify_query(sa.insert(cls.model).values(values), modifiers)  # type: ignore[arg-type]
-        return await database.execute(query)
+        chunk_size: int = settings.DB_BULK_CHUNK_SIZE,
+    ) -> None:
+        """Вставка строк по chunk_size в одной транзакции"""
+        await cls._bulk_execute(cls.get_insert(), values, chunk_size)
+
+    @classmethod
+    async def bulk_upsert(
+        cls: Type['BaseRepository'],
+        values: List[Dict[str, Any]],
+        conflict_keys: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+        chunk_size: int = settings.DB_BULK_CHUNK_SIZE,
+    ) -> None:
+        """
+        INSERT ... ON CONFLICT (conflict_keys) по chunk_size строк в одной транзакции.
+        update_fields - поля, обновляемые при конфликте: по умолчанию все, кроме conflict_keys, пустой - DO NOTHING
+        """
+        if not values:
+            return
+        insert = cls.get_insert()
+        if update_fields is None:
+            update_fields = [x for x in values[0] if x not in conflict_keys]
+        if update_fields:
+            query = insert.on_conflict_do_update(
+                index_elements=conflict_keys,
+                set_={x: insert.excluded[x] for x in update_fields},
+            )
+        else:
+            query = insert.on_conflict_do_nothing(index_elements=conflict_keys)
+        await cls._bulk_execute(query, values, chunk_size)
+
+    @classmethod
+    async def _bulk_execute(
+        cls: Type['BaseRepository'],
+        query: Insert,
+        values: List[Dict[str, Any]],
+        chunk_size: int,
+    ) -> None:
+        if not values:
+            return
+        # One multi-row VALUES statement per chunk, each within the bind parameters limit
+        chunk_size = max(min(chunk_size, settings.DB_MAX_BIND_PARAMETERS // len(values[0])), 1)
+        async with database.transaction():
+            for start in range(0, len(values), chunk_size):
+                end = start + chunk_size
+                await cls.execute(query.values(values[start:end]))
 
     @classmethod
     async def update(
@@ -173,8 +330,8 @@ class BaseRepository:
             modifiers,
         )
         if fetch_one:
-            return await database.fetch_one(query)
-        return await database.execute(query)
+            return await cls.fetch_one(query)
+        return await cls.execute(query)
 
     @classmethod
     async def delete(
@@ -184,7 +341,7 @@ class BaseRepository:
         if modifiers is None:
             modifiers = []
         query = cls._modify_query(sa.delete(cls.model), modifiers)  # type: ignore[arg-type]
-        await database.execute(query)
+        await cls.execute(query)
 
     @classmethod
     async def all(
@@ -194,9 +351,31 @@ class BaseRepository:
         if modifiers is None:
             modifiers = []
         query = cls._modify_query(cls.get_base_query(), modifiers)
-        result = await database.fetch_all(query)
+        result = await cls.fetch_all(query)
         return [dict(row) for row in result] if result else []
 
+    @classmethod
+    def get_column_types(cls: Type['BaseRepository']) -> Dict[str, TypeEngine]:
+        """Типы колонок модели для SQL строк, выбирающих ее строки"""
+        return {column.name: column.type for column in cls.model.__table__.columns}
+
+    @classmethod
+    def get_insert(cls: Type['BaseRepository']) -> Insert:
+        """INSERT диалекта базы: поддерживает ON CONFLICT"""
+        dialect = postgresql if database.url.dialect == 'postgresql' else sqlite
+        return dialect.insert(cls.model)
+
+    @classmethod
+    def json_array_agg(cls: Type['BaseRepository'], **fields: str) -> str:
+        """
+        SQL агрегата строк группы в JSON массив объектов {ключ: выражение} для диалекта базы.
+        Оба драйвера возвращают его строкой
+        """
+        pairs = ', '.join(f"'{key}', {expression}" for key, expression in fields.items())
+        if database.url.dialect == 'postgresql':
+            return f'json_agg(jsonb_build_object({pairs}))'
+        return f'json_group_array(json_object({pairs}))'
+
     @classmethod
     def get_base_query(
         cls: Type['BaseRepository'],
@@ -228,4 +407,4 @@ class BaseRepository:
             sa.select([sa.func.count()]).select_from(cls.model),  # type: ignore[arg-type]
             modifiers,
         )
-        return await database.fetch_val(query)
+        return await cls.fetch_val(query)
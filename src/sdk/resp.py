@@ -0,0 +1,96 @@
+import asyncio
+from typing import Any, List, Optional, Union
+from urllib.parse import unquote, urlparse
+
+RespValue = Union[None, int, bytes, List[Any]]
+
+
+class RespError(Exception):
+    pass
+
+
+def encode_command(*args: Union[str, int, bytes]) -> bytes:
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        value = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(value), value))
+    return b''.join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> RespValue:
+    line = await reader.readuntil(b'\r\n')
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b'+':
+        return body
+    if prefix == b'-':
+        raise RespError(body.decode())
+    if prefix == b':':
+        return int(body)
+    if prefix in (b'$', b'*'):
+        return await _read_aggregate(reader, prefix, int(body))
+    raise RespError(f'Unexpected reply: {line!r}')
+
+
+async def _read_aggregate(reader: asyncio.StreamReader, prefix: bytes, length: int) -> RespValue:
+    # Bulk string or array, negative length is null
+    if length < 0:
+        return None
+    if prefix == b'$':
+        return (await reader.readexactly(length + 2))[:-2]
+    return [await read_reply(reader) for _ in range(length)]
+
+
+class RespClient:
+    """
+    Минимальный клиент Redis протокола (RESP2): одно соединение, команды выполняются по очереди.
+    Соединение открывается при первой команде и переоткрывается при следующей после ошибки
+    """
+
+    def __init__(self, url: str, timeout: float = 5) -> None:
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        # Created on first use so it belongs to the running event loop
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def execute(self, *args: Union[str, int, bytes]) -> RespValue:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            try:
+                return await asyncio.wait_for(self._execute(*args), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                # A reply may still be on the way, so the connection cannot be reused
+                self.close()
+                raise
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _execute(self, *args: Union[str, int, bytes]) -> RespValue:
+        if self._writer is None:
+            try:
+                await self._connect()
+            except BaseException:
+                self.close()
+                raise
+        return await self._request(*args)
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password is not None:
+            await self._request('AUTH', self.password)
+        if self.db:
+            await self._request('SELECT', self.db)
+
+    async def _request(self, *args: Union[str, int, bytes]) -> RespValue:
+        self._writer.write(encode_command(*args))  # type: ignore[union-attr]
+        await self._writer.drain()  # type: ignore[union-attr]
+        return await read_reply(self._reader)  # type: ignore[arg-type]
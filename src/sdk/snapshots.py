@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import os
+import struct
+from typing import Optional, Sequence
+
+import numpy
+import spacy
+import srsly
+from spacy import Language
+from thinc.api import Config
+
+from config import settings
+
+# Increment when the layout of the snapshot file changes
+SNAPSHOT_VERSION = 2
+
+# Snapshot file: <header length: uint32> <msgpack header> <msgpack payload>.
+# The vectors table is stored next to it as a plain .npy file so it can be memory-mapped
+_header_length = struct.Struct('>I')
+
+
+def get_source_path(name: str) -> str:
+    """Каталог модели: путь как есть или каталог установленного пакета (ru_core_news_md)"""
+    if spacy.util.is_package(name):
+        return str(spacy.util.get_package_path(name))
+    return name
+
+
+def get_snapshot_path(name: str) -> str:
+    snapshots_dir = settings.NLP_SNAPSHOTS_DIR or os.path.join(settings.AI_MODELS_DIR, 'snapshots')
+    return os.path.join(snapshots_dir, f'{os.path.basename(os.path.normpath(name))}.snapshot')
+
+
+def get_vectors_path(name: str) -> str:
+    return f'{os.path.splitext(get_snapshot_path(name))[0]}.vectors.npy'
+
+
+def attach_vectors(nlp: Language, vectors_path: str) -> None:
+    """
+    Подключает таблицу векторов из .npy файла. С NLP_MMAP_VECTORS таблица открывается только для чтения
+    через numpy.memmap, и все процессы на хосте используют одну ее копию в page cache
+    """
+    nlp.vocab.vectors.data = numpy.load(vectors_path, mmap_mode='r' if settings.NLP_MMAP_VECTORS else None)
+
+
+def get_source_hash(name: str, exclude: Sequence[str] = ()) -> str:
+    """
+    Хэш исходной модели: версия spaCy, исключенные компоненты и путь, размер и время изменения каждого файла.
+    Содержимое файлов не читается, чтобы проверка снимка не стоила столько же, сколько загрузка модели
+    """
+    source_path = get_source_path(name)
+    digest = hashlib.sha256(f'{spacy.__version__}:{",".join(sorted(exclude))}'.encode())
+    for root, dirs, files in os.walk(source_path):
+        dirs[:] = sorted(x for x in dirs if x != '__pycache__')
+        for file_name in sorted(files):
+            file_path = os.path.join(root, file_name)
+            stat = os.stat(file_path)
+            digest.update(f'{os.path.relpath(file_path, source_path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()
+
+
+def build_snapshot(name: str, exclude: Sequence[str] = ()) -> str:
+    """Загружает модель через spacy.load и сохраняет ее снимок, возвращает путь к снимку"""
+    nlp = spacy.load(name, exclude=list(exclude))
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'name': name,
+        'hash': get_source_hash(name, exclude),
+    }
+    payload = {
+        'config': nlp.config.to_str(),
+        'meta': nlp.meta,
+        'model': nlp.to_bytes(exclude=['vectors']),
+        # Keys and settings of the vectors table, the table itself is in the .npy file
+        'vectors': nlp.vocab.vectors.to_bytes(exclude=['strings', 'vectors']),
+    }
+    snapshot_path = get_snapshot_path(name)
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    vectors_path = get_vectors_path(name)
+    with open(f'{vectors_path}.tmp', 'wb') as f:
+        numpy.save(f, nlp.vocab.vectors.data, allow_pickle=False)
+    os.replace(f'{vectors_path}.tmp', vectors_path)
+    header_bytes = srsly.msgpack_dumps(header)
+    tmp_path = f'{snapshot_path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_header_length.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(srsly.msgpack_dumps(payload))
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+
+def load_snapshot(name: str, exclude: Sequence[str] = ()) -> Optional[Language]:
+    """Восстанавливает модель из снимка, если он есть и собран из текущей версии модели"""
+    snapshot_path = get_snapshot_path(name)
+    if not os.path.exists(snapshot_path):
+        return None
+    with open(snapshot_path, 'rb') as f:
+        (header_length,) = _header_length.unpack(f.read(_header_length.size))
+        header = srsly.msgpack_loads(f.read(header_length))
+        if header.get('version') != SNAPSHOT_VERSION or header.get('hash') != get_source_hash(name, exclude):
+            logging.warning(f'NLP snapshot {snapshot_path} is outdated, loading {name} from source')
+            return None
+        payload = srsly.msgpack_loads(f.read())
+    config = Config().from_str(payload['config'])
+    nlp = spacy.util.load_model_from_config(config, meta=payload['meta'], exclude=list(exclude))
+    nlp.from_bytes(payload['model'], exclude=['vectors'])
+    nlp.vocab.vectors.from_bytes(payload['vectors'], exclude=['strings', 'vectors'])
+    attach_vectors(nlp, get_vectors_path(name))
+    return nlp
+
+
+def load_pipeline(name: str, exclude: Sequence[str] = ()) -> Language:
+    if settings.NLP_SNAPSHOTS:
+        nlp = load_snapshot(name, exclude)
+        if nlp is not None:
+            return nlp
+    if not settings.NLP_MMAP_VECTORS:
+        return spacy.load(name, exclude=list(exclude))
+    # vocab/vectors of a saved pipeline is an .npy file, so it is mapped instead of being read into memory
+    nlp = spacy.load(name, exclude=[*exclude, 'vectors'])
+    vocab_path = os.path.join(str(nlp.path), 'vocab')
+    nlp.vocab.vectors.from_disk(vocab_path, exclude=['strings', 'vectors'])
+    attach_vectors(nlp, os.path.join(vocab_path, 'vectors'))
+    return nlp
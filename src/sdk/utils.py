@@ -20,6 +20,7 @@ from modules.operations.enums import (
     RepeatType,
 )
 from modules.operations.schemas import Operation, OperationImport
+from sdk.pagination import PageKey, get_page_cursor
 
 
 def strip_string(text: str) -> str:
@@ -204,30 +205,40 @@ def get_pagination_range(
     return from_range, to_range
 
 
+def get_pagination_button(btn_no: int, page: int, current_page: int, max_page: int, min_page: int) -> Tuple[str, int]:
+    """Текст кнопки пагинации и номер страницы, на которую она ведет"""
+    if btn_no == 0 and page != min_page:
+        return '◀️', min_page
+    if btn_no + 1 == settings.PAGINATION_MAX_PAGES and page != max_page:
+        return '▶️', max_page
+    if page == current_page:
+        return f'[{page}]', page
+    return str(page), page
+
+
 def get_pagination_markup(
     current_page: int = 1,
     max_page: int = 1,
     min_page: int = 1,
     is_regular_operation: bool = False,
+    first_key: Optional[PageKey] = None,
+    last_key: Optional[PageKey] = None,
 ) -> List[types.InlineKeyboardButton]:
+    """first_key и last_key - (created_at, id) первой и последней операции текущей страницы"""
     from_range, to_range = get_pagination_range(current_page, max_page, min_page)
 
     markup = []
     for btn_no, page in enumerate(range(from_range, to_range + 1)):
-        text = str(page)
-        data = page
-
-        if btn_no == 0 and page != min_page:
-            text, data = '◀️', min_page
-        elif btn_no + 1 == settings.PAGINATION_MAX_PAGES and page != max_page:
-            text, data = '▶️', max_page
-        elif page == current_page:
-            text, data = f'[{page}]', page
-
+        text, data = get_pagination_button(btn_no, page, current_page, max_page, min_page)
+        cursor = get_page_cursor(data, current_page, max_page, settings.PAGE_SIZE, first_key, last_key)
         markup.append(
             types.InlineKeyboardButton(
                 text=text,
-                callback_data=OperationAllCallback.pagination(data, is_regular_operation),
+                callback_data=OperationAllCallback.pagination(
+                    data,
+                    is_regular_operation,
+                    cursor.encode() if cursor is not None else None,
+                ),
             ),
         )
 
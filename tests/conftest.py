@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import tempfile
+from typing import Iterator
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+DATABASE_PATH = os.path.join(tempfile.gettempdir(), f'financykabot-tests-{os.getpid()}.sqlite3')
+
+# Settings are read when the project modules are imported: the bot token only has to be well-formed
+os.environ.setdefault('BOT_TOKEN', '123456:ABCdefGhIJKlmnoPQRstuVWxyZ')
+os.environ.setdefault('AI_MODELS_DIR', os.path.join(PROJECT_ROOT, 'models'))
+# Never the database from the environment or .env, the tests migrate it from scratch
+os.environ['DB_URI'] = f'sqlite:///{DATABASE_PATH}'
+
+
+@pytest.fixture(scope='session')
+def migrated_database() -> Iterator[str]:
+    """SQLite база тестов после всех миграций alembic"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(PROJECT_ROOT, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(PROJECT_ROOT, 'alembic'))
+    # The migration that adds companies moves the operations of the first user to a new company
+    command.upgrade(config, '72e61604b5ce')
+    with sqlite3.connect(DATABASE_PATH) as connection:
+        connection.execute("insert into users (chat_id, first_name) values (1, 'Seed')")
+    command.upgrade(config, 'head')
+    with sqlite3.connect(DATABASE_PATH) as connection:
+        for table in ('companies_users', 'companies', 'users'):
+            connection.execute(f'delete from {table}')
+    yield DATABASE_PATH
+    os.remove(DATABASE_PATH)
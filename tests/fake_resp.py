@@ -0,0 +1,94 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from modules.companies.selection import _UNSELECT_SCRIPT
+from sdk.resp import read_reply
+
+
+class FakeRespServer:
+    """
+    Сервер протокола Redis (RESP2) в памяти для тестов: AUTH, SELECT, GET, SET, DEL и EVAL скрипта снятия выбора.
+    Записывает полученные команды, может закрыть соединение или не ответить на следующую команду
+    """
+
+    def __init__(self, password: Optional[str] = None) -> None:
+        self.password = password
+        self.data: Dict[bytes, bytes] = {}
+        self.commands: List[List[bytes]] = []
+        self.connections = 0
+        self.drop_next = False
+        self.hang_next = False
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Dict[bytes, Callable[..., bytes]] = {
+            b'AUTH': self._auth,
+            b'SELECT': self._select,
+            b'GET': self._get,
+            b'SET': self._set,
+            b'DEL': self._delete,
+            b'EVAL': self._eval,
+        }
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]  # type: ignore[union-attr]
+        return f'redis://{host}:{port}/0'
+
+    async def __aenter__(self) -> 'FakeRespServer':
+        self._server = await asyncio.start_server(self._handle_connection, '127.0.0.1', 0)
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self._server.close()  # type: ignore[union-attr]
+        await self._server.wait_closed()  # type: ignore[union-attr]
+
+    def command_names(self) -> List[str]:
+        return [command[0].decode().upper() for command in self.commands]
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    command = await read_reply(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                self.commands.append(command)  # type: ignore[arg-type]
+                if self.drop_next:
+                    self.drop_next = False
+                    break
+                if self.hang_next:
+                    self.hang_next = False
+                    continue
+                writer.write(self._execute(*command))  # type: ignore[misc]
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _execute(self, name: bytes, *args: bytes) -> bytes:
+        name = name.upper()
+        handler = self._handlers.get(name)
+        if handler is None:
+            return b"-ERR unknown command '%s'\r\n" % name
+        return handler(*args)
+
+    def _auth(self, password: bytes) -> bytes:
+        return b'+OK\r\n' if password.decode() == self.password else b'-WRONGPASS invalid password\r\n'
+
+    def _select(self, db: bytes) -> bytes:
+        return b'+OK\r\n'
+
+    def _get(self, key: bytes) -> bytes:
+        value = self.data.get(key)
+        return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def _set(self, key: bytes, value: bytes) -> bytes:
+        self.data[key] = value
+        return b'+OK\r\n'
+
+    def _delete(self, *keys: bytes) -> bytes:
+        return b':%d\r\n' % sum(self.data.pop(key, None) is not None for key in keys)
+
+    def _eval(self, script: bytes, keys_count: bytes, key: bytes, company_id: bytes) -> bytes:
+        if script != _UNSELECT_SCRIPT.encode():
+            return b'-ERR unknown script\r\n'
+        return self._delete(key) if self.data.get(key) == company_id else b':0\r\n'
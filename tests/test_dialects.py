@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import pathlib
+from typing import Any, Awaitable, Callable
+
+import databases
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+from config import settings
+from database import SQLiteConnection, database, get_database_options
+from modules.companies.models import Company, CompanyUser
+from modules.companies.repositories import CompanyRepository
+from modules.users.models import User
+from modules.users.repositories import UserRepository
+
+# Queries are also executed on PostgreSQL when an empty database is given,
+# e.g. postgresql://postgres@localhost/financykabot_test. Tables are created in a transaction that is rolled back
+POSTGRES_URI = os.environ.get('TEST_POSTGRES_URI')
+DIALECT_URIS = {'sqlite': 'sqlite:///{path}', 'postgresql': POSTGRES_URI or 'postgresql://localhost/financykabot'}
+TABLES = [User.__table__, Company.__table__, CompanyUser.__table__]
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def dialect(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Диалект, для которого репозитории строят SQL"""
+    monkeypatch.setattr(database, 'url', databases.DatabaseURL(DIALECT_URIS[request.param]))
+    return request.param
+
+
+@pytest.fixture()
+def run_query(dialect: str, tmp_path: pathlib.Path) -> Callable[[Callable[[databases.Database], Awaitable[Any]]], Any]:
+    """Выполняет функцию с соединением к базе диалекта с таблицами пользователей и компаний, изменения откатываются"""
+    if dialect == 'postgresql' and POSTGRES_URI is None:
+        pytest.skip('TEST_POSTGRES_URI is not set')
+    url = DIALECT_URIS[dialect].format(path=tmp_path / 'test.sqlite3')
+    sql_dialect = postgresql.dialect() if dialect == 'postgresql' else sqlite.dialect()
+
+    async def run(call: Callable[[databases.Database], Awaitable[Any]]) -> Any:  # noqa: ANN401
+        async with databases.Database(url, force_rollback=True) as connection:
+            for table in TABLES:
+                await connection.execute(str(CreateTable(table).compile(dialect=sql_dialect)))
+            return await call(connection)
+
+    return lambda call: asyncio.run(run(call))
+
+
+def test_json_array_agg_sql(dialect: str) -> None:
+    expected = {
+        'sqlite': "json_group_array(json_object('id', x.id, 'name', x.name))",
+        'postgresql': "json_agg(jsonb_build_object('id', x.id, 'name', x.name))",
+    }
+    assert CompanyRepository.json_array_agg(id='x.id', name='x.name') == expected[dialect]
+
+
+def test_json_array_agg(run_query: Callable) -> None:
+    aggregate = CompanyRepository.json_array_agg(id='x.id', name='x.name')
+    query = f"select {aggregate} from (select 1 as id, 'a' as name union all select 2, 'b') x"
+
+    result = run_query(lambda connection: connection.fetch_val(query))
+
+    assert sorted(json.loads(result), key=lambda x: x['id']) == [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}]
+
+
+def test_get_insert_dialect(dialect: str) -> None:
+    insert = UserRepository.get_insert()
+    assert isinstance(insert, postgresql.Insert if dialect == 'postgresql' else sqlite.Insert)
+    query = insert.values(chat_id=1).on_conflict_do_update(
+        index_elements=['chat_id'],
+        set_={'first_name': insert.excluded.first_name},
+    )
+    sql = str(query.compile(dialect=postgresql.dialect() if dialect == 'postgresql' else sqlite.dialect()))
+    assert 'ON CONFLICT (chat_id) DO UPDATE SET first_name = excluded.first_name' in sql
+
+
+def test_insert_on_conflict(run_query: Callable) -> None:
+    async def upsert_twice(connection: databases.Database) -> Any:  # noqa: ANN401
+        for first_name in ('Old', 'New'):
+            insert = UserRepository.get_insert().values(chat_id=1, first_name=first_name)
+            await connection.execute(
+                insert.on_conflict_do_update(
+                    index_elements=['chat_id'],
+                    set_={'first_name': insert.excluded.first_name},
+                ),
+            )
+        await connection.execute(CompanyRepository.get_insert().values(id=1, name='c', creator_id=1))
+        await connection.execute(
+            CompanyRepository.get_insert().values(id=1, name='c', creator_id=1).on_conflict_do_nothing(),
+        )
+        return (
+            await connection.fetch_all('select chat_id, first_name from users'),
+            await connection.fetch_val('select count(*) from companies'),
+        )
+
+    users, companies_count = run_query(upsert_twice)
+
+    assert [tuple(x) for x in users] == [(1, 'New')]
+    assert companies_count == 1
+
+
+def test_get_companies_query(run_query: Callable) -> None:
+    async def get_companies(connection: databases.Database) -> Any:  # noqa: ANN401
+        await connection.execute(
+            sa.insert(User.__table__).values(
+                [
+                    {'chat_id': 1, 'first_name': 'Ann', 'last_name': None, 'username': 'ann'},
+                    {'chat_id': 2, 'first_name': 'Bob', 'last_name': 'B', 'username': None},
+                ],
+            ),
+        )
+        await connection.execute(
+            sa.insert(Company.__table__).values(
+                [{'id': 1, 'name': 'Home', 'creator_id': 1}, {'id': 2, 'name': 'Work', 'creator_id': 2}],
+            ),
+        )
+        await connection.execute(
+            sa.insert(CompanyUser.__table__).values(
+                [{'chat_id': 1, 'company_id': 1}, {'chat_id': 2, 'company_id': 1}, {'chat_id': 2, 'company_id': 2}],
+            ),
+        )
+        return await connection.fetch_all(CompanyRepository.get_companies_query() + ' order by c.id')
+
+    companies = run_query(get_companies)
+
+    assert [(x['id'], x['name'], x['creator_id']) for x in companies] == [(1, 'Home', 1), (2, 'Work', 2)]
+    assert sorted(json.loads(companies[0]['participants']), key=lambda x: x['chat_id']) == [
+        {'chat_id': 1, 'first_name': 'Ann', 'last_name': None, 'username': 'ann'},
+        {'chat_id': 2, 'first_name': 'Bob', 'last_name': 'B', 'username': None},
+    ]
+    assert json.loads(companies[1]['participants']) == [
+        {'chat_id': 2, 'first_name': 'Bob', 'last_name': 'B', 'username': None},
+    ]
+
+
+def test_database_options(dialect: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'DB_URI', DIALECT_URIS[dialect])
+    monkeypatch.setattr(settings, 'DB_POOL_MIN_SIZE', 2)
+    monkeypatch.setattr(settings, 'DB_POOL_MAX_SIZE', 5)
+    monkeypatch.setattr(settings, 'DB_STATEMENT_CACHE_SIZE', 100)
+
+    options = get_database_options()
+
+    if dialect == 'postgresql':
+        assert options == {'statement_cache_size': 100, 'min_size': 2, 'max_size': 5}
+    else:
+        # SQLite has no pool: databases opens a connection per query
+        assert options == {'cached_statements': 100, 'factory': SQLiteConnection}
+
+
+@pytest.mark.skipif(POSTGRES_URI is None, reason='TEST_POSTGRES_URI is not set')
+def test_postgres_pool_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'DB_URI', POSTGRES_URI)
+    monkeypatch.setattr(settings, 'DB_POOL_MIN_SIZE', 2)
+    monkeypatch.setattr(settings, 'DB_POOL_MAX_SIZE', 5)
+
+    async def get_pool_size() -> Any:  # noqa: ANN401
+        assert POSTGRES_URI is not None
+        async with databases.Database(POSTGRES_URI, **get_database_options()) as connection:
+            pool = connection._backend._pool
+            return pool.get_min_size(), pool.get_max_size()
+
+    assert asyncio.run(get_pool_size()) == (2, 5)
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable
+
+import pytest
+
+from database import database
+from modules.fsm.repositories import FSMStateRepository
+from sdk.fsm import DatabaseStorage
+
+
+def run_with_storages(call: Callable[[DatabaseStorage, DatabaseStorage], Awaitable[None]]) -> None:
+    """Выполняет функцию с двумя хранилищами, как в двух процессах бота с общей базой"""
+
+    async def run() -> None:
+        await database.connect()
+        try:
+            await call(*(DatabaseStorage(ttl=60, cache_size=10, cache_ttl=60) for _ in range(2)))
+        finally:
+            await database.execute('delete from fsm_states')
+            await database.disconnect()
+
+    asyncio.run(run())
+
+
+@pytest.mark.usefixtures('migrated_database')
+def test_writes_are_visible_to_other_storage() -> None:
+    async def set_state(first: DatabaseStorage, second: DatabaseStorage) -> None:
+        # Missing states are not cached, the state set by the first storage is read right away
+        assert await second.get_state(chat=1, user=2) is None
+        await first.set_state(chat=1, user=2, state='Form:name')
+        await first.update_data(chat=1, user=2, name='Ann')
+        assert await second.get_state(chat=1, user=2) == 'Form:name'
+        assert await second.get_data(chat=1, user=2) == {'name': 'Ann'}
+
+    run_with_storages(set_state)
+
+
+@pytest.mark.usefixtures('migrated_database')
+def test_finish_deletes_state() -> None:
+    async def finish(first: DatabaseStorage, second: DatabaseStorage) -> None:
+        await first.set_state(chat=1, user=2, state='Form:name')
+        await first.set_data(chat=1, user=2, data={'name': 'Ann'})
+        await first.finish(chat=1, user=2)
+        assert await first.get_state(chat=1, user=2) is None
+        assert await second.get_data(chat=1, user=2) == {}
+        assert await database.fetch_val('select count(*) from fsm_states') == 0
+
+    run_with_storages(finish)
+
+
+@pytest.mark.usefixtures('migrated_database')
+def test_reset_state_keeps_data() -> None:
+    async def reset(first: DatabaseStorage, second: DatabaseStorage) -> None:
+        await first.set_state(chat=1, user=2, state='Form:name')
+        await first.set_data(chat=1, user=2, data={'name': 'Ann'})
+        await first.reset_state(chat=1, user=2, with_data=False)
+        row = await FSMStateRepository.get_state(1, 2, updated_after=datetime(1970, 1, 1))
+        assert row is not None
+        assert row['state'] is None
+        assert await second.get_data(chat=1, user=2) == {'name': 'Ann'}
+
+    run_with_storages(reset)
@@ -0,0 +1,72 @@
+import os
+from typing import Dict, List
+
+import pytest
+
+from config import LemmatizerMode, settings
+
+# Descriptions whose words have one normal form regardless of the part of speech
+SAMPLE = (
+    'продукты',
+    'аренду квартиры',
+    'такси до работы',
+    'бензин',
+    'корм для кота',
+    'лекарства в аптеке',
+    'билеты в кино',
+    'обед в кафе',
+)
+SAMPLE_LEMMAS = [
+    ['продукт'],
+    ['аренда', 'квартира'],
+    ['такси', 'до', 'работа'],
+    ['бензин'],
+    ['корм', 'для', 'кот'],
+    ['лекарство', 'в', 'аптека'],
+    ['билет', 'в', 'кино'],
+    ['обед', 'в', 'кафе'],
+]
+
+
+def test_lookup_lemmas() -> None:
+    pytest.importorskip('spacy')
+    from sdk.lemmatizer import Lemmatizer
+
+    lemmatizer = Lemmatizer(LemmatizerMode.LOOKUP, lookup_mode=settings.LEMMATIZER_LOOKUP_MODE)
+    assert lemmatizer.lemmatize_many(SAMPLE) == SAMPLE_LEMMAS
+
+
+def test_full_and_lookup_categories_parity(monkeypatch: pytest.MonkeyPatch) -> None:
+    spacy = pytest.importorskip('spacy')
+    from commands.nlp import CheckLemmatizerParity
+    from modules.operations.services import OperationService
+    from sdk.lemmatizer import Lemmatizer
+    from sdk.nlp import models
+
+    if not spacy.util.is_package(Lemmatizer.full_pipeline):
+        pytest.skip(f'{Lemmatizer.full_pipeline} is not installed')
+    for path, component in ((models.operation_model_path, 'ner'), (models.category_model_path, 'textcat')):
+        if not os.path.exists(os.path.join(path, component, 'model')):
+            pytest.skip(f'{path} is not downloaded')
+
+    categories: Dict[LemmatizerMode, List[List[str]]] = {}
+    # The configured mode goes last, so the registry is left as the bot uses it
+    other_mode = LemmatizerMode.LOOKUP if settings.LEMMATIZER_MODE == LemmatizerMode.FULL else LemmatizerMode.FULL
+    for mode in (other_mode, settings.LEMMATIZER_MODE):
+        monkeypatch.setattr(settings, 'LEMMATIZER_MODE', mode)
+        models.reload()
+        OperationService.clear_nlp_caches()
+        categories[mode] = [
+            [x.value for x in OperationService.get_categories(text)] for text in CheckLemmatizerParity.reference_corpus
+        ]
+
+    mismatches = [
+        (text, full, lookup)
+        for text, full, lookup in zip(
+            CheckLemmatizerParity.reference_corpus,
+            categories[LemmatizerMode.FULL],
+            categories[LemmatizerMode.LOOKUP],
+        )
+        if full != lookup
+    ]
+    assert not mismatches
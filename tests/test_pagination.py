@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from modules.operations.enums import OperationAllCallback
+from config import settings
+from modules.operations.repositories import OperationRepository
+from sdk.pagination import Cursor, CursorDirection, get_page_cursor
+from sdk.utils import get_pagination_markup
+
+KEY = (datetime(2026, 10, 19, 12, 30, 15, 123456), 42)
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    [
+        None,
+        Cursor(CursorDirection.LAST),
+        Cursor(CursorDirection.AFTER, 10, KEY),
+        Cursor(CursorDirection.BEFORE, 0, KEY),
+    ],
+)
+def test_pagination_callback(cursor: Cursor) -> None:
+    data = OperationAllCallback.pagination(3, True, cursor.encode() if cursor is not None else None)
+    assert OperationAllCallback.parse_pagination(data) == (3, True, cursor)
+
+
+@pytest.mark.parametrize(
+    ('page', 'expected'),
+    [
+        (1, None),
+        (9, Cursor(CursorDirection.LAST)),
+        (4, Cursor(CursorDirection.AFTER, 0, KEY)),
+        (6, Cursor(CursorDirection.AFTER, 20, KEY)),
+        (2, Cursor(CursorDirection.BEFORE, 0, KEY)),
+    ],
+)
+def test_get_page_cursor(page: int, expected: Cursor) -> None:
+    assert get_page_cursor(page, 3, max_page=9, page_size=10, first_key=KEY, last_key=KEY) == expected
+
+
+def test_get_page_filter() -> None:
+    assert OperationRepository.get_page_filter(3, None) == ('', 'desc', {'offset': 2 * settings.PAGE_SIZE})
+    assert OperationRepository.get_page_filter(9, Cursor(CursorDirection.LAST)) == ('', 'asc', {'offset': 0})
+    assert OperationRepository.get_page_filter(4, Cursor(CursorDirection.AFTER, 10, KEY)) == (
+        'and (o.created_at, o.id) < (:created_at, :operation_id)',
+        'desc',
+        {'offset': 10, 'created_at': KEY[0], 'operation_id': KEY[1]},
+    )
+    assert OperationRepository.get_page_filter(2, Cursor(CursorDirection.BEFORE, 0, KEY))[:2] == (
+        'and (o.created_at, o.id) > (:created_at, :operation_id)',
+        'asc',
+    )
+
+
+def test_pagination_markup() -> None:
+    buttons = get_pagination_markup(6, max_page=9, first_key=KEY, last_key=KEY)
+    texts = [button.text for button in buttons]
+    assert texts[0] == '◀️'
+    assert texts[-1] == '▶️'
+    assert '[6]' in texts
+    assert OperationAllCallback.parse_pagination(buttons[0].callback_data)[0] == 1
+    assert OperationAllCallback.parse_pagination(buttons[-1].callback_data)[0] == 9
@@ -0,0 +1,81 @@
+from typing import Dict, List, Union
+
+import pytest
+
+from modules.operations.parsers import RuleBasedOperationParser
+
+
+@pytest.mark.parametrize(
+    ('text', 'expected'),
+    [
+        ('-100 грн продукты', {'AMOUNT': '-100', 'CURRENCY': 'грн', 'FOR': 'продукты'}),
+        ('+ 5000  usd   зарплата', {'AMOUNT': '+5000', 'CURRENCY': 'usd', 'FOR': 'зарплата'}),
+        ('-50 eur за такси', {'AMOUNT': '-50', 'CURRENCY': 'eur', 'FOR': 'такси'}),
+        (
+            '-100 грн каждый день за обед в кафе за углом',
+            {'AMOUNT': '-100', 'CURRENCY': 'грн', 'FOR': 'обед в кафе за углом', 'EVERYDAY': 'каждый день'},
+        ),
+        (
+            '-7 usd каждое 4 число за подписку за двоих',
+            {
+                'AMOUNT': '-7',
+                'CURRENCY': 'usd',
+                'FOR': 'подписку за двоих',
+                'EVERYMONTH': 'каждое 4 число',
+                'NUMBEROFDAY': [4],
+            },
+        ),
+        (
+            '-300 грн каждую неделю в пятницу за бассейн',
+            {
+                'AMOUNT': '-300',
+                'CURRENCY': 'грн',
+                'FOR': 'бассейн',
+                'EVERYWEEK': 'каждую неделю в пятницу',
+                'WEEKDAYS': [4],
+            },
+        ),
+        (
+            '-200 грн каждый понедельник и среду за английский',
+            {
+                'AMOUNT': '-200',
+                'CURRENCY': 'грн',
+                'FOR': 'английский',
+                'EVERYWEEK': 'каждый понедельник и среду',
+                'WEEKDAYS': [0, 2],
+            },
+        ),
+        (
+            '-8000 грн аренда квартиры каждое 1 и последнее число',
+            {
+                'AMOUNT': '-8000',
+                'CURRENCY': 'грн',
+                'FOR': 'аренда квартиры',
+                'EVERYMONTH': 'каждое 1 и последнее число',
+                'NUMBEROFDAY': [1, 'last'],
+            },
+        ),
+    ],
+)
+def test_parse(text: str, expected: Dict[str, Union[str, List]]) -> None:
+    assert RuleBasedOperationParser.parse(text) == expected
+
+
+@pytest.mark.parametrize(
+    'text',
+    [
+        # Not an operation or an unknown currency
+        'продукты 100 грн',
+        '-100 руб продукты',
+        '-1.5 usd кофе',
+        # Period words left in the description
+        '-100 грн продукты по понедельникам каждый',
+        # Periods that get_operation_regularity would only parse partially
+        '-100 грн каждый день вечером за ужин',
+        '-300 грн каждую неделю в пятницу вечером за бассейн',
+        '-7 usd каждое 4 число месяца за подписку',
+        '-7 usd каждое 40 число за подписку',
+    ],
+)
+def test_parse_falls_back_to_model(text: str) -> None:
+    assert RuleBasedOperationParser.parse(text) is None
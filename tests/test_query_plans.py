@@ -0,0 +1,57 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+import pytest
+
+from commands.queries import CheckQueryPlans
+from database import database
+
+# Index each repository query has to search by. None - the query reads the whole table by design
+EXPECTED_INDEXES = {
+    'OperationRepository.get_regular_operations': 'ix_operations_is_regular_operation_is_approved',
+    'OperationRepository.get_regular_operations(company_id)': 'ix_operations_company_id_is_approved_created_at',
+    'OperationRepository.get_stats': 'sqlite_autoindex_operation_daily_rollups_1',
+    'OperationRepository.get_dashboard_stats': 'sqlite_autoindex_operation_daily_rollups_1',
+    'OperationRepository.get_operations': 'ix_operations_company_id_is_approved_created_at',
+    'OperationRepository.get_operations(cursor)': 'ix_operations_company_id_is_approved_created_at',
+    'OperationRepository.count_operations': 'ix_operations_company_id_is_approved_created_at',
+    'OperationRepository.get_stats_by_categories': 'sqlite_autoindex_operation_daily_rollups_1',
+    'OperationRepository.get_expense_descriptions': None,
+    'OperationRepository.get_approved_categories': 'ix_operations_company_id_is_approved_created_at',
+    'OperationRepository.get_uncategorized_expenses': 'INTEGER PRIMARY KEY',
+    'OperationRepository.get_stats_version': 'INTEGER PRIMARY KEY',
+    'CompanyRepository.get_my_companies': 'sqlite_autoindex_companies_users_1',
+    'CompanyUserRepository.get_company_ids': 'sqlite_autoindex_companies_users_1',
+    'CompanyUserRepository.get_participants': 'ix_companies_users_company_id',
+    'CompanyRepository.get_all_companies': None,
+    'SelectedCompanyRepository.get_company_id': 'INTEGER PRIMARY KEY',
+    'FSMStateRepository.get_state': 'sqlite_autoindex_fsm_states_1',
+}
+
+
+async def explain(name: str) -> List[Tuple[List[str], List[str]]]:
+    """План и полные сканирования каждого запроса метода репозитория с параметрами вызова"""
+    await database.connect()
+    try:
+        plans = []
+        for query, values in await CheckQueryPlans.record_queries(CheckQueryPlans.get_queries()[name]):
+            rows = await database.fetch_all(f'EXPLAIN QUERY PLAN {query}', values)
+            plans.append(([row['detail'] for row in rows], await CheckQueryPlans.get_full_scans(query, values)))
+        return plans
+    finally:
+        await database.disconnect()
+
+
+def test_every_query_is_checked() -> None:
+    assert set(EXPECTED_INDEXES) == set(CheckQueryPlans.get_queries())
+
+
+@pytest.mark.usefixtures('migrated_database')
+@pytest.mark.parametrize(('name', 'index'), EXPECTED_INDEXES.items())
+def test_query_uses_index(name: str, index: Optional[str]) -> None:
+    plans = asyncio.run(explain(name))
+    assert plans
+    for plan, full_scans in plans:
+        if index is not None:
+            assert any(x.startswith('SEARCH ') and index in x for x in plan), plan
+            assert not full_scans
@@ -0,0 +1,103 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from sdk.resp import RespClient, RespError, encode_command, read_reply
+from tests.fake_resp import FakeRespServer
+
+
+def parse(data: bytes) -> Any:  # noqa: ANN401
+    async def read() -> Any:  # noqa: ANN401
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_reply(reader)
+
+    return asyncio.run(read())
+
+
+def test_encode_command() -> None:
+    assert encode_command('SET', 'key', 42, b'\r\n') == b'*4\r\n$3\r\nSET\r\n$3\r\nkey\r\n$2\r\n42\r\n$2\r\n\r\n\r\n'
+
+
+@pytest.mark.parametrize(
+    ('data', 'expected'),
+    [
+        (b'+OK\r\n', b'OK'),
+        (b':42\r\n', 42),
+        (b'$5\r\nhello\r\n', b'hello'),
+        (b'$0\r\n\r\n', b''),
+        (b'$-1\r\n', None),
+        (b'*-1\r\n', None),
+        (b'*2\r\n$1\r\na\r\n*1\r\n:1\r\n', [b'a', [1]]),
+    ],
+)
+def test_read_reply(data: bytes, expected: Any) -> None:  # noqa: ANN401
+    assert parse(data) == expected
+
+
+def test_read_reply_error() -> None:
+    with pytest.raises(RespError, match='ERR wrong number of arguments'):
+        parse(b'-ERR wrong number of arguments\r\n')
+
+
+def test_client_authenticates_and_selects_database() -> None:
+    async def run() -> FakeRespServer:
+        async with FakeRespServer(password='p@ss') as server:
+            client = RespClient(server.url.replace('redis://', 'redis://:p%40ss@').replace('/0', '/2'))
+            assert await client.execute('SET', 'key', 1) == b'OK'
+            assert await client.execute('GET', 'key') == b'1'
+            client.close()
+        return server
+
+    server = asyncio.run(run())
+
+    assert server.commands[:2] == [[b'AUTH', b'p@ss'], [b'SELECT', b'2']]
+    assert server.command_names() == ['AUTH', 'SELECT', 'SET', 'GET']
+    assert server.connections == 1
+
+
+def test_client_keeps_connection_after_error_reply() -> None:
+    async def run() -> FakeRespServer:
+        async with FakeRespServer() as server:
+            client = RespClient(server.url)
+            with pytest.raises(RespError, match='unknown command'):
+                await client.execute('PING')
+            assert await client.execute('GET', 'key') is None
+            client.close()
+        return server
+
+    assert asyncio.run(run()).connections == 1
+
+
+def test_client_reconnects_after_dropped_connection() -> None:
+    async def run() -> FakeRespServer:
+        async with FakeRespServer() as server:
+            client = RespClient(server.url)
+            server.drop_next = True
+            with pytest.raises(asyncio.IncompleteReadError):
+                await client.execute('SET', 'key', 1)
+            assert await client.execute('SET', 'key', 2) == b'OK'
+            client.close()
+        return server
+
+    server = asyncio.run(run())
+
+    assert server.connections == 2
+    assert server.data == {b'key': b'2'}
+
+
+def test_client_reconnects_after_timeout() -> None:
+    async def run() -> FakeRespServer:
+        async with FakeRespServer() as server:
+            client = RespClient(server.url, timeout=0.1)
+            server.hang_next = True
+            with pytest.raises(asyncio.TimeoutError):
+                await client.execute('GET', 'key')
+            # The connection that timed out is closed, the next command opens a new one
+            assert await client.execute('SET', 'key', 1) == b'OK'
+            client.close()
+        return server
+
+    assert asyncio.run(run()).connections == 2
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+from modules.companies.selection import RedisSelectionBackend, SelectedCompanyStore
+from sdk.resp import RespClient
+from tests.fake_resp import FakeRespServer
+
+T = TypeVar('T')
+
+
+def run_with_server(call: Callable[[FakeRespServer, RedisSelectionBackend], Awaitable[T]]) -> T:
+    async def run() -> T:
+        async with FakeRespServer() as server:
+            client = RespClient(server.url)
+            try:
+                return await call(server, RedisSelectionBackend(client))
+            finally:
+                client.close()
+
+    return asyncio.run(run())
+
+
+def test_redis_backend_select() -> None:
+    async def select(server: FakeRespServer, backend: RedisSelectionBackend) -> None:
+        assert await backend.get(42) is None
+        await backend.set(42, 7)
+        assert server.data == {b'selected_company:42': b'7'}
+        assert await backend.get(42) == 7
+
+    run_with_server(select)
+
+
+def test_redis_backend_unselect_only_selected_company() -> None:
+    async def unselect(server: FakeRespServer, backend: RedisSelectionBackend) -> None:
+        await backend.set(42, 7)
+        # Another company was selected meanwhile, its selection is kept
+        await backend.unselect(42, 8)
+        assert await backend.get(42) == 7
+        await backend.unselect(42, 7)
+        assert await backend.get(42) is None
+        assert server.command_names().count('EVAL') == 2
+
+    run_with_server(unselect)
+
+
+def test_store_caches_no_selection() -> None:
+    async def get_twice(server: FakeRespServer, backend: RedisSelectionBackend) -> None:
+        store = SelectedCompanyStore(backend, maxsize=10)
+        assert await store.get(42) is None
+        assert await store.get(42) is None
+        assert server.command_names() == ['GET']
+        assert store.cache.counter.hits == 1
+
+    run_with_server(get_twice)
+
+
+def test_store_writes_through() -> None:
+    async def select(server: FakeRespServer, backend: RedisSelectionBackend) -> None:
+        store = SelectedCompanyStore(backend, maxsize=10)
+        await store.set(42, 7)
+        assert await store.get(42) == 7
+        assert server.command_names() == ['SET']
+
+        await store.unselect(42, 7)
+        assert await store.get(42) is None
+        assert server.command_names() == ['SET', 'EVAL', 'GET']
+
+    run_with_server(select)
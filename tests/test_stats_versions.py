@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+import pytest
+
+from database import database
+from modules.operations.repositories import OperationRepository
+from modules.operations.services import OperationService
+
+NOW = datetime(2026, 10, 19, 12)
+
+
+def run_with_company(call: Callable[[int], Awaitable[None]]) -> None:
+    """Выполняет функцию с компанией без операций, созданные строки удаляются"""
+
+    async def run() -> None:
+        await database.connect()
+        try:
+            await database.execute("insert into users (chat_id, first_name) values (100, 'Ann')")
+            await database.execute("insert into companies (id, name, creator_id) values (100, 'Home', 100)")
+            await call(100)
+        finally:
+            for table in ('company_stats_versions', 'operation_daily_rollups', 'operations', 'companies', 'users'):
+                await database.execute(f'delete from {table}')
+            await database.disconnect()
+
+    asyncio.run(run())
+
+
+async def create_operation(company_id: int, amount: int, is_regular_operation: bool = False) -> int:
+    return await OperationRepository.create_operation(
+        amount=amount,
+        received_amount=amount,
+        currency='uah',
+        operation_type='income' if amount > 0 else 'expense',
+        description='test',
+        is_approved=True,
+        is_regular_operation=is_regular_operation,
+        rate=1,
+        base_amount=amount,
+        creator_id=100,
+        company_id=company_id,
+        created_at=NOW,
+    )
+
+
+@pytest.mark.usefixtures('migrated_database')
+def test_operation_changes_bump_version() -> None:
+    async def change(company_id: int) -> None:
+        assert await OperationRepository.get_stats_version(company_id) == 0
+        operation_id = await create_operation(company_id, -100)
+        created = await OperationRepository.get_stats_version(company_id)
+        assert created > 0
+        # Regular operations are not in the rollups, but change future operations
+        await create_operation(company_id, -50, is_regular_operation=True)
+        assert await OperationRepository.get_stats_version(company_id) > created
+        version = await OperationRepository.get_stats_version(company_id)
+        await OperationRepository.delete_operation(operation_id)
+        assert await OperationRepository.get_stats_version(company_id) > version
+        version = await OperationRepository.get_stats_version(company_id)
+        await OperationRepository.rebuild_rollups(company_id)
+        assert await OperationRepository.get_stats_version(company_id) > version
+
+    run_with_company(change)
+
+
+@pytest.mark.usefixtures('migrated_database')
+def test_cached_stats_see_changes_of_other_processes() -> None:
+    async def get_stats(company_id: int) -> None:
+        OperationService.stats_cache.clear()
+        day_from, day_to = NOW - timedelta(hours=1), NOW + timedelta(hours=1)
+        await create_operation(company_id, -100)
+        assert (await OperationService.get_stats(day_from, day_to, company_id))['expense'] == -100
+        # Written through the repository, as another process does, without touching this process' cache
+        await create_operation(company_id, -20)
+        assert (await OperationService.get_stats(day_from, day_to, company_id))['expense'] == -120
+
+    run_with_company(get_stats)